@@ -0,0 +1,160 @@
+"""
+Economics 1 Quiz Application - adaptive testing
+Keeps a difficulty for every question and an ability for every student on
+the same logit scale (a Rasch model with Elo-style updates). An adaptive
+test asks whichever unused question is closest in difficulty to the
+student's current ability - the most informative one - and stops as soon
+as the ability estimate is precise enough, so it needs fewer questions
+than the full test.
+
+Each answer updates one ability and one difficulty in O(1). The
+difficulty-sorted question order is built once per test and searched with
+bisect, so choosing the next question never rescans the bank.
+"""
+
+import json
+import math
+import os
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import policy
+
+# Elo step sizes; both shrink as a rating collects more answers
+STUDENT_K = 0.6
+ITEM_K = 0.4
+
+# Stop once the ability's standard error drops to this (in logits)
+TARGET_SE = 0.65
+MIN_QUESTIONS = 5
+
+
+def p_correct(ability: float, difficulty: float) -> float:
+    """Chance that a student of this ability answers an item of this difficulty"""
+    return 1 / (1 + math.exp(difficulty - ability))
+
+
+class Calibration:
+    """Question difficulties and student abilities, each with an answer count"""
+
+    def __init__(self, items: Optional[Dict[str, List[float]]] = None,
+                 students: Optional[Dict[str, List[float]]] = None):
+        self.items = items if items is not None else {}
+        self.students = students if students is not None else {}
+
+    @staticmethod
+    def item_key(test_num: int, index: int) -> str:
+        return f"{test_num}:{index}"
+
+    def difficulty(self, test_num: int, index: int) -> float:
+        return self.items.get(self.item_key(test_num, index), (0.0, 0))[0]
+
+    def ability(self, student: str) -> float:
+        return self.students.get(student, (0.0, 0))[0]
+
+    def update(self, student: str, test_num: int, index: int, correct: bool) -> float:
+        """Apply one answer to both ratings and return the student's new ability"""
+        s = self.students.setdefault(student, [0.0, 0])
+        i = self.items.setdefault(self.item_key(test_num, index), [0.0, 0])
+        surprise = (1.0 if correct else 0.0) - p_correct(s[0], i[0])
+        s[0] += STUDENT_K / math.sqrt(1 + s[1]) * surprise
+        i[0] -= ITEM_K / math.sqrt(1 + i[1]) * surprise
+        s[1] += 1
+        i[1] += 1
+        return s[0]
+
+    def save(self, path: str):
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"items": self.items, "students": self.students}, f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Calibration":
+        """Load a saved calibration, or start a blank one"""
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return cls()
+        return cls(data["items"], data["students"])
+
+
+def calibrate(attempts: Iterable[Dict], calibration: Optional[Calibration] = None) -> Calibration:
+    """Replay stored attempts, oldest first, to estimate every rating"""
+    calibration = calibration if calibration is not None else Calibration()
+    for attempt in attempts:
+        for answer in attempt.get("answers", []):
+            calibration.update(attempt["student"], attempt["test"], answer["question"], answer["correct"])
+    return calibration
+
+
+class AdaptiveTest:
+    """Chooses questions for one student sitting one test"""
+
+    def __init__(self, calibration: Calibration, student: str, test_num: int, total: int,
+                 max_questions: Optional[int] = None, target_se: float = TARGET_SE,
+                 grading_policy: Optional[policy.GradingPolicy] = None):
+        self.calibration = calibration
+        self.policy = grading_policy or policy.default()
+        self.student = student
+        self.test_num = test_num
+        self.total = total
+        self.max_questions = min(max_questions or total, total)
+        self.target_se = target_se
+        self.ability = calibration.ability(student)
+        self.asked: List[int] = []
+        self.correct = 0
+        self._asked = set()
+        self._information = 0.0
+        # Difficulties as they stood when the test began
+        self._order = sorted((calibration.difficulty(test_num, i), i) for i in range(total))
+
+    @property
+    def standard_error(self) -> float:
+        return 1 / math.sqrt(self._information) if self._information else math.inf
+
+    @property
+    def finished(self) -> bool:
+        asked = len(self.asked)
+        return (asked >= self.max_questions
+                or (asked >= MIN_QUESTIONS and self.standard_error <= self.target_se))
+
+    def next_question(self) -> Optional[int]:
+        """Index of the most informative unused question, or None when done"""
+        if self.finished:
+            return None
+        order = self._order
+        right = bisect_left(order, (self.ability, -1))
+        left = right - 1
+        while left >= 0 or right < len(order):
+            if right < len(order) and order[right][1] in self._asked:
+                right += 1
+            elif left >= 0 and order[left][1] in self._asked:
+                left -= 1
+            elif right >= len(order) or (left >= 0 and
+                                          self.ability - order[left][0] < order[right][0] - self.ability):
+                return order[left][1]
+            else:
+                return order[right][1]
+        return None
+
+    def answer(self, index: int, correct: bool):
+        """Record an answer and update the ratings"""
+        p = p_correct(self.ability, self.calibration.difficulty(self.test_num, index))
+        self._information += p * (1 - p)
+        self.asked.append(index)
+        self._asked.add(index)
+        if correct:
+            self.correct += 1
+        self.ability = self.calibration.update(self.student, self.test_num, index, correct)
+
+    def expected_score(self) -> int:
+        """The score the student would be expected to get on the full test"""
+        return round(sum(p_correct(self.ability, d) for d, _ in self._order))
+
+    def results(self) -> Tuple[int, int, str, str]:
+        """Full-test score, total, grade and status, equated from the ability estimate"""
+        score = self.expected_score()
+        grade, status, _ = self.policy.result(score, self.total)
+        return score, self.total, grade, status
@@ -0,0 +1,163 @@
+"""
+Economics 1 Quiz Application - question analytics
+Reads stored attempts once and works out, for every test:
+    p-value          share of students who got each question right
+    discrimination   corrected point-biserial: does getting the question
+                     right go with doing well on the rest of the test?
+    distractors      how often each choice was picked, and by how strong
+                     a set of students
+    Cronbach's alpha how consistently the test measures one thing
+Everything is kept in running NumPy sums, filled a chunk of attempts at a
+time, so memory stays the same however many attempts there are. Only
+complete, non-adaptive attempts are counted.
+"""
+
+import math
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+CHUNK_SIZE = 8192
+
+# Review thresholds
+TOO_EASY = 0.95
+TOO_HARD = 0.20
+WEAK_DISCRIMINATION = 0.10
+DEAD_DISTRACTOR = 0.05
+MIN_RESPONSES = 30
+
+
+class TestAccumulator:
+    """Running sums for one test"""
+
+    def __init__(self, answer_key: np.ndarray, choice_counts: np.ndarray):
+        self.key = answer_key.astype(np.int64)
+        self.choice_counts = choice_counts.astype(np.int64)
+        self.items = len(answer_key)
+        self.width = int(choice_counts.max()) + 1  # column 0 counts blanks
+        self.n = 0
+        self.sum_total = 0.0
+        self.sum_total_sq = 0.0
+        self.sum_correct = np.zeros(self.items)
+        self.sum_correct_total = np.zeros(self.items)
+        self.picks = np.zeros(self.items * self.width)
+        self.picks_total = np.zeros(self.items * self.width)
+        self._chunk: List[np.ndarray] = []
+
+    def add(self, answers: np.ndarray):
+        """Queue one attempt's 1-based answers in bank order"""
+        self._chunk.append(answers)
+        if len(self._chunk) >= CHUNK_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Fold the queued attempts into the running sums"""
+        if not self._chunk:
+            return
+        answers = np.vstack(self._chunk)
+        self._chunk = []
+        correct = (answers == self.key + 1).astype(np.float64)
+        totals = correct.sum(axis=1)
+
+        self.n += len(answers)
+        self.sum_total += totals.sum()
+        self.sum_total_sq += (totals ** 2).sum()
+        self.sum_correct += correct.sum(axis=0)
+        self.sum_correct_total += correct.T @ totals
+
+        cells = (np.arange(self.items) * self.width + answers).ravel()
+        size = self.items * self.width
+        self.picks += np.bincount(cells, minlength=size)
+        self.picks_total += np.bincount(cells, weights=np.repeat(totals, self.items), minlength=size)
+
+    def report(self) -> Dict:
+        """Statistics for every question, plus alpha for the whole test"""
+        self.flush()
+        n = self.n
+        if n == 0:
+            return {"attempts": 0, "alpha": None, "items": []}
+
+        mean_t = self.sum_total / n
+        var_t = self.sum_total_sq / n - mean_t ** 2
+        p = self.sum_correct / n
+        var_x = p * (1 - p)
+        # Correlate each item with the total of the *other* items
+        cov_xt = self.sum_correct_total / n - p * mean_t
+        cov_xr = cov_xt - var_x
+        var_r = var_t - 2 * cov_xt + var_x
+        with np.errstate(divide="ignore", invalid="ignore"):
+            discrimination = cov_xr / np.sqrt(var_x * var_r)
+
+        k = self.items
+        alpha = (k / (k - 1)) * (1 - var_x.sum() / var_t) if k > 1 and var_t > 0 else None
+
+        picks = self.picks.reshape(k, self.width)
+        picks_total = self.picks_total.reshape(k, self.width)
+        items = []
+        for i in range(k):
+            n_choices = int(self.choice_counts[i])
+            rates = (picks[i, 1:n_choices + 1] / n).tolist()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                means = (picks_total[i, 1:n_choices + 1] / picks[i, 1:n_choices + 1]).tolist()
+            d = float(discrimination[i])
+            item = {
+                "question": i,
+                "p_value": float(p[i]),
+                "discrimination": None if math.isnan(d) else d,
+                "choice_rates": rates,
+                "chooser_mean_score": [None if math.isnan(m) else m for m in means],
+                "blank_rate": float(picks[i, 0] / n),
+            }
+            item["flags"] = flag_item(item, int(self.key[i]), n)
+            items.append(item)
+        return {"attempts": n, "mean_score": mean_t, "alpha": alpha, "items": items}
+
+
+def flag_item(item: Dict, correct: int, n: int) -> List[str]:
+    """Reasons a question should be looked at"""
+    if n < MIN_RESPONSES:
+        return []
+    flags = []
+    if item["p_value"] > TOO_EASY:
+        flags.append("too easy")
+    if item["p_value"] < TOO_HARD:
+        flags.append("too hard")
+    d = item["discrimination"]
+    if d is not None and d < 0:
+        flags.append("negative discrimination - check the answer key")
+    elif d is not None and d < WEAK_DISCRIMINATION:
+        flags.append("weak discrimination")
+    rates = item["choice_rates"]
+    means = item["chooser_mean_score"]
+    for c, rate in enumerate(rates):
+        if c == correct:
+            continue
+        strong = means[c] is not None and means[correct] is not None and means[c] >= means[correct]
+        if strong and rate > rates[correct]:
+            flags.append(f"choice {c + 1} is picked more, and by stronger students - possible miskey")
+        elif strong:
+            flags.append(f"choice {c + 1} attracts strong students - may be misleading")
+        elif rate < DEAD_DISTRACTOR:
+            flags.append(f"choice {c + 1} is almost never picked")
+    return flags
+
+
+def analyse(attempts: Iterable[Dict], questions_bank) -> Dict[int, Dict]:
+    """One pass over stored attempts; returns a report per test number"""
+    accumulators: Dict[int, TestAccumulator] = {}
+    for test in questions_bank.tests():
+        key = np.frombuffer(test.answer_key(), dtype=np.uint8)
+        counts = np.frombuffer(test.choice_counts(), dtype=np.uint8)
+        accumulators[test.number] = TestAccumulator(key, counts)
+
+    for attempt in attempts:
+        acc = accumulators.get(attempt["test"])
+        if acc is None or attempt.get("mode") or len(attempt["answers"]) != acc.items:
+            continue
+        row = np.zeros(acc.items, dtype=np.int64)
+        for answer in attempt["answers"]:
+            if 0 < answer["answer"] <= acc.choice_counts[answer["question"]]:
+                row[answer["question"]] = answer["answer"]
+        acc.add(row)
+
+    return {number: acc.report() for number, acc in accumulators.items()}
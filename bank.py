@@ -0,0 +1,459 @@
+"""
+Economics 1 Quiz Application - compiled question bank
+Compiles question lists into a compact binary file and loads it through a
+memory map, decoding a question only when it is asked for.
+
+File layout (all integers little-endian):
+    header        magic "QBNK", version, test count, question count
+    test table    per test: number, first question, question count, name length
+    test names    UTF-8 names of every test, back to back
+    offset table  (question count + 1) absolute record offsets
+    records       per question: correct index, choice count, then the
+                  question, each choice, the explanation and the
+                  comma-separated tags as length-prefixed UTF-8 strings
+"""
+
+import mmap
+import os
+import struct
+import sys
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+MAGIC = b"QBNK"
+VERSION = 2
+
+_HEADER = struct.Struct("<4sHHI")
+_TEST_ENTRY = struct.Struct("<HIIH")
+_OFFSET = struct.Struct("<Q")
+_RECORD_HEAD = struct.Struct("<BB")
+_STR_LEN = struct.Struct("<I")
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+# Run from a zipapp (see bundle.py), modules live inside the archive file:
+# the bank and attempt store then sit beside it, and the bundled
+# questions are as new as the archive itself
+ARCHIVE = _HERE if os.path.isfile(_HERE) else None
+APP_DIR = os.path.dirname(ARCHIVE) if ARCHIVE else _HERE
+
+DEFAULT_BANK_PATH = os.path.join(APP_DIR, "economics1.qbk")
+SOURCE_PATH = ARCHIVE or os.path.join(_HERE, "questions.py")
+
+# (number, name, questions) - the same shape as questions.TESTS, whose
+# questions are dicts; Question objects work too
+TestSource = Tuple[int, str, Iterable[Union["Question", Dict]]]
+
+
+class BankError(Exception):
+    """Raised for malformed bank files or invalid source questions"""
+
+
+class Question:
+    """One multiple-choice question; immutable, so it is shared rather than copied
+
+    Choices and tags are tuples of interned strings, so stock answers such
+    as "All of the above" exist once however many questions use them.
+    """
+
+    __slots__ = ("question", "choices", "correct", "explanation", "tags")
+
+    def __init__(self, question: str, choices: Sequence[str], correct: int,
+                 explanation: str = "", tags: Sequence[str] = ()):
+        init = object.__setattr__
+        init(self, "question", question)
+        init(self, "choices", tuple(sys.intern(c) for c in choices))
+        init(self, "correct", correct)
+        init(self, "explanation", explanation)
+        init(self, "tags", tuple(sys.intern(t) for t in tags))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("questions are immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("questions are immutable")
+
+    def __reduce__(self):
+        return Question, (self.question, self.choices, self.correct, self.explanation, self.tags)
+
+    def _key(self) -> Tuple:
+        return (self.question, self.choices, self.correct, self.explanation, self.tags)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, Question) and self._key() == other._key()
+
+    def __hash__(self) -> int:
+        return hash(self._key())
+
+    def __repr__(self) -> str:
+        return f"Question({self.question!r}, {len(self.choices)} choices, correct={self.correct})"
+
+    @property
+    def answer(self) -> str:
+        """The text of the correct choice"""
+        return self.choices[self.correct]
+
+    @classmethod
+    def from_dict(cls, q: Dict, where: str = "question") -> "Question":
+        """Convert a source question dict, checking it has everything the quiz needs"""
+        for key in ("question", "choices", "correct"):
+            if key not in q:
+                raise BankError(f"{where}: missing '{key}'")
+        question = cls(str(q["question"]), [str(c) for c in q["choices"]], q["correct"],
+                       str(q.get("explanation", "")), [str(t) for t in q.get("tags", [])])
+        question.validate(where)
+        return question
+
+    def to_dict(self) -> Dict:
+        return {"question": self.question, "choices": list(self.choices), "correct": self.correct,
+                "explanation": self.explanation, "tags": list(self.tags)}
+
+    def validate(self, where: str = "question"):
+        choices = self.choices
+        if not choices or len(choices) > 255:
+            raise BankError(f"{where}: needs between 1 and 255 choices")
+        correct = self.correct
+        if not isinstance(correct, int) or not 0 <= correct < len(choices):
+            raise BankError(f"{where}: correct index {correct!r} is outside the {len(choices)} choices")
+        # The bank stores a question's tags joined with commas
+        bad = next((t for t in self.tags if "," in t), None)
+        if bad is not None:
+            raise BankError(f"{where}: tag {bad!r} contains a comma")
+
+
+def as_question(q: Union[Question, Dict], where: str = "question") -> Question:
+    """A Question from either a Question or a source dict"""
+    if isinstance(q, Question):
+        q.validate(where)
+        return q
+    return Question.from_dict(q, where)
+
+
+def _encode_str(text: str) -> bytes:
+    data = text.encode("utf-8")
+    return _STR_LEN.pack(len(data)) + data
+
+
+def encode_question(q: Question) -> bytes:
+    """A question's record as stored in the bank file"""
+    parts = [_RECORD_HEAD.pack(q.correct, len(q.choices)), _encode_str(q.question)]
+    parts.extend(_encode_str(choice) for choice in q.choices)
+    parts.append(_encode_str(q.explanation))
+    parts.append(_encode_str(",".join(q.tags)))
+    return b"".join(parts)
+
+
+def compile_bank(tests: Iterable[TestSource], path: str) -> int:
+    """Compile tests into a bank file at path and return the question count
+
+    Questions are streamed to a scratch file as they are read, so sources
+    can be generators and only the offset table is held in memory.
+    """
+    import shutil
+    import tempfile
+
+    entries = []
+    names = []
+    offsets = array("Q")
+    seen = set()
+    directory = os.path.dirname(os.path.abspath(path))
+
+    with tempfile.TemporaryFile(dir=directory) as body:
+        position = 0
+        for number, name, questions in tests:
+            if number in seen:
+                raise BankError(f"test {number} is defined more than once")
+            if not 0 <= number <= 0xFFFF:
+                raise BankError(f"test number {number} is outside 0-65535")
+            seen.add(number)
+            first = len(offsets)
+            for i, q in enumerate(questions, 1):
+                record = encode_question(as_question(q, f"test {number}, question {i}"))
+                offsets.append(position)
+                body.write(record)
+                position += len(record)
+            name_bytes = name.encode("utf-8")
+            entries.append((number, first, len(offsets) - first, len(name_bytes)))
+            names.append(name_bytes)
+        offsets.append(position)
+
+        names_blob = b"".join(names)
+        data_start = (_HEADER.size + _TEST_ENTRY.size * len(entries) + len(names_blob)
+                      + _OFFSET.size * len(offsets))
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as out:
+                out.write(_HEADER.pack(MAGIC, VERSION, len(entries), len(offsets) - 1))
+                for entry in entries:
+                    out.write(_TEST_ENTRY.pack(*entry))
+                out.write(names_blob)
+                table = array("Q", (data_start + off for off in offsets))
+                if sys.byteorder == "big":
+                    table.byteswap()
+                out.write(table.tobytes())
+                body.seek(0)
+                shutil.copyfileobj(body, out)
+            # mkstemp files are private; a bank is read by every student
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_path, 0o666 & ~umask)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    return len(offsets) - 1
+
+
+class BankTest:
+    """One test inside a bank, indexable like the old list of question dicts"""
+
+    def __init__(self, bank: "Bank", number: int, name: str, first: int, count: int):
+        self.bank = bank
+        self.number = number
+        self.name = name
+        self.first = first
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("question index out of range")
+        return self.bank.question(self.first + index)
+
+    def __iter__(self) -> Iterator[Question]:
+        for i in range(self.count):
+            yield self.bank.question(self.first + i)
+
+    def answer_key(self) -> array:
+        """The 0-based correct index of every question, without decoding any text"""
+        return array("B", (self.bank.correct_index(self.first + i) for i in range(self.count)))
+
+    def choice_counts(self) -> array:
+        """How many choices every question has, without decoding any text"""
+        return array("B", (self.bank.choice_count(self.first + i) for i in range(self.count)))
+
+    def __repr__(self) -> str:
+        return f"<BankTest {self.number}: {self.name} ({self.count} questions)>"
+
+
+class Bank:
+    """A compiled bank file opened through a read-only memory map"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n_tests, n_questions = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise BankError(f"{path} is not a question bank")
+        if version != VERSION:
+            raise BankError(f"{path} has bank version {version}, expected {VERSION}")
+
+        pos = _HEADER.size
+        entries = []
+        for _ in range(n_tests):
+            entries.append(_TEST_ENTRY.unpack_from(self._mm, pos))
+            pos += _TEST_ENTRY.size
+
+        self._tests = {}
+        for number, first, count, name_len in entries:
+            name = self._mm[pos:pos + name_len].decode("utf-8")
+            pos += name_len
+            self._tests[number] = BankTest(self, number, name, first, count)
+
+        self._offsets_at = pos
+        self.question_count = n_questions
+        # Live edits: bank-wide index -> (record bytes, question).
+        # Replaced as a whole, never mutated, so readers need no lock
+        self._overlay: Dict[int, Tuple[bytes, Question]] = {}
+        self._listeners: List[Callable[[Dict[int, Tuple[Question, Question]]], None]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Release the memory map"""
+        self._mm.close()
+
+    def tests(self) -> List[BankTest]:
+        """All tests in the order they were compiled"""
+        return list(self._tests.values())
+
+    def test(self, number: int) -> BankTest:
+        """Look up a test by its number"""
+        try:
+            return self._tests[number]
+        except KeyError:
+            raise BankError(f"{self.path} has no test {number}") from None
+
+    def _record_at(self, index: int) -> int:
+        if not 0 <= index < self.question_count:
+            raise IndexError("question index out of range")
+        return _OFFSET.unpack_from(self._mm, self._offsets_at + index * _OFFSET.size)[0]
+
+    def record_bytes(self, index: int) -> bytes:
+        """The encoded record of the question at a bank-wide index"""
+        patched = self._overlay.get(index)
+        if patched is not None:
+            return patched[0]
+        start = self._record_at(index)
+        end = _OFFSET.unpack_from(self._mm, self._offsets_at + (index + 1) * _OFFSET.size)[0]
+        return self._mm[start:end]
+
+    def correct_index(self, index: int) -> int:
+        """The correct choice of the question at a bank-wide index"""
+        patched = self._overlay.get(index)
+        if patched is not None:
+            return patched[1].correct
+        return self._mm[self._record_at(index)]
+
+    def choice_count(self, index: int) -> int:
+        """How many choices the question at a bank-wide index has"""
+        patched = self._overlay.get(index)
+        if patched is not None:
+            return len(patched[1].choices)
+        return self._mm[self._record_at(index) + 1]
+
+    def question(self, index: int) -> Question:
+        """Decode the question at a bank-wide index"""
+        patched = self._overlay.get(index)
+        if patched is not None:
+            return patched[1]
+        mm = self._mm
+        pos = self._record_at(index)
+        correct, n_choices = _RECORD_HEAD.unpack_from(mm, pos)
+        pos += _RECORD_HEAD.size
+
+        strings = []
+        for _ in range(n_choices + 3):
+            (length,) = _STR_LEN.unpack_from(mm, pos)
+            pos += _STR_LEN.size
+            strings.append(mm[pos:pos + length].decode("utf-8"))
+            pos += length
+
+        return Question(strings[0], strings[1:-2], correct, strings[-2],
+                        strings[-1].split(",") if strings[-1] else ())
+
+    def patch(self, changes: Dict[int, Union[Question, Dict]]) -> Dict[int, Tuple[Question, Question]]:
+        """Replace questions in place, by bank-wide index, without touching the file
+
+        Questions already decoded by running attempts are left alone; every
+        later read sees the new version. Listeners are told about each
+        change as (old question, new question). Returns those changes.
+        """
+        overlay = dict(self._overlay)
+        changed = {}
+        for index, q in changes.items():
+            self._record_at(index)  # range check
+            q = as_question(q, f"question {index}")
+            changed[index] = (self.question(index), q)
+            overlay[index] = (encode_question(q), q)
+        self._overlay = overlay
+        for listener in list(self._listeners):
+            listener(changed)
+        return changed
+
+    @property
+    def patched(self) -> bool:
+        """Whether live edits have made this bank differ from its file"""
+        return bool(self._overlay)
+
+    def add_listener(self, listener: Callable[[Dict[int, Tuple[Question, Question]]], None]):
+        """Call listener(changes) after every patch, to keep derived indexes current"""
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict[int, Tuple[Question, Question]]], None]):
+        """Stop calling a listener, e.g. when the bank is swapped out"""
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+
+def read_json_source(path: str) -> List[TestSource]:
+    """Read tests from JSON
+
+    Accepts {"tests": [{"number": 1, "name": "...", "questions": [...]}]}
+    or a bare list of question dicts, which becomes test 1.
+    """
+    import json
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        name = os.path.splitext(os.path.basename(path))[0]
+        return [(1, name, data)]
+    return [(int(t["number"]), t["name"], t["questions"]) for t in data["tests"]]
+
+
+def read_source(path: str, fmt: Optional[str] = None) -> List[TestSource]:
+    """Read every test in a source file, in any format formats.read_tests knows"""
+    import formats
+    return [(number, name, list(questions)) for number, name, questions in formats.read_tests(path, fmt)]
+
+
+def load_default_bank(path: str = DEFAULT_BANK_PATH) -> Bank:
+    """Open the built-in bank, recompiling it from questions.py when stale"""
+    opened = _open_if_fresh(path)
+    if opened is not None:
+        return opened
+    import questions
+    try:
+        compile_bank(questions.TESTS, path)
+        return Bank(path)
+    except OSError:
+        pass
+    # Read-only install: the compiled copy is kept in the user's own cache,
+    # never in a shared directory where someone else could plant a bank
+    fallback = os.path.join(cache_dir(), _cache_name(path))
+    opened = _open_if_fresh(fallback, owned=True)
+    if opened is not None:
+        return opened
+    compile_bank(questions.TESTS, fallback)
+    return Bank(fallback)
+
+
+def cache_dir() -> str:
+    """The current user's cache directory for the quiz, created private to them"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    directory = os.path.join(base, "economics1-quiz")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return directory
+
+
+def _cache_name(path: str) -> str:
+    """A cache file name for path; installs in different places get different ones"""
+    import hashlib
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()[:12]
+    return f"{digest}-{os.path.basename(path)}"
+
+
+def _owned(path: str) -> bool:
+    """Whether the current user owns path (always true where there are no user ids)"""
+    getuid = getattr(os, "getuid", None)
+    return getuid is None or os.stat(path).st_uid == getuid()
+
+
+def _open_if_fresh(path: str, owned: bool = False) -> Optional[Bank]:
+    """The bank at path, if it exists and is newer than its source
+
+    With owned, a file that belongs to another user is never opened.
+    """
+    try:
+        if (os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(SOURCE_PATH)
+                and (not owned or _owned(path))):
+            return Bank(path)
+    except BankError:
+        pass  # written by an older version: rebuild it
+    except OSError:
+        pass  # unreadable, say a private copy someone else compiled
+    return None
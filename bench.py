@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Economics 1 Quiz Application - benchmarks
+Measures how long the quiz takes to start and where run_test spends its
+time, at the real bank size and at synthetic banks of 10k, 100k and 1M
+questions. The quiz is driven with scripted answers and a null terminal,
+so nothing needs a person at the keyboard.
+
+    python3 bench.py                      run everything and print results
+    python3 bench.py --save-baseline      ...and keep them as the baseline
+    python3 bench.py --sizes 10000        only one synthetic size
+
+Results are compared against bench_baseline.json when it exists; any
+metric that got worse by more than --tolerance is reported and the exit
+status is 1.
+"""
+
+import argparse
+import builtins
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(HERE, "bench_baseline.json")
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+# Metrics where a bigger number is better; everything else is a time or size
+HIGHER_IS_BETTER = ("answers_per_s",)
+
+
+def _median_time(fn: Callable, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def _python(code: str, stdin: str = "") -> str:
+    result = subprocess.run([sys.executable, "-c", code], input=stdin, capture_output=True,
+                            text=True, cwd=HERE, check=True)
+    return result.stdout
+
+
+_RSS_PROBE = """
+import os, resource, sys
+if os.path.exists("/proc/self/status"):
+    # ru_maxrss survives exec on Linux, so it would include this benchmark's own peak
+    with open("/proc/self/status") as f:
+        print(next(int(l.split()[1]) for l in f if l.startswith("VmHWM")) / 1024)
+else:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024)
+"""
+
+
+def _max_rss_mb(code: str) -> float:
+    """Peak RSS of a fresh interpreter running code"""
+    out = _python(code + "\n" + _RSS_PROBE)
+    return float(out.strip().splitlines()[-1])
+
+
+def bench_startup(repeat: int) -> Dict[str, float]:
+    """Cold start: importing quiz, and reaching the menu then exiting"""
+    import_s = _median_time(lambda: _python("import quiz"), repeat)
+    menu_s = _median_time(
+        lambda: subprocess.run([sys.executable, "quiz.py", "--no-store"], input="8\n", cwd=HERE,
+                               capture_output=True, text=True, check=True), repeat)
+    rss = _max_rss_mb("import quiz")
+    return {"import_s": import_s, "menu_s": menu_s, "import_rss_mb": rss}
+
+
+class _NullOut:
+    def write(self, data):
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return True
+
+
+def bench_run_test(rounds: int) -> Dict[str, float]:
+    """run_test end to end with scripted answers, split into render and scoring time"""
+    import quiz
+    import render
+
+    quiz.screen = render.AnsiRenderer(_NullOut())
+    quiz.ATTEMPTS = None
+    test = quiz.TEST_1_QUESTIONS
+    total = len(test)
+
+    def scripted():
+        answers = iter(["", *(["1", ""] * total), ""])
+        return lambda prompt="": next(answers)
+
+    real_input = builtins.input
+    try:
+        elapsed = []
+        for _ in range(rounds):
+            builtins.input = scripted()
+            start = time.perf_counter()
+            quiz.run_test(1, test, "BENCHMARK")
+            elapsed.append(time.perf_counter() - start)
+    finally:
+        builtins.input = real_input
+
+    q = test[0]
+    layout = quiz.shuffle.Layout(1, total)
+
+    def render_one():
+        quiz.clear_screen()
+        choices, _, _ = layout.choices(0, q)
+        quiz.print_question(1, total, q.question)
+        quiz.print_choices(choices)
+        quiz.screen.present()
+
+    def score_one():
+        choices, correct, _ = layout.choices(0, q)
+        return 0 == correct
+
+    n = 2000
+    return {
+        "question_us": statistics.median(elapsed) / total * 1e6,
+        "render_us": _median_time(lambda: [render_one() for _ in range(n)], 3) / n * 1e6,
+        "score_us": _median_time(lambda: [score_one() for _ in range(n)], 3) / n * 1e6,
+    }
+
+
+def bench_scoring(sheets: int = 200_000) -> Dict[str, float]:
+    """Batch grading throughput on random answer arrays"""
+    try:
+        import numpy as np
+        import grading
+        import quiz
+    except ImportError:
+        return {}
+    grader = grading.BatchGrader(quiz.BANK)
+    total = len(grader.key(1))
+    answers = np.random.randint(1, 5, size=(sheets, total), dtype=np.uint8)
+    seconds = _median_time(lambda: grader.grade_array(1, answers), 3)
+    return {"answers_per_s": sheets * total / seconds}
+
+
+def synthetic_questions(count: int):
+    rng = random.Random(count)
+    for i in range(count):
+        yield {
+            "question": f"Synthetic question {i}: which option matches value {rng.random():.6f}?",
+            "choices": [f"Option {c} for item {i}" for c in "ABCD"],
+            "correct": rng.randrange(4),
+            "explanation": f"Generated explanation for synthetic item {i}.",
+        }
+
+
+def bench_bank_size(count: int, directory: str) -> Dict[str, float]:
+    """Compile, open and read a synthetic bank of count questions"""
+    import bank
+
+    path = os.path.join(directory, f"synthetic_{count}.qbk")
+    start = time.perf_counter()
+    bank.compile_bank([(1, "Synthetic", synthetic_questions(count))], path)
+    compile_s = time.perf_counter() - start
+
+    open_s = _median_time(lambda: bank.Bank(path).close(), 5)
+    b = bank.Bank(path)
+    test = b.test(1)
+    sample = [random.randrange(count) for _ in range(5000)]
+    decode_s = _median_time(lambda: [test[i] for i in sample], 3)
+    key_s = _median_time(test.answer_key, 1)
+    b.close()
+
+    rss = _max_rss_mb(f"import bank\nb = bank.Bank({path!r})\n"
+                      f"t = b.test(1)\n[t[i] for i in {sample[:1000]!r}]")
+    return {
+        "compile_s": compile_s,
+        "open_ms": open_s * 1000,
+        "decode_us": decode_s / len(sample) * 1e6,
+        "answer_key_ms": key_s * 1000,
+        "open_rss_mb": rss,
+        "file_mb": os.path.getsize(path) / (1024 * 1024),
+    }
+
+
+def run(sizes: List[int], repeat: int) -> Dict[str, Dict[str, float]]:
+    results = {"startup": bench_startup(repeat), "run_test": bench_run_test(repeat),
+               "scoring": bench_scoring()}
+    with tempfile.TemporaryDirectory() as directory:
+        for count in sizes:
+            results[f"bank_{count}"] = bench_bank_size(count, directory)
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Metrics that got worse than the baseline by more than tolerance"""
+    regressions = []
+    for group, metrics in results.items():
+        for name, value in metrics.items():
+            old = baseline.get(group, {}).get(name)
+            if not old:
+                continue
+            change = (old - value) / old if name in HIGHER_IS_BETTER else (value - old) / old
+            if change > tolerance:
+                regressions.append(f"{group}.{name}: {old:.4g} -> {value:.4g} ({change * 100:+.0f}% worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Economics 1 Quiz Application")
+    parser.add_argument("--sizes", type=int, nargs="*", default=DEFAULT_SIZES,
+                        help="synthetic bank sizes to test (default: 10k 100k 1M)")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per timing (median is kept)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline results file")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before flagging")
+    parser.add_argument("-o", "--output", help="also write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.repeat)
+    for group, metrics in results.items():
+        print(group)
+        for name, value in metrics.items():
+            print(f"  {name:<16} {value:>14,.3f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    status = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions against the baseline:")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1
+        else:
+            print("\nNo regressions against the baseline.")
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nSaved baseline to {args.baseline}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+"""
+Economics 1 Quiz Application - cohort statistics
+Running per-test aggregates over every stored attempt: how many, the mean
+and spread of scores, percentiles, how many passed and how many got each
+grade, and a leaderboard of the best students. The attempt store folds
+each attempt in as it is recorded, in O(1), and saves the aggregates with
+its checkpoints, so no query ever rereads the attempts themselves.
+
+Percentiles come from a fixed-resolution histogram of percentages (0.1%
+bins). Scores are bounded, so that gives every quantile to within 0.1%
+in constant memory, and two sketches merge by adding their counts.
+"""
+
+import math
+from array import array
+from bisect import insort
+from collections import Counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+GRADES = ("A", "B", "C", "D", "F")
+# Histogram bins per percentage point
+RESOLUTION = 10
+# Students kept on each test's leaderboard
+LEADERBOARD_SIZE = 20
+
+
+def marks(attempt: Dict) -> float:
+    """What an attempt was graded on: its marks under the grading policy, if they differ from its score"""
+    return attempt.get("marks", attempt["score"])
+
+
+def percentage(attempt: Dict) -> float:
+    return marks(attempt) / attempt["total"] * 100 if attempt["total"] else 0.0
+
+
+def grade_names(grades: Dict[str, float], names: Sequence[str] = GRADES) -> List[str]:
+    """names, then any other grades in grades with a count, e.g. from an earlier grading policy"""
+    return [*names, *(grade for grade, n in grades.items() if n and grade not in names)]
+
+
+def counts_toward_cohort(attempt: Dict) -> bool:
+    """Only full tests count; adaptive attempts each ask their own set of questions"""
+    return not attempt.get("mode")
+
+
+class QuantileSketch:
+    """Counts of percentages in fixed 1/RESOLUTION-point bins from 0 to 100"""
+
+    __slots__ = ("bins", "count")
+
+    def __init__(self):
+        self.bins = array("Q", bytes(8 * (100 * RESOLUTION + 1)))
+        self.count = 0
+
+    def add(self, value: float):
+        self.bins[min(max(int(value * RESOLUTION), 0), 100 * RESOLUTION)] += 1
+        self.count += 1
+
+    def merge(self, other: "QuantileSketch"):
+        for i, n in enumerate(other.bins):
+            if n:
+                self.bins[i] += n
+        self.count += other.count
+
+    def quantile(self, q: float) -> float:
+        """The value with a fraction q (0-1) of all values at or below it"""
+        if not self.count:
+            return float("nan")
+        target = max(1, math.ceil(q * self.count))
+        seen = 0
+        for i, n in enumerate(self.bins):
+            seen += n
+            if seen >= target:
+                return i / RESOLUTION
+        return 100.0
+
+    def rank(self, value: float) -> float:
+        """Fraction of values strictly below value"""
+        if not self.count:
+            return 0.0
+        below = sum(self.bins[:min(max(int(value * RESOLUTION), 0), 100 * RESOLUTION)])
+        return below / self.count
+
+    def to_dict(self) -> Dict[str, int]:
+        return {str(i): n for i, n in enumerate(self.bins) if n}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, int]) -> "QuantileSketch":
+        sketch = cls()
+        for i, n in data.items():
+            sketch.bins[int(i)] = n
+            sketch.count += n
+        return sketch
+
+
+class Leaderboard:
+    """The best LEADERBOARD_SIZE students by their best percentage, earliest first on ties
+
+    Only the board itself is kept: a student's new attempt either beats
+    the lowest entry (or their own entry) or can't be on it.
+    """
+
+    __slots__ = ("size", "entries")
+
+    def __init__(self, size: int = LEADERBOARD_SIZE):
+        self.size = size
+        # (-percentage, time, student, score, total), best first
+        self.entries: List[Tuple[float, float, str, int, int]] = []
+
+    def add(self, attempt: Dict):
+        self._offer((-percentage(attempt), attempt["time"], attempt["student"], marks(attempt), attempt["total"]))
+
+    def merge(self, other: "Leaderboard"):
+        for entry in other.entries:
+            self._offer(entry)
+
+    def _offer(self, entry: Tuple[float, float, str, int, int]):
+        if len(self.entries) >= self.size and entry >= self.entries[-1]:
+            return
+        for i, current in enumerate(self.entries):
+            if current[2] == entry[2]:
+                if entry >= current:
+                    return
+                del self.entries[i]
+                break
+        insort(self.entries, entry)
+        del self.entries[self.size:]
+
+    def top(self, n: Optional[int] = None) -> List[Dict]:
+        return [{"student": student, "percentage": -neg, "score": score, "total": total, "time": when}
+                for neg, when, student, score, total in self.entries[:n]]
+
+
+class TestAggregate:
+    """Everything the cohort view knows about one test"""
+
+    def __init__(self):
+        self.attempts = 0
+        self.passed = 0
+        self.total_percentage = 0.0
+        self.total_squares = 0.0
+        self.grades: Counter = Counter()
+        self.sketch = QuantileSketch()
+        self.leaderboard = Leaderboard()
+
+    def add(self, attempt: Dict):
+        value = percentage(attempt)
+        self.attempts += 1
+        self.passed += attempt["status"] == "PASSED"
+        self.total_percentage += value
+        self.total_squares += value * value
+        self.grades[attempt["grade"]] += 1
+        self.sketch.add(value)
+        self.leaderboard.add(attempt)
+
+    def merge(self, other: "TestAggregate"):
+        self.attempts += other.attempts
+        self.passed += other.passed
+        self.total_percentage += other.total_percentage
+        self.total_squares += other.total_squares
+        self.grades.update(other.grades)
+        self.sketch.merge(other.sketch)
+        self.leaderboard.merge(other.leaderboard)
+
+    def stats(self) -> Dict:
+        n = self.attempts
+        mean = self.total_percentage / n if n else 0.0
+        variance = max(0.0, self.total_squares / n - mean * mean) if n else 0.0
+        return {
+            "attempts": n,
+            "passed": self.passed,
+            "pass_rate": self.passed / n if n else 0.0,
+            "mean_percentage": mean,
+            "sd_percentage": math.sqrt(variance),
+            "percentiles": {f"p{q}": self.sketch.quantile(q / 100) for q in (10, 25, 50, 75, 90)},
+            "grades": {grade: self.grades[grade] / n if n else 0.0 for grade in grade_names(self.grades)},
+        }
+
+    def to_dict(self) -> Dict:
+        return {"attempts": self.attempts, "passed": self.passed,
+                "total_percentage": self.total_percentage, "total_squares": self.total_squares,
+                "grades": dict(self.grades), "sketch": self.sketch.to_dict(),
+                "leaderboard": [list(e) for e in self.leaderboard.entries]}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "TestAggregate":
+        aggregate = cls()
+        aggregate.attempts = data["attempts"]
+        aggregate.passed = data["passed"]
+        aggregate.total_percentage = data["total_percentage"]
+        aggregate.total_squares = data["total_squares"]
+        aggregate.grades = Counter(data["grades"])
+        aggregate.sketch = QuantileSketch.from_dict(data["sketch"])
+        aggregate.leaderboard.entries = [tuple(e) for e in data["leaderboard"]]
+        return aggregate
+
+
+class CohortStats:
+    """TestAggregates for every test, updated one attempt at a time"""
+
+    def __init__(self):
+        self.tests: Dict[int, TestAggregate] = {}
+
+    def add(self, attempt: Dict):
+        if counts_toward_cohort(attempt):
+            aggregate = self.tests.get(attempt["test"])
+            if aggregate is None:
+                aggregate = self.tests[attempt["test"]] = TestAggregate()
+            aggregate.add(attempt)
+
+    def merge(self, other: "CohortStats"):
+        """Fold in another set of stats, e.g. another shard's"""
+        for test, aggregate in other.tests.items():
+            mine = self.tests.get(test)
+            if mine is None:
+                mine = self.tests[test] = TestAggregate()
+            mine.merge(aggregate)
+
+    def test(self, test: int) -> TestAggregate:
+        return self.tests.get(test) or TestAggregate()
+
+    def standing(self, test: int, score: int, total: int) -> Dict:
+        """Where a score sits in the test's cohort, along with the cohort's stats"""
+        aggregate = self.test(test)
+        stats = aggregate.stats()
+        stats["beaten"] = aggregate.sketch.rank(score / total * 100 if total else 0.0)
+        return stats
+
+    def to_dict(self) -> Dict:
+        return {str(test): aggregate.to_dict() for test, aggregate in self.tests.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "CohortStats":
+        stats = cls()
+        stats.tests = {int(test): TestAggregate.from_dict(d) for test, d in data.items()}
+        return stats
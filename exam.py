@@ -0,0 +1,109 @@
+"""
+Economics 1 Quiz Application - composed exams
+An exam is any list of tests taken one after another, each with a weight
+in the overall grade. While the student answers one section, the next is
+prepared on a background thread (questions decoded, shuffled and their
+screens rendered), so moving on to it costs nothing.
+
+With no weights given, each section counts by its number of questions,
+which is the same as adding up all the scores - what "Take All Tests"
+has always done.
+"""
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+import policy
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_END = object()
+
+
+@dataclass(frozen=True)
+class Section:
+    test: int
+    weight: Optional[float] = None  # None = the test's question count
+
+
+@dataclass(frozen=True)
+class SectionResult:
+    test: int
+    name: str
+    score: float  # marks under the grading policy
+    total: int
+    weight: float
+
+    @property
+    def percentage(self) -> float:
+        return self.score / self.total * 100 if self.total else 0.0
+
+
+def parse_sections(spec: str) -> List[Section]:
+    """Sections from a spec like "1,2,3" or "1:0.5,2:0.25,3:0.25" (test:weight)"""
+    sections = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        test, _, weight = part.partition(":")
+        try:
+            section = Section(int(test), float(weight) if weight else None)
+        except ValueError:
+            raise ValueError(f"bad exam section {part!r} (expected TEST or TEST:WEIGHT)") from None
+        if section.weight is not None and section.weight < 0:
+            raise ValueError(f"exam section {part!r} has a negative weight")
+        sections.append(section)
+    if not sections:
+        raise ValueError("an exam needs at least one section")
+    return sections
+
+
+def weighted_result(results: Sequence[SectionResult],
+                    grading_policy: Optional[policy.GradingPolicy] = None) -> Tuple[float, str, str]:
+    """Overall percentage, grade and status, weighting each section's percentage"""
+    grading_policy = grading_policy or policy.default()
+    total_weight = sum(r.weight for r in results)
+    if not total_weight:
+        return 0.0, *grading_policy.result(0, 1)[:2]
+    percentage = sum(r.percentage * r.weight for r in results) / total_weight
+    return (percentage, *grading_policy.result(percentage, 100)[:2])
+
+
+def uses_default_weights(sections: Iterable[Section]) -> bool:
+    return all(s.weight is None for s in sections)
+
+
+class Prefetcher(Generic[T, R]):
+    """Iterates (item, prepare(item)), preparing the next items on a background thread
+
+    Preparation runs ahead by `ahead` items, so while the caller works on
+    one result the following one is already being built.
+    """
+
+    def __init__(self, prepare: Callable[[T], R], items: Iterable[T], ahead: int = 1):
+        self.prepare = prepare
+        self.items = items
+        self.ahead = max(1, ahead)
+
+    def __iter__(self) -> Iterator[Tuple[T, R]]:
+        items = iter(self.items)
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="exam-prefetch") as pool:
+            # Start on the first `ahead` items; each one taken below is
+            # replaced by the next, so `ahead` are in hand while the caller
+            # works on a result
+            for item in items:
+                pending.append((item, pool.submit(self.prepare, item)))
+                if len(pending) >= self.ahead:
+                    break
+            while pending:
+                item, future = pending.popleft()
+                result = future.result()
+                upcoming = next(items, _END)
+                if upcoming is not _END:
+                    pending.append((upcoming, pool.submit(self.prepare, upcoming)))
+                yield item, result
@@ -0,0 +1,458 @@
+"""
+Economics 1 Quiz Application - question interchange formats
+Reads and writes questions as JSON Lines, CSV, Moodle GIFT and IMS QTI 1.2
+XML, so questions kept in an LMS can be compiled into a bank and sent back.
+
+Readers are generators: they yield (number, name, questions) tests whose
+questions are read from the file one at a time and checked as they go,
+so compile_bank converts a source of any size in constant memory. This
+means a test's questions must be contiguous in the file. Writers work
+from an open Bank, which also decodes one question at a time.
+"""
+
+import csv
+import html
+import itertools
+import json
+import os
+import re
+import xml.etree.ElementTree as ET
+from operator import itemgetter
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+import bank
+
+# File extension -> format name
+EXTENSIONS = {".json": "json", ".jsonl": "jsonl", ".csv": "csv",
+              ".gift": "gift", ".txt": "gift", ".xml": "qti", ".qti": "qti"}
+
+# Titles written for tests, and recognised when reading them back
+_TEST_TITLE = re.compile(r"^Test (\d+): (.*)$")
+
+# A question read from a source, with the test it belongs to
+_Row = Tuple[int, str, bank.Question]
+
+
+def format_for(path: str, fmt: Optional[str] = None) -> str:
+    """The format to use for path: fmt if given, otherwise from the extension"""
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXTENSIONS:
+        raise bank.BankError(f"don't know the format of {path} "
+                             f"(expected {', '.join(sorted(EXTENSIONS))})")
+    return EXTENSIONS[ext]
+
+
+def _group(rows: Iterator[_Row]) -> Iterator[bank.TestSource]:
+    """Tests from a stream of questions, each test starting where the test number changes"""
+    for number, group in itertools.groupby(rows, key=itemgetter(0)):
+        _, name, first = next(group)
+        yield number, name, itertools.chain([first], map(itemgetter(2), group))
+
+
+def _test_title(title: str, previous: int) -> Tuple[int, str]:
+    """Number and name for a test titled like "Test 3: Elasticity", or numbered on from previous"""
+    match = _TEST_TITLE.match(title.strip())
+    if match:
+        return int(match.group(1)), match.group(2)
+    return previous + 1, title.strip()
+
+
+def _default_name(path: str) -> str:
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+# JSON Lines: one question dict per line, plus "test" and "test_name"
+
+def _jsonl_rows(path: str) -> Iterator[_Row]:
+    with open(path, encoding="utf-8") as f:
+        for lineno, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            where = f"{path}:{lineno}"
+            try:
+                q = json.loads(line)
+            except json.JSONDecodeError as e:
+                raise bank.BankError(f"{where}: {e}") from None
+            if not isinstance(q, dict):
+                raise bank.BankError(f"{where}: expected a question object")
+            number = int(q.get("test", 1))
+            yield number, q.get("test_name") or f"Test {number}", bank.Question.from_dict(q, where)
+
+
+def read_jsonl(path: str) -> Iterator[bank.TestSource]:
+    """Read tests from JSON Lines, one question object per line
+
+    Each line is a question dict as in questions.py, plus "test" (the test
+    number, default 1) and "test_name".
+    """
+    return _group(_jsonl_rows(path))
+
+
+def write_jsonl(questions_bank: bank.Bank, f: TextIO):
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    for test in questions_bank.tests():
+        for q in test:
+            f.write(dumps({"test": test.number, "test_name": test.name, **q.to_dict()}) + "\n")
+
+
+# CSV: test, test_name, question, choice_1 ... choice_N, correct,
+# explanation, tags
+
+def _csv_rows(path: str) -> Iterator[_Row]:
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        choice_cols = sorted((c for c in reader.fieldnames or [] if c.startswith("choice_")),
+                             key=lambda c: int(c.split("_", 1)[1]))
+        for row in reader:
+            where = f"{path}:{reader.line_num}"
+            try:
+                number = int(row["test"])
+                correct = int(row["correct"])
+            except (KeyError, TypeError, ValueError) as e:
+                raise bank.BankError(f"{where}: bad or missing test/correct column ({e})") from None
+            # Questions with fewer choices leave the last columns empty; a gap
+            # before a filled one would shift the choices after it off the key
+            choices = [row[c] or "" for c in choice_cols]
+            while choices and not choices[-1]:
+                choices.pop()
+            if "" in choices:
+                raise bank.BankError(f"{where}: blank choice column {choice_cols[choices.index('')]} "
+                                     f"before a filled one")
+            q = {
+                "question": row.get("question") or "",
+                "choices": choices,
+                "correct": correct,
+                "explanation": row.get("explanation") or "",
+                "tags": [t.strip() for t in (row.get("tags") or "").split(";") if t.strip()],
+            }
+            yield number, row.get("test_name") or f"Test {number}", bank.Question.from_dict(q, where)
+
+
+def read_csv(path: str) -> Iterator[bank.TestSource]:
+    """Read tests from CSV
+
+    Expected columns: test, test_name, question, choice_1 ... choice_N,
+    correct (0-based, like the question dicts), explanation and optionally
+    tags (separated by ;). Empty choice cells at the end of a row are
+    ignored so questions can have different choice counts; an empty cell
+    before a filled one is an error.
+    """
+    return _group(_csv_rows(path))
+
+
+def write_csv(questions_bank: bank.Bank, f: TextIO):
+    tests = questions_bank.tests()
+    width = max((max(t.choice_counts(), default=0) for t in tests), default=0)
+    writer = csv.writer(f)
+    writer.writerow(["test", "test_name", "question"] + [f"choice_{i}" for i in range(1, width + 1)]
+                    + ["correct", "explanation", "tags"])
+    for test in tests:
+        for q in test:
+            padding = [""] * (width - len(q.choices))
+            writer.writerow([test.number, test.name, q.question, *q.choices, *padding,
+                             q.correct, q.explanation, ";".join(q.tags)])
+
+
+# Moodle GIFT: questions separated by blank lines, categories for tests.
+# Only multiple choice and true/false questions can be imported
+
+_GIFT_ESCAPE = re.compile(r"([~=#{}:\\])")
+_GIFT_UNESCAPE = re.compile(r"\\(.)", re.S)
+_GIFT_ANSWER = re.compile(r"\\.|(####|[=~#])", re.S)
+_GIFT_WEIGHT = re.compile(r"\s*%(-?\d+(?:\.\d+)?)%")
+_GIFT_MARKUP = re.compile(r"^\s*\[(?:html|moodle|plain|markdown)\]")
+_GIFT_TAG = re.compile(r"\[tag:([^\]]+)\]")
+_GIFT_CATEGORY_SEP = re.compile(r"(?<!/)/(?!/)")
+_GIFT_TRUE_FALSE = {"T": 0, "TRUE": 0, "F": 1, "FALSE": 1}
+
+
+def _gift_escape(text: str) -> str:
+    return _GIFT_ESCAPE.sub(r"\\\1", text).replace("\n", "\\n")
+
+
+def _gift_text(text: str) -> str:
+    text = _GIFT_MARKUP.sub("", text)
+    return _GIFT_UNESCAPE.sub(lambda m: "\n" if m.group(1) == "n" else m.group(1), text).strip()
+
+
+def _gift_find(text: str, token: str, start: int = 0) -> int:
+    """Position of the first unescaped token in text from start, or -1"""
+    for match in re.finditer(r"\\.|(" + re.escape(token) + ")", text[start:], re.S):
+        if match.group(1):
+            return start + match.start(1)
+    return -1
+
+
+def _gift_question(text: str, where: str, tags: List[str]) -> bank.Question:
+    if text.startswith("::"):
+        end = _gift_find(text, "::", 2)
+        if end < 0:
+            raise bank.BankError(f"{where}: unterminated ::title::")
+        text = text[end + 2:]
+    start = _gift_find(text, "{")
+    end = _gift_find(text, "}", start + 1) if start >= 0 else -1
+    if end < 0:
+        raise bank.BankError(f"{where}: no {{...}} answer block")
+    question = _gift_text(text[:start])
+    after = _gift_text(text[end + 1:])
+    if after:
+        question = f"{question} _____ {after}"
+
+    # Split the answers at each unescaped =, ~, # or ####
+    body = text[start + 1:end]
+    segments = []
+    marker, pos = None, 0
+    for match in _GIFT_ANSWER.finditer(body):
+        if match.group(1):
+            segments.append((marker, body[pos:match.start()]))
+            marker, pos = match.group(1), match.end()
+    segments.append((marker, body[pos:]))
+
+    choices, right, explanation = [], [], ""
+    lead = segments[0][1].strip().upper()
+    if lead in _GIFT_TRUE_FALSE:
+        choices, right = ["True", "False"], [_GIFT_TRUE_FALSE[lead]]
+    elif lead:
+        raise bank.BankError(f"{where}: only multiple choice and true/false questions can be imported")
+    for marker, part in segments[1:]:
+        if marker == "####":
+            explanation = _gift_text(part)
+        elif marker in ("=", "~") and not lead:
+            weight = _GIFT_WEIGHT.match(part)
+            if weight:
+                part = part[weight.end():]
+            if _gift_find(part, "->") >= 0:
+                raise bank.BankError(f"{where}: only multiple choice and true/false questions can be imported")
+            if marker == "=" or (weight and float(weight.group(1)) >= 100):
+                right.append(len(choices))
+            choices.append(_gift_text(part))
+        # a lone # is feedback for one answer, which the quiz doesn't show
+
+    if len(right) != 1:
+        raise bank.BankError(f"{where}: needs exactly one right answer, found {len(right)}")
+    question = bank.Question(question, choices, right[0], explanation, tags)
+    question.validate(where)
+    return question
+
+
+def _gift_rows(path: str) -> Iterator[_Row]:
+    number, name = 1, _default_name(path)
+    categories = 0
+    block: List[str] = []
+    tags: List[str] = []
+    start = 0
+    with open(path, encoding="utf-8-sig") as f:
+        for lineno, line in enumerate(itertools.chain(f, [""]), 1):
+            stripped = line.strip()
+            if not stripped:
+                if block:
+                    yield number, name, _gift_question("".join(block).strip(), f"{path}:{start}", tags)
+                    block, tags = [], []
+                continue
+            if stripped.startswith("//"):
+                tags.extend(t.strip() for t in _GIFT_TAG.findall(stripped))
+                continue
+            if not block and stripped.startswith("$CATEGORY:"):
+                category = stripped[len("$CATEGORY:"):].strip()
+                title = _GIFT_CATEGORY_SEP.split(category)[-1].replace("//", "/")
+                number, name = _test_title(title, number if categories else 0)
+                categories += 1
+                continue
+            if not block:
+                start = lineno
+            block.append(line)
+
+
+def read_gift(path: str) -> Iterator[bank.TestSource]:
+    """Read tests from Moodle GIFT
+
+    Each $CATEGORY starts a test; a category named like "Test 2: Demand"
+    keeps its number. Tags come from "// [tag:name]" comments before a
+    question and general feedback (####) becomes the explanation.
+    """
+    return _group(_gift_rows(path))
+
+
+def write_gift(questions_bank: bank.Bank, f: TextIO):
+    for test in questions_bank.tests():
+        category = f"Test {test.number}: {test.name}".replace("/", "//")
+        f.write(f"$CATEGORY: $course$/top/{category}\n\n")
+        for i, q in enumerate(test, 1):
+            for tag in q.tags:
+                f.write(f"// [tag:{tag}]\n")
+            f.write(f"::Test {test.number} Q{i}:: {_gift_escape(q.question)} {{\n")
+            for j, choice in enumerate(q.choices):
+                f.write(f"{'=' if j == q.correct else '~'}{_gift_escape(choice)}\n")
+            if q.explanation:
+                f.write(f"####{_gift_escape(q.explanation)}\n")
+            f.write("}\n\n")
+
+
+# IMS QTI 1.2: an assessment with a section per test and an item per
+# question, as exported by Canvas and Blackboard. Read with iterparse,
+# dropping each item once it has been read
+
+QTI_NAMESPACE = "http://www.imsglobal.org/xsd/ims_qtiasiv1p2"
+_HTML_TAG = re.compile(r"<[^>]+>")
+
+
+def _local(tag: str) -> str:
+    return tag.rpartition("}")[2]
+
+
+def _qti_text(element: Optional[ET.Element]) -> str:
+    """The text of every mattext under element, with HTML reduced to plain text"""
+    if element is None:
+        return ""
+    parts = []
+    for mattext in element.iter("mattext"):
+        text = mattext.text or ""
+        if "html" in mattext.get("texttype", ""):
+            text = html.unescape(_HTML_TAG.sub("", text))
+        parts.append(text.strip())
+    return "\n".join(p for p in parts if p)
+
+
+def _qti_question(item: ET.Element, where: str) -> bank.Question:
+    for element in item.iter():
+        element.tag = _local(element.tag)
+
+    metadata = {}
+    for field in item.iter("qtimetadatafield"):
+        metadata[(field.findtext("fieldlabel") or "").strip()] = (field.findtext("fieldentry") or "").strip()
+    if metadata.get("question_type", "multiple_choice_question") not in (
+            "multiple_choice_question", "true_false_question"):
+        raise bank.BankError(f"{where}: only multiple choice and true/false questions can be imported")
+
+    presentation = item.find("presentation")
+    if presentation is None:
+        raise bank.BankError(f"{where}: no <presentation>")
+    stem = []
+    for element in presentation:
+        if element.tag == "response_lid":
+            break
+        stem.append(_qti_text(element))
+    idents, choices = [], []
+    for label in presentation.iter("response_label"):
+        idents.append(label.get("ident"))
+        choices.append(_qti_text(label))
+
+    right = []
+    for condition in item.iter("respcondition"):
+        setvar = condition.find("setvar")
+        conditionvar = condition.find("conditionvar")
+        try:
+            scores = setvar is not None and float(setvar.text or 0) > 0
+        except ValueError:
+            scores = False
+        if scores and conditionvar is not None:
+            right.extend(v.text.strip() for v in conditionvar.findall("varequal") if v.text)
+    if len(right) != 1:
+        raise bank.BankError(f"{where}: needs exactly one right answer, found {len(right)}")
+    if right[0] not in idents:
+        raise bank.BankError(f"{where}: right answer {right[0]!r} is not one of the choices")
+
+    explanation = ""
+    for feedback in item.iter("itemfeedback"):
+        if feedback.get("ident") == "general_fb":
+            explanation = _qti_text(feedback)
+    tags = [t.strip() for t in metadata.get("tags", "").split(",") if t.strip()]
+    question = bank.Question("\n".join(s for s in stem if s), choices, idents.index(right[0]),
+                             explanation, tags)
+    question.validate(where)
+    return question
+
+
+def _qti_rows(path: str) -> Iterator[_Row]:
+    number, name = 1, _default_name(path)
+    sections = 0
+    parents: List[ET.Element] = []
+    try:
+        for event, element in ET.iterparse(path, events=("start", "end")):
+            tag = _local(element.tag)
+            if event == "start":
+                if tag == "section" and element.get("title") is not None:
+                    number, name = _test_title(element.get("title"), number if sections else 0)
+                    sections += 1
+                parents.append(element)
+                continue
+            parents.pop()
+            if tag == "item":
+                yield number, name, _qti_question(element, f"{path}, item {element.get('ident')!r}")
+            if tag in ("item", "section") and parents:
+                # Nothing read so far is needed again
+                element.clear()
+                parents[-1].remove(element)
+    except ET.ParseError as e:
+        raise bank.BankError(f"{path}: {e}") from None
+
+
+def read_qti(path: str) -> Iterator[bank.TestSource]:
+    """Read tests from an IMS QTI 1.2 file
+
+    Each titled section is a test; single-answer multiple choice and
+    true/false items are read, with the general feedback as the
+    explanation.
+    """
+    return _group(_qti_rows(path))
+
+
+def _mattext(text: str) -> str:
+    return f'<material><mattext texttype="text/plain">{html.escape(text, quote=False)}</mattext></material>'
+
+
+def write_qti(questions_bank: bank.Bank, f: TextIO):
+    attr = lambda text: html.escape(text, quote=True)
+    title = _default_name(questions_bank.path)
+    f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+            f'<questestinterop xmlns="{QTI_NAMESPACE}">\n'
+            f'<assessment ident="{attr(title)}" title="{attr(title)}">\n')
+    for test in questions_bank.tests():
+        f.write(f'<section ident="test{test.number}" title="{attr(f"Test {test.number}: {test.name}")}">\n')
+        for i, q in enumerate(test, 1):
+            f.write(f'<item ident="t{test.number}q{i}" title="Question {i}">\n'
+                    '<itemmetadata><qtimetadata>'
+                    '<qtimetadatafield><fieldlabel>question_type</fieldlabel>'
+                    '<fieldentry>multiple_choice_question</fieldentry></qtimetadatafield>'
+                    '<qtimetadatafield><fieldlabel>tags</fieldlabel>'
+                    f'<fieldentry>{html.escape(",".join(q.tags), quote=False)}</fieldentry></qtimetadatafield>'
+                    '</qtimetadata></itemmetadata>\n'
+                    f'<presentation>{_mattext(q.question)}\n'
+                    '<response_lid ident="response1" rcardinality="Single"><render_choice>\n')
+            for j, choice in enumerate(q.choices, 1):
+                f.write(f'<response_label ident="c{j}">{_mattext(choice)}</response_label>\n')
+            f.write('</render_choice></response_lid></presentation>\n'
+                    '<resprocessing><outcomes>'
+                    '<decvar maxvalue="100" minvalue="0" varname="SCORE" vartype="Decimal"/></outcomes>\n'
+                    '<respcondition continue="Yes"><conditionvar><other/></conditionvar>'
+                    '<displayfeedback feedbacktype="Response" linkrefid="general_fb"/></respcondition>\n'
+                    '<respcondition continue="No"><conditionvar>'
+                    f'<varequal respident="response1">c{q.correct + 1}</varequal></conditionvar>'
+                    '<setvar action="Set" varname="SCORE">100</setvar></respcondition>\n'
+                    '</resprocessing>\n'
+                    f'<itemfeedback ident="general_fb"><flow_mat>{_mattext(q.explanation)}</flow_mat>'
+                    '</itemfeedback>\n</item>\n')
+        f.write('</section>\n')
+    f.write('</assessment>\n</questestinterop>\n')
+
+
+READERS = {"json": bank.read_json_source, "jsonl": read_jsonl, "csv": read_csv,
+           "gift": read_gift, "qti": read_qti}
+WRITERS = {"jsonl": write_jsonl, "csv": write_csv, "gift": write_gift, "qti": write_qti}
+
+
+def read_tests(path: str, fmt: Optional[str] = None) -> Iterator[bank.TestSource]:
+    """Read tests from path in any of the READERS formats"""
+    fmt = format_for(path, fmt)
+    if fmt not in READERS:
+        raise bank.BankError(f"can't read {fmt} files")
+    return iter(READERS[fmt](path))
+
+
+def write_tests(questions_bank: bank.Bank, f: TextIO, fmt: str):
+    """Write every test in the bank to f in one of the WRITERS formats"""
+    if fmt not in WRITERS:
+        raise bank.BankError(f"can't write {fmt} files")
+    WRITERS[fmt](questions_bank, f)
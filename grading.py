@@ -0,0 +1,214 @@
+"""
+Economics 1 Quiz Application - batch grading
+Grades answer sheets in bulk without any prompts. Answers are scored as
+NumPy arrays against each test's answer key, and grades are looked up in
+the grading policy's table for the test's length (see policy.py), so every
+sheet gets exactly the marks, grade and PASSED/FAILED status the
+interactive quiz would have given. Under a policy with negative marking or
+partial credit, each answer's marks come from a per-test credit matrix,
+so a chunk of sheets is still scored with one gather and one sum.
+
+Answer sheets are CSV rows of student,test,answers where answers has one
+digit per question, as typed at the quiz prompt (1 = first choice), and
+0 or - for a blank. JSON Lines sheets look like
+{"student": "s001", "test": 1, "answers": [2, 1, 4, ...]}.
+
+A sheet taken with shuffled questions carries its layout seed as a fourth
+CSV column (or a "seed" key); its answers are in the order the student saw
+them and are put back into bank order before scoring.
+"""
+
+import csv
+import json
+import re
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+import policy
+from shuffle import Layout
+
+# Sheets are graded this many at a time
+CHUNK_SIZE = 65536
+# What a CSV answer string may hold: a digit per question, - for a blank
+_ANSWER_STRING = re.compile(r"[0-9-]*")
+
+Answers = Union[str, Sequence[int]]
+# (student, test, answers) or (student, test, answers, layout seed)
+Sheet = Tuple
+
+
+class GradingError(Exception):
+    """Raised for answer sheets that cannot be graded"""
+
+
+class SheetResult(NamedTuple):
+    student: str
+    test: int
+    score: float  # marks under the grading policy
+    total: int
+    grade: str
+    status: str
+
+    @property
+    def percentage(self) -> float:
+        return (self.score / self.total) * 100
+
+
+def score_answers(answers: np.ndarray, key: np.ndarray) -> np.ndarray:
+    """Count correct answers in each row of a (sheets x questions) array of 1-based choices"""
+    return np.count_nonzero(answers == key + 1, axis=1)
+
+
+class GradeTable:
+    """A policy's grade table for one test length, as arrays indexed by units of marks"""
+
+    def __init__(self, total: int, grading_policy=None):
+        if total <= 0:
+            raise GradingError("cannot grade a test with no questions")
+        table = (grading_policy or policy.default()).table(total)
+        self.total = total
+        self.lo = table.lo
+        self.grades = np.array(table.grades)
+        self.statuses = np.array(table.statuses)
+
+    def lookup(self, units: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Grades and statuses for an array of marks in units, floor already applied"""
+        return self.grades[units - self.lo], self.statuses[units - self.lo]
+
+
+def _check_answers(student: str, answers: Answers):
+    """Raise GradingError unless answers are digits and blanks, or integers from 0 to 255"""
+    if isinstance(answers, str):
+        if not _ANSWER_STRING.fullmatch(answers):
+            raise GradingError(f"sheet for {student}: answers may only hold the digits 0-9 and -, "
+                               f"got {answers!r}")
+    elif not all(type(a) is int and 0 <= a <= 255 for a in answers):
+        raise GradingError(f"sheet for {student}: answers must be whole numbers from 0 to 255")
+
+
+def _answers_to_array(rows: List[Answers], total: int) -> np.ndarray:
+    if all(isinstance(row, str) for row in rows):
+        joined = "".join(rows).replace("-", "0").encode("ascii")
+        digits = np.frombuffer(joined, dtype=np.uint8) - ord("0")
+        return digits.reshape(len(rows), total)
+    return np.array([[0 if c == "-" else int(c) for c in row] if isinstance(row, str) else row
+                     for row in rows], dtype=np.uint8)
+
+
+class BatchGrader:
+    """Grades answer sheets for every test in a bank, under a grading policy (default: the one next to the quiz)"""
+
+    def __init__(self, questions_bank, grading_policy=None):
+        self.bank = questions_bank
+        self.policy = grading_policy or policy.default()
+        self._keys: Dict[int, np.ndarray] = {}
+        self._tables: Dict[int, GradeTable] = {}
+        self._choice_counts: Dict[int, Sequence[int]] = {}
+        # Units of marks per (question, answer) for tests that need more than a count
+        self._credits: Dict[int, np.ndarray] = {}
+
+    def key(self, test_num: int) -> np.ndarray:
+        """The answer-key vector (0-based correct indexes) for a test"""
+        if test_num not in self._keys:
+            test = self.bank.test(test_num)
+            self._keys[test_num] = np.frombuffer(test.answer_key(), dtype=np.uint8)
+            self._tables[test_num] = GradeTable(len(test), self.policy)
+            self._choice_counts[test_num] = test.choice_counts()
+            if not self.policy.plain:
+                # One column for every answer a uint8 sheet can hold
+                self._credits[test_num] = np.array(
+                    self.policy.credit_rows(test_num, self._keys[test_num].tolist(), 256), dtype=np.int32)
+        return self._keys[test_num]
+
+    def unpermute(self, test_num: int, answers: Answers, seed: int) -> List[int]:
+        """Answers from a shuffled sheet, put back into bank order"""
+        if isinstance(answers, str):
+            answers = [0 if c == "-" else int(c) for c in answers]
+        layout = Layout(seed, len(self.key(test_num)))
+        return layout.unpermute(answers, self._choice_counts[test_num])
+
+    def grade_array(self, test_num: int, answers: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Marks, grades and statuses for a (sheets x questions) answer array"""
+        key = self.key(test_num)
+        if answers.ndim != 2 or answers.shape[1] != len(key):
+            raise GradingError(f"test {test_num} needs {len(key)} answers per sheet, got shape {answers.shape}")
+        table = self._tables[test_num]
+        credits = self._credits.get(test_num)
+        if credits is None:
+            units = score_answers(answers, key)
+        else:
+            units = credits[np.arange(len(key)), answers].sum(axis=1)
+            np.maximum(units, table.lo, out=units)
+        grades, statuses = table.lookup(units)
+        scale = self.policy.scale
+        return (units if scale == 1 else units / scale), grades, statuses
+
+    def grade(self, sheets: Iterable[Sheet], chunk_size: int = CHUNK_SIZE) -> Iterator[SheetResult]:
+        """Grade a stream of (student, test, answers) sheets, yielding results in input order"""
+        chunk: List[Sheet] = []
+        for sheet in sheets:
+            student, test_num, answers = sheet[:3]
+            _check_answers(student, answers)
+            if len(answers) != len(self.key(test_num)):
+                raise GradingError(f"sheet for {student}: test {test_num} needs "
+                                   f"{len(self.key(test_num))} answers, got {len(answers)}")
+            if len(sheet) > 3 and sheet[3] is not None:
+                answers = self.unpermute(test_num, answers, sheet[3])
+            chunk.append((student, test_num, answers))
+            if len(chunk) >= chunk_size:
+                yield from self._grade_chunk(chunk)
+                chunk = []
+        if chunk:
+            yield from self._grade_chunk(chunk)
+
+    def _grade_chunk(self, chunk: List[Sheet]) -> List[SheetResult]:
+        by_test: Dict[int, List[int]] = {}
+        for i, (_, test_num, _) in enumerate(chunk):
+            by_test.setdefault(test_num, []).append(i)
+
+        results: List[SheetResult] = [None] * len(chunk)
+        for test_num, positions in by_test.items():
+            total = len(self.key(test_num))
+            answers = _answers_to_array([chunk[i][2] for i in positions], total)
+            scores, grades, statuses = self.grade_array(test_num, answers)
+            for i, score, grade, status in zip(positions, scores.tolist(), grades.tolist(), statuses.tolist()):
+                results[i] = SheetResult(chunk[i][0], test_num, score, total, grade, status)
+        return results
+
+
+def read_csv_sheets(f: TextIO) -> Iterator[Sheet]:
+    """Read student,test,answers[,seed] rows, skipping a header row if there is one"""
+    for line_num, row in enumerate(csv.reader(f), 1):
+        if not row:
+            continue
+        if line_num == 1 and row[1:2] == ["test"]:
+            continue
+        if len(row) == 4 and row[3]:
+            yield row[0], int(row[1]), row[2].strip(), int(row[3])
+        elif len(row) in (3, 4):
+            yield row[0], int(row[1]), row[2].strip()
+        else:
+            raise GradingError(f"line {line_num}: expected student,test,answers[,seed]")
+
+
+def read_jsonl_sheets(f: TextIO) -> Iterator[Sheet]:
+    """Read one {"student", "test", "answers"[, "seed"]} object per line"""
+    for line in f:
+        if line.strip():
+            sheet = json.loads(line)
+            yield str(sheet["student"]), int(sheet["test"]), sheet["answers"], sheet.get("seed")
+
+
+def write_results(results: Iterable[SheetResult], f: TextIO) -> Dict[str, int]:
+    """Write results as CSV and return counts of sheets, passes and answers"""
+    writer = csv.writer(f)
+    writer.writerow(["student", "test", "score", "total", "percentage", "grade", "status"])
+    counts = {"sheets": 0, "passed": 0, "answers": 0}
+    for r in results:
+        writer.writerow([r.student, r.test, f"{r.score:g}", r.total, f"{r.percentage:.1f}", r.grade, r.status])
+        counts["sheets"] += 1
+        counts["answers"] += r.total
+        if r.status == "PASSED":
+            counts["passed"] += 1
+    return counts
@@ -0,0 +1,120 @@
+"""
+Economics 1 Quiz Application - live question bank reloading
+Watches the files a bank was compiled from and applies edits to the
+running quiz or server without a restart. Files are polled (a stat call
+per interval), so this works the same on every platform.
+
+When an edit keeps every test's questions in place - a typo fixed in an
+explanation, a choice reworded, an answer key corrected - only the
+questions whose compiled record changed are patched into the open bank,
+and only those are re-indexed for search. A quiz attempt already under
+way finishes with the questions it was prepared with; server sessions
+read the new version from their next question.
+
+When questions are added, removed or moved, the bank is recompiled and
+handed to on_swap; attempts already in progress carry on with the old
+bank, new ones get the new bank.
+"""
+
+import os
+import runpy
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+import bank
+
+# Seconds between checks for changed source files
+POLL_INTERVAL = 1.0
+
+
+def load_sources(paths: List[str]) -> List[bank.TestSource]:
+    """Read tests from .py files (a TESTS list, like questions.py) or any source format"""
+    tests = []
+    for path in paths:
+        if path.endswith(".py"):
+            tests.extend(runpy.run_path(path)["TESTS"])
+        else:
+            tests.extend(bank.read_source(path))
+    return tests
+
+
+def diff_tests(questions_bank: bank.Bank, tests: List[bank.TestSource]) -> Optional[Dict[int, bank.Question]]:
+    """Questions of tests that differ from the bank, by bank-wide index
+
+    Returns None when the tests no longer line up with the bank (a test or
+    question was added, removed or renamed), so patching is not enough.
+    """
+    current = questions_bank.tests()
+    if len(current) != len(tests):
+        return None
+    changes = {}
+    for bank_test, (number, name, questions) in zip(current, tests):
+        questions = list(questions)
+        if (bank_test.number, bank_test.name, len(bank_test)) != (number, name, len(questions)):
+            return None
+        for i, q in enumerate(questions):
+            q = bank.as_question(q, f"test {number}, question {i + 1}")
+            index = bank_test.first + i
+            if bank.encode_question(q) != questions_bank.record_bytes(index):
+                changes[index] = q
+    return changes
+
+
+class BankWatcher(threading.Thread):
+    """Polls a bank's source files and applies their edits to the live bank"""
+
+    def __init__(self, questions_bank: bank.Bank, sources: List[str], interval: float = POLL_INTERVAL,
+                 on_swap: Optional[Callable[[bank.Bank], None]] = None,
+                 on_error: Optional[Callable[[Exception], None]] = None):
+        super().__init__(name="bank-watcher", daemon=True)
+        self.bank = questions_bank
+        self.sources = list(sources)
+        self.interval = interval
+        self.on_swap = on_swap
+        self.on_error = on_error
+        self._stopped = threading.Event()
+        self._stamps = self._stat()
+
+    def _stat(self) -> List[Tuple[int, int]]:
+        stamps = []
+        for path in self.sources:
+            try:
+                st = os.stat(path)
+                stamps.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append((0, 0))
+        return stamps
+
+    def check(self) -> Optional[str]:
+        """Apply any edits since the last check; returns what was done, if anything"""
+        stamps = self._stat()
+        if stamps == self._stamps:
+            return None
+        self._stamps = stamps
+        tests = load_sources(self.sources)
+        changes = diff_tests(self.bank, tests)
+        if changes is not None:
+            # Even with no question changed, listeners hear of the edit:
+            # it may have been to a question template
+            self.bank.patch(changes)
+            return f"updated {len(changes)} questions"
+
+        # The old file is replaced, not overwritten, so banks still open on
+        # it keep reading their own copy
+        bank.compile_bank(tests, self.bank.path)
+        new_bank = bank.Bank(self.bank.path)
+        self.bank = new_bank
+        if self.on_swap is not None:
+            self.on_swap(new_bank)
+        return f"reloaded the bank ({new_bank.question_count} questions)"
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            try:
+                self.check()
+            except Exception as e:  # a half-saved or broken file: keep serving the last good bank
+                if self.on_error is not None:
+                    self.on_error(e)
+
+    def stop(self):
+        self._stopped.set()
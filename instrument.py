@@ -0,0 +1,164 @@
+"""
+Economics 1 Quiz Application - timing and profiling hooks
+The quiz reports what it is doing through spans (timed sections such as
+rendering a question or scoring an answer) and events (one-off facts such
+as how long a student took to answer). Both go to any registered hooks
+and trace files, as records like:
+
+    {"event": "answer", "mono_ns": 81231..., "test": 1, "question": 4, "latency": 3.2, ...}
+    {"event": "render", "mono_ns": 81229..., "dur_ns": 41200, "test": 1, "question": 4}
+
+mono_ns is time.perf_counter_ns() at the start, dur_ns the span length.
+
+With no hooks or trace files, span() hands back one shared do-nothing
+context manager and event() returns at once, so the instrumented code
+pays for little more than the call. cProfile and tracemalloc can be
+switched on for a whole run as well.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional
+
+Hook = Callable[[Dict], None]
+
+# Cleared whenever nothing is listening; instrumented code may test it
+# before building an expensive record
+ACTIVE = False
+
+_hooks: List[Hook] = []
+
+
+def add_hook(hook: Hook):
+    """Call hook(record) for every span and event"""
+    global ACTIVE
+    _hooks.append(hook)
+    ACTIVE = True
+
+
+def remove_hook(hook: Hook):
+    global ACTIVE
+    _hooks.remove(hook)
+    ACTIVE = bool(_hooks)
+
+
+def emit(record: Dict):
+    for hook in _hooks:
+        hook(record)
+
+
+def event(name: str, **fields):
+    """Report something that happened now"""
+    if ACTIVE:
+        emit({"event": name, "mono_ns": time.perf_counter_ns(), **fields})
+
+
+class _Span:
+    __slots__ = ("record",)
+
+    def __init__(self, record: Dict):
+        self.record = record
+
+    def __enter__(self):
+        self.record["mono_ns"] = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.record["dur_ns"] = time.perf_counter_ns() - self.record["mono_ns"]
+        emit(self.record)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, **fields):
+    """Time a with-block and report it when it ends"""
+    if not ACTIVE:
+        return _NULL_SPAN
+    return _Span({"event": name, **fields})
+
+
+class TraceWriter:
+    """A hook that appends records to a JSON Lines file through a large buffer"""
+
+    def __init__(self, path: str, buffer_size: int = 1 << 16):
+        import json
+        self.file = open(path, "a", encoding="utf-8", buffering=buffer_size)
+        self._dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+    def __call__(self, record: Dict):
+        self.file.write(self._dumps(record) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class Profiler:
+    """cProfile ("cpu") or tracemalloc ("memory") for a whole run
+
+    cpu writes pstats data to path (read it with python -m pstats); memory
+    writes the top allocation sites as text.
+    """
+
+    def __init__(self, kind: str, path: str, top: int = 40):
+        if kind not in ("cpu", "memory"):
+            raise ValueError(f"unknown profile kind {kind!r}")
+        self.kind = kind
+        self.path = path
+        self.top = top
+        self._profile = None
+
+    def start(self):
+        if self.kind == "cpu":
+            import cProfile
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import tracemalloc
+            tracemalloc.start(10)
+
+    def stop(self):
+        if self.kind == "cpu":
+            self._profile.disable()
+            self._profile.dump_stats(self.path)
+            return
+        import tracemalloc
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write(f"current {current / 1024:.1f} KiB, peak {peak / 1024:.1f} KiB\n\n")
+            for stat in snapshot.statistics("lineno")[:self.top]:
+                f.write(f"{stat}\n")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+@contextmanager
+def tracing(path: Optional[str]):
+    """Write every record to path while the block runs (nothing for None)"""
+    if not path:
+        yield None
+        return
+    writer = TraceWriter(path)
+    add_hook(writer)
+    try:
+        yield writer
+    finally:
+        remove_hook(writer)
+        writer.close()
@@ -0,0 +1,279 @@
+"""
+Economics 1 Quiz Application - grading policies
+How marks turn into grades, read from a JSON file so each course can use
+its own scale:
+
+    bands      [{"grade": "A", "min": 75}, ...], highest first; the last
+               band catches everything below
+    pass       lowest passing percentage
+    feedback   [{"min": 80, "text": "..."}, ...], highest first
+    wrong      marks for a wrong answer, e.g. -0.25 for negative marking
+    blank      marks for an unanswered question (answer sheets only)
+    floor      lowest total marks a test can come to (null for none)
+    partial    {"<test>": {"<question index>": {"<choice>": credit}}}:
+               part marks for particular wrong choices
+    weights    {"<test>": weight}: a test's default weight in an exam
+
+A right answer is worth one mark, so a test's percentage is its marks
+over its question count. Marks are kept as whole units (a quarter mark
+when the policy uses quarters), and each policy is compiled, per test
+length, into a table from units to grade, status and feedback: grading
+anything, one attempt or a batch of answer sheets, is a lookup.
+"""
+
+import os
+from bisect import bisect_right
+from math import lcm
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_POLICY_NAME = "grading.json"
+# Marks have to be multiples of 1/MAX_SCALE
+MAX_SCALE = 1000
+
+_DEFAULT = {
+    "name": "Economics 1",
+    "bands": [{"grade": "A", "min": 75}, {"grade": "B", "min": 70}, {"grade": "C", "min": 60},
+              {"grade": "D", "min": 50}, {"grade": "F", "min": 0}],
+    "pass": 50,
+    "feedback": [
+        {"min": 80, "text": "Excellent work! You have a strong grasp of the material."},
+        {"min": 70, "text": "Good job! You understand most concepts well."},
+        {"min": 60, "text": "Fair performance. Review the material to strengthen your understanding."},
+        {"min": 50, "text": "You passed, but there's room for improvement. Focus on weak areas."},
+        {"min": 0, "text": "More study is needed. Review all topics thoroughly."},
+    ],
+    "wrong": 0,
+    "blank": 0,
+    "floor": None,
+    "partial": {},
+    "weights": {},
+}
+
+
+class PolicyError(Exception):
+    """Raised for a grading policy that can't be used"""
+
+
+def _units_per_mark(values: Sequence[float]) -> int:
+    """The smallest number of units per mark that makes every value whole"""
+    scale = 1
+    for value in values:
+        # Thirds and the like come from JSON as 0.333..., so allow for rounding
+        denominator = next((d for d in range(1, MAX_SCALE + 1) if abs(value * d - round(value * d)) < 1e-6), None)
+        if denominator is None:
+            raise PolicyError(f"marks must be multiples of 1/{MAX_SCALE}, got {value}")
+        scale = lcm(scale, denominator)
+    if scale > MAX_SCALE:
+        raise PolicyError(f"marks must share a denominator of at most {MAX_SCALE}")
+    return scale
+
+
+class GradeTable:
+    """A policy's grade, status and feedback for every possible mark on a test of one length
+
+    Entry k is for lo + k units of marks.
+    """
+
+    __slots__ = ("total", "scale", "lo", "grades", "statuses", "feedback")
+
+    def __init__(self, policy: "GradingPolicy", total: int):
+        self.total = total
+        self.scale = policy.scale
+        self.lo = policy.lowest(total)
+        hi = total * policy.scale
+        self.grades: List[str] = []
+        self.statuses: List[str] = []
+        self.feedback: List[str] = []
+        for units in range(self.lo, hi + 1):
+            grade, status, feedback = policy.classify(units / self.scale / total * 100)
+            self.grades.append(grade)
+            self.statuses.append(status)
+            self.feedback.append(feedback)
+
+    def lookup(self, units: int) -> Tuple[str, str, str]:
+        k = units - self.lo
+        return self.grades[k], self.statuses[k], self.feedback[k]
+
+
+class GradingPolicy:
+    """A compiled grading policy; see the module docstring for its settings"""
+
+    def __init__(self, spec: Dict):
+        spec = {**_DEFAULT, **spec}
+        self.name = str(spec["name"])
+        try:
+            bands = sorted(((float(b["min"]), str(b["grade"])) for b in spec["bands"]), reverse=True)
+            feedback = sorted(((float(f["min"]), str(f["text"])) for f in spec["feedback"]), reverse=True)
+            self.pass_mark = float(spec["pass"])
+            self.wrong = float(spec["wrong"])
+            self.blank = float(spec["blank"])
+            self.floor = None if spec["floor"] is None else float(spec["floor"])
+            self.partial = {(int(test), int(question), int(choice)): float(credit)
+                            for test, questions in spec["partial"].items()
+                            for question, choices in questions.items()
+                            for choice, credit in choices.items()}
+            self.weights = {int(test): float(weight) for test, weight in spec["weights"].items()}
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            raise PolicyError(f"policy {self.name}: bad setting ({e})") from None
+        if not bands:
+            raise PolicyError(f"policy {self.name}: needs at least one grade band")
+        if any(not -1 <= credit <= 1 for credit in self.partial.values()):
+            raise PolicyError(f"policy {self.name}: partial credit must be between -1 and 1")
+        if any(weight < 0 for weight in self.weights.values()):
+            raise PolicyError(f"policy {self.name}: weights can't be negative")
+        # Ascending, for bisecting a percentage into its band
+        self._band_mins = [m for m, _ in reversed(bands)]
+        self._band_grades = [g for _, g in reversed(bands)]
+        self._feedback_mins = [m for m, _ in reversed(feedback)]
+        self._feedback_texts = [t for _, t in reversed(feedback)]
+        self.bands = bands
+
+        credits = [self.wrong, self.blank, *self.partial.values()]
+        self.scale = _units_per_mark([1, *credits, *([] if self.floor is None else [self.floor])])
+        # Least units one answer can earn, and a test can come to
+        self.least_credit = min(0, *(round(c * self.scale) for c in credits))
+        self.floor_units = None if self.floor is None else round(self.floor * self.scale)
+        self.plain = self.wrong == 0 and self.blank == 0 and not self.partial and self.floor is None
+        self._tables: Dict[int, GradeTable] = {}
+
+    @classmethod
+    def load(cls, path: str) -> "GradingPolicy":
+        import json
+        try:
+            with open(path, encoding="utf-8") as f:
+                spec = json.load(f)
+        except ValueError as e:
+            raise PolicyError(f"{path}: {e}") from None
+        if not isinstance(spec, dict):
+            raise PolicyError(f"{path}: a policy is a JSON object")
+        spec.setdefault("name", os.path.splitext(os.path.basename(path))[0])
+        return cls(spec)
+
+    def __reduce__(self):
+        # Compiled tables stay behind when a policy is sent to a worker process
+        return GradingPolicy, (self.to_dict(),)
+
+    def to_dict(self) -> Dict:
+        partial: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (test, question, choice), credit in self.partial.items():
+            partial.setdefault(str(test), {}).setdefault(str(question), {})[str(choice)] = credit
+        return {"name": self.name,
+                "bands": [{"grade": g, "min": m} for m, g in self.bands],
+                "pass": self.pass_mark,
+                "feedback": [{"min": m, "text": t} for m, t in zip(reversed(self._feedback_mins),
+                                                                    reversed(self._feedback_texts))],
+                "wrong": self.wrong, "blank": self.blank, "floor": self.floor,
+                "partial": partial, "weights": {str(t): w for t, w in self.weights.items()}}
+
+    # Marks
+
+    def credit_units(self, test: int, question: int, answer: int, correct: bool) -> int:
+        """Units of marks for one answer (1-based, in bank order; 0 is blank)"""
+        if correct:
+            return self.scale
+        credit = self.partial.get((test, question, answer))
+        if credit is None:
+            credit = self.blank if answer == 0 else self.wrong
+        return round(credit * self.scale)
+
+    def lowest(self, total: int) -> int:
+        """The fewest units a test of total questions can come to"""
+        lowest = total * self.least_credit
+        if self.floor_units is not None:
+            lowest = min(max(lowest, self.floor_units), total * self.scale)
+        return lowest
+
+    def to_marks(self, units: int, total: int) -> float:
+        """A test's marks from the units its answers earned, floor applied"""
+        units = max(units, self.lowest(total))
+        return units if self.scale == 1 else units / self.scale
+
+    def marks(self, test: int, answers: Sequence[Dict], total: int) -> float:
+        """Marks for a test of total questions from its stored answers ({"question", "answer", "correct"})"""
+        units = sum(self.credit_units(test, a["question"], a["answer"], a["correct"]) for a in answers)
+        return self.to_marks(units, total)
+
+    def credit_rows(self, test: int, key: Sequence[int], width: int) -> List[List[int]]:
+        """Per question, the units earned by each answer from 0 (blank) to width - 1
+
+        key holds each question's 0-based correct choice; answers past a
+        question's last choice count as wrong.
+        """
+        return [[self.credit_units(test, i, answer, answer == correct + 1) for answer in range(width)]
+                for i, correct in enumerate(key)]
+
+    # Grades
+
+    def classify(self, percentage: float) -> Tuple[str, str, str]:
+        """Grade, status and feedback for a percentage"""
+        band = max(bisect_right(self._band_mins, percentage) - 1, 0)
+        feedback = bisect_right(self._feedback_mins, percentage) - 1
+        return (self._band_grades[band], "PASSED" if percentage >= self.pass_mark else "FAILED",
+                self._feedback_texts[feedback] if feedback >= 0 else "")
+
+    def table(self, total: int) -> GradeTable:
+        """The compiled table for tests of total questions"""
+        table = self._tables.get(total)
+        if table is None:
+            table = self._tables[total] = GradeTable(self, total)
+        return table
+
+    def result(self, marks: float, total: int) -> Tuple[str, str, str]:
+        """Grade, status and feedback for marks out of total questions"""
+        units = round(marks * self.scale)
+        if total > 0 and abs(marks * self.scale - units) < 1e-6:
+            table = self.table(total)
+            if table.lo <= units <= total * self.scale:
+                return table.lookup(units)
+        # Off the table: a weighted exam percentage, say
+        return self.classify(marks / total * 100)
+
+    def weight(self, test: int) -> Optional[float]:
+        return self.weights.get(test)
+
+    # Describing
+
+    def grade_names(self) -> List[str]:
+        """Every grade the policy gives, highest first"""
+        return list(dict.fromkeys(g for _, g in self.bands))
+
+    def passing_bands(self) -> List[Tuple[float, str]]:
+        """(minimum, grade) of the passing bands, highest first"""
+        return [(m, g) for m, g in self.bands if m >= self.pass_mark]
+
+    def breakdown(self) -> str:
+        """e.g. "75%+=A, 70%+=B, 60%+=C, 50%+=D" """
+        return ", ".join(f"{m:g}%+={g}" for m, g in self.passing_bands())
+
+    def marking_note(self) -> str:
+        """A line about negative marking, or "" when wrong answers just score nothing"""
+        if self.wrong < 0:
+            return f"Each wrong answer loses {-self.wrong:g} mark{'s' if self.wrong != -1 else ''}."
+        return ""
+
+
+DEFAULT = GradingPolicy({})
+
+
+def load_default(directory: str) -> GradingPolicy:
+    """grading.json in directory if there is one, otherwise the built-in policy"""
+    path = os.path.join(directory, DEFAULT_POLICY_NAME)
+    if os.path.exists(path):
+        return GradingPolicy.load(path)
+    return DEFAULT
+
+
+_app_default: Optional[GradingPolicy] = None
+
+
+def default() -> GradingPolicy:
+    """The policy next to the quiz (grading.json in the app directory), loaded once
+
+    What the library modules grade with when their caller doesn't pass a
+    policy in.
+    """
+    global _app_default
+    if _app_default is None:
+        import bank
+        _app_default = load_default(bank.APP_DIR)
+    return _app_default
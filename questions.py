@@ -0,0 +1,606 @@
+"""
+Economics 1 Quiz Application - question source data
+By Sophie Kasse
+The editable question lists. bank.py compiles these into the binary bank
+that quiz.py actually loads, so this module is only imported when the
+compiled bank is missing or out of date.
+"""
+
+# TEST 1: MEASURING ECONOMIC PERFORMANCE
+TEST_1_QUESTIONS = [
+    {
+        "question": "Which of the following is NOT one of the five macroeconomic objectives?",
+        "choices": [
+            "Economic growth",
+            "Full employment",
+            "Increased exports",
+            "Price stability"
+        ],
+        "correct": 2,
+        "explanation": "The five objectives are: economic growth, full employment, price stability, balance of payments stability, and equitable distribution of income.",
+        "tags": ["macro-objectives"]
+    },
+    {
+        "question": "GDP is defined as:",
+        "choices": [
+            "Total value of all goods produced in a country",
+            "Total value of all final goods and services produced within a country's boundaries in a period",
+            "Total income earned by citizens",
+            "Total exports minus imports"
+        ],
+        "correct": 1,
+        "explanation": "GDP measures the total value of all FINAL goods and services produced WITHIN a country's boundaries in a specific period.",
+        "tags": ["gdp"]
+    },
+    {
+        "question": "Which of the following would be considered an intermediate good?",
+        "choices": [
+            "Bread sold to a consumer",
+            "Flour sold to a bakery",
+            "A car sold to a household",
+            "A haircut"
+        ],
+        "correct": 1,
+        "explanation": "Flour sold to a bakery is an intermediate good because it's used in further production, not final consumption.",
+        "tags": ["gdp", "intermediate-goods"]
+    },
+    {
+        "question": "The product method of calculating GDP adds up:",
+        "choices": [
+            "All final goods sold",
+            "All incomes generated",
+            "Value added by all industries",
+            "All consumer expenditures"
+        ],
+        "correct": 2,
+        "explanation": "The product method sums the value added at each stage of production across all industries.",
+        "tags": ["gdp", "gdp-methods"]
+    },
+    {
+        "question": "Real GDP differs from nominal GDP because:",
+        "choices": [
+            "It uses current prices",
+            "It uses constant prices from a base year",
+            "It includes imports",
+            "It excludes exports"
+        ],
+        "correct": 1,
+        "explanation": "Real GDP uses constant prices from a base year to eliminate the effect of inflation.",
+        "tags": ["gdp", "real-vs-nominal"]
+    },
+    {
+        "question": "If the CPI was 100 in 2020 and 105 in 2021, the inflation rate is:",
+        "choices": [
+            "5%",
+            "105%",
+            "0.5%",
+            "50%"
+        ],
+        "correct": 0,
+        "explanation": "Inflation rate = (105-100)/100 × 100 = 5%",
+        "tags": ["inflation", "cpi", "calculation", "template:cpi-inflation"]
+    },
+    {
+        "question": "The labour force consists of:",
+        "choices": [
+            "Only employed people",
+            "Only unemployed people",
+            "Employed plus unemployed people",
+            "The entire population"
+        ],
+        "correct": 2,
+        "explanation": "Labour force includes both employed and unemployed people who are actively seeking work.",
+        "tags": ["unemployment", "labour-market"]
+    },
+    {
+        "question": "GNI equals GDP plus:",
+        "choices": [
+            "Depreciation",
+            "Net income from abroad",
+            "Government spending",
+            "Taxes"
+        ],
+        "correct": 1,
+        "explanation": "GNI = GDP + Net income from abroad (income earned abroad minus income sent abroad).",
+        "tags": ["gdp", "gni"]
+    },
+    {
+        "question": "In the expenditure method, GDP = C + I + G + ?",
+        "choices": [
+            "X",
+            "M",
+            "(X - M)",
+            "(M - X)"
+        ],
+        "correct": 2,
+        "explanation": "GDP = C + I + G + (X - M), where (X - M) represents net exports.",
+        "tags": ["gdp", "gdp-methods"]
+    },
+    {
+        "question": "The base year in an index number always has a value of:",
+        "choices": [
+            "0",
+            "1",
+            "10",
+            "100"
+        ],
+        "correct": 3,
+        "explanation": "By convention, the base year is assigned a value of 100 in index numbers.",
+        "tags": ["index-numbers"]
+    },
+    {
+        "question": "Which statement about nominal GDP is TRUE?",
+        "choices": [
+            "It always accurately reflects economic growth",
+            "It can increase even when actual production stays the same",
+            "It is adjusted for inflation",
+            "It uses base year prices"
+        ],
+        "correct": 1,
+        "explanation": "Nominal GDP can increase due to price increases (inflation) even if actual production remains constant.",
+        "tags": ["gdp", "real-vs-nominal"]
+    },
+    {
+        "question": "Depreciation in national accounts refers to:",
+        "choices": [
+            "Currency losing value",
+            "Capital equipment wearing out or becoming obsolete",
+            "Stock market decline",
+            "Increase in imports"
+        ],
+        "correct": 1,
+        "explanation": "Depreciation is the allowance for capital consumption as equipment wears out or becomes obsolete.",
+        "tags": ["national-accounts"]
+    },
+    {
+        "question": "If unemployment is 2 million and employment is 28 million, the unemployment rate is:",
+        "choices": [
+            "7.14%",
+            "6.67%",
+            "2%",
+            "28%"
+        ],
+        "correct": 1,
+        "explanation": "Unemployment rate = 2/(28+2) × 100 = 2/30 × 100 = 6.67%",
+        "tags": ["unemployment", "labour-market", "calculation", "template:unemployment-rate"]
+    },
+    {
+        "question": "Double counting in GDP calculation means:",
+        "choices": [
+            "Counting exports twice",
+            "Counting both intermediate and final goods",
+            "Counting government spending twice",
+            "Measuring GDP twice per year"
+        ],
+        "correct": 1,
+        "explanation": "Double counting occurs when we count the value of intermediate goods plus final goods, overstating GDP.",
+        "tags": ["gdp"]
+    },
+    {
+        "question": "Which is NOT a method of calculating GDP?",
+        "choices": [
+            "Production method",
+            "Income method",
+            "Expenditure method",
+            "Consumption method"
+        ],
+        "correct": 3,
+        "explanation": "The three methods are: production (value added), income, and expenditure methods.",
+        "tags": ["gdp", "gdp-methods"]
+    }
+]
+
+# TEST 2: PUBLIC SECTOR ECONOMICS - PART 1
+TEST_2_QUESTIONS = [
+    {
+        "question": "In a traditional economic system, production decisions are based on:",
+        "choices": [
+            "Central planning",
+            "Market forces",
+            "Custom and tradition",
+            "Government regulations"
+        ],
+        "correct": 2,
+        "explanation": "Traditional systems rely on customs and traditions passed down through generations.",
+        "tags": ["economic-systems"]
+    },
+    {
+        "question": "Which economic system is characterized by private ownership and decentralized decision making?",
+        "choices": [
+            "Command system",
+            "Market system",
+            "Traditional system",
+            "Socialist system"
+        ],
+        "correct": 1,
+        "explanation": "Market systems feature private ownership, individualism, and decentralized decision making.",
+        "tags": ["economic-systems"]
+    },
+    {
+        "question": "Market failure occurs when:",
+        "choices": [
+            "Prices are too high",
+            "The market cannot achieve efficient allocation of resources",
+            "There is too much competition",
+            "Government intervenes"
+        ],
+        "correct": 1,
+        "explanation": "Market failure means the market system cannot achieve efficient resource allocation.",
+        "tags": ["market-failure"]
+    },
+    {
+        "question": "A monopoly is a market structure with:",
+        "choices": [
+            "Many firms producing identical products",
+            "Few firms with barriers to entry",
+            "Only one firm in the industry",
+            "Many firms producing differentiated products"
+        ],
+        "correct": 2,
+        "explanation": "A monopoly exists when there is only one firm in the industry.",
+        "tags": ["market-structures"]
+    },
+    {
+        "question": "Public goods are characterized by:",
+        "choices": [
+            "Rivalry and excludability",
+            "Non-rivalry and non-excludability",
+            "High prices",
+            "Private ownership"
+        ],
+        "correct": 1,
+        "explanation": "Public goods are non-rivalrous (one person's use doesn't reduce availability) and non-excludable (can't prevent consumption).",
+        "tags": ["public-goods", "market-failure"]
+    },
+    {
+        "question": "Which of the following is an example of a public good?",
+        "choices": [
+            "A sandwich",
+            "A cinema seat",
+            "Street lighting",
+            "A museum ticket"
+        ],
+        "correct": 2,
+        "explanation": "Street lighting is a classic public good - it's non-rivalrous and non-excludable.",
+        "tags": ["public-goods"]
+    },
+    {
+        "question": "A negative externality is:",
+        "choices": [
+            "A benefit experienced by society",
+            "A cost experienced by society but not by producers/consumers",
+            "A government subsidy",
+            "A type of tax"
+        ],
+        "correct": 1,
+        "explanation": "Negative externalities are costs imposed on society by producers/consumers who don't bear those costs.",
+        "tags": ["externalities", "market-failure"]
+    },
+    {
+        "question": "Merit goods are goods that:",
+        "choices": [
+            "People will over-consume",
+            "Should be subsidized or provided free",
+            "Only wealthy people can afford",
+            "Generate negative externalities"
+        ],
+        "correct": 1,
+        "explanation": "Merit goods are beneficial to society and should be subsidized or provided free (like education).",
+        "tags": ["merit-goods"]
+    },
+    {
+        "question": "Progressive income taxation means:",
+        "choices": [
+            "Everyone pays the same tax rate",
+            "Lower income earners pay more tax",
+            "Higher income earners pay a greater percentage of their income in tax",
+            "No one pays tax"
+        ],
+        "correct": 2,
+        "explanation": "Progressive taxation means higher earners pay a higher percentage rate, not just a higher amount.",
+        "tags": ["taxation"]
+    },
+    {
+        "question": "Privatization refers to:",
+        "choices": [
+            "Government taking over private assets",
+            "Selling state-owned assets to the private sector",
+            "Creating new public goods",
+            "Increasing government spending"
+        ],
+        "correct": 1,
+        "explanation": "Privatization is the sale of state-owned assets to private sector entities.",
+        "tags": ["privatisation"]
+    },
+    {
+        "question": "An oligopoly is characterized by:",
+        "choices": [
+            "One firm only",
+            "Many small firms",
+            "Few firms with barriers to entry",
+            "Perfect competition"
+        ],
+        "correct": 2,
+        "explanation": "Oligopolies have few enough firms that barriers can be erected against new entrants.",
+        "tags": ["market-structures"]
+    },
+    {
+        "question": "Which is an example of a positive externality?",
+        "choices": [
+            "Factory pollution",
+            "Traffic congestion",
+            "Education creating an informed citizenry",
+            "Noise pollution"
+        ],
+        "correct": 2,
+        "explanation": "Education benefits not just the individual but society as a whole - a positive externality.",
+        "tags": ["externalities"]
+    },
+    {
+        "question": "In perfect competition, firms are:",
+        "choices": [
+            "Price makers",
+            "Price takers",
+            "Monopolists",
+            "Oligopolists"
+        ],
+        "correct": 1,
+        "explanation": "In perfect competition, no single firm can influence market price - they are price takers.",
+        "tags": ["market-structures"]
+    },
+    {
+        "question": "A mixed good is:",
+        "choices": [
+            "Purely public",
+            "Purely private",
+            "Partially excludable or rivalrous",
+            "Always free"
+        ],
+        "correct": 2,
+        "explanation": "Mixed goods have some characteristics of public goods but can be partially excludable or rivalrous.",
+        "tags": ["public-goods", "mixed-goods"]
+    },
+    {
+        "question": "The free-rider problem occurs with:",
+        "choices": [
+            "Private goods",
+            "Public goods",
+            "Merit goods",
+            "Luxury goods"
+        ],
+        "correct": 1,
+        "explanation": "Public goods suffer from free-rider problems because people can benefit without paying.",
+        "tags": ["public-goods", "market-failure"]
+    }
+]
+
+# TEST 3: PUBLIC SECTOR ECONOMICS - PART 2
+TEST_3_QUESTIONS = [
+    {
+        "question": "Fiscal policy involves:",
+        "choices": [
+            "Setting interest rates",
+            "Controlling money supply",
+            "Manipulating government expenditure and tax rates",
+            "Regulating banks"
+        ],
+        "correct": 2,
+        "explanation": "Fiscal policy uses government spending and taxation to influence the economy.",
+        "tags": ["fiscal-policy"]
+    },
+    {
+        "question": "An expansionary fiscal policy includes:",
+        "choices": [
+            "Cutting government spending",
+            "Raising taxes",
+            "Raising government expenditure or reducing taxes",
+            "Privatizing state assets"
+        ],
+        "correct": 2,
+        "explanation": "Expansionary policy increases spending or cuts taxes to stimulate the economy.",
+        "tags": ["fiscal-policy"]
+    },
+    {
+        "question": "A deflationary fiscal policy would be appropriate to:",
+        "choices": [
+            "Prevent a recession",
+            "Prevent rampant inflation",
+            "Increase unemployment",
+            "Reduce exports"
+        ],
+        "correct": 1,
+        "explanation": "Deflationary policy (cutting spending/raising taxes) helps cool an overheating economy and control inflation.",
+        "tags": ["fiscal-policy"]
+    },
+    {
+        "question": "A budget deficit occurs when:",
+        "choices": [
+            "Government spending exceeds tax receipts",
+            "Tax receipts exceed government spending",
+            "Exports exceed imports",
+            "GDP is falling"
+        ],
+        "correct": 0,
+        "explanation": "A deficit exists when government spends more than it receives in revenue.",
+        "tags": ["fiscal-policy", "budget"]
+    },
+    {
+        "question": "A budget surplus occurs when:",
+        "choices": [
+            "Government spending exceeds revenues",
+            "Tax receipts exceed government spending",
+            "The economy is in recession",
+            "Debt is increasing"
+        ],
+        "correct": 1,
+        "explanation": "A surplus exists when government revenues exceed spending.",
+        "tags": ["fiscal-policy", "budget"]
+    },
+    {
+        "question": "Capital expenditures include spending on:",
+        "choices": [
+            "Wages and salaries",
+            "Welfare benefits",
+            "Roads, hospitals, and schools",
+            "Administrative costs"
+        ],
+        "correct": 2,
+        "explanation": "Capital expenditures are investments in long-term assets like infrastructure.",
+        "tags": ["government-spending"]
+    },
+    {
+        "question": "Current expenditures include:",
+        "choices": [
+            "Building new infrastructure",
+            "Wages and salaries of public sector staff",
+            "Purchasing land",
+            "Building hospitals"
+        ],
+        "correct": 1,
+        "explanation": "Current expenditures are recurring operational costs like wages and benefits.",
+        "tags": ["government-spending"]
+    },
+    {
+        "question": "Government debt represents:",
+        "choices": [
+            "Annual deficit",
+            "Accumulated deficits over years",
+            "Current year spending",
+            "Tax receipts"
+        ],
+        "correct": 1,
+        "explanation": "Total debt is the accumulation of all past deficits minus any surpluses.",
+        "tags": ["government-debt"]
+    },
+    {
+        "question": "For public finances to be sustainable, the debt-to-GDP ratio should:",
+        "choices": [
+            "Increase rapidly",
+            "Not rise",
+            "Double annually",
+            "Be eliminated completely"
+        ],
+        "correct": 1,
+        "explanation": "Sustainable finances require the debt-to-GDP ratio to remain stable or decrease.",
+        "tags": ["government-debt", "fiscal-policy"]
+    },
+    {
+        "question": "South Africa achieved its first back-to-back primary budget surplus in:",
+        "choices": [
+            "10 years",
+            "12 years",
+            "16 years",
+            "20 years"
+        ],
+        "correct": 2,
+        "explanation": "South Africa achieved this milestone after 16 years in the 2025 fiscal year.",
+        "tags": ["budget", "south-africa"]
+    },
+    {
+        "question": "Which best describes the purpose of stabilization policy?",
+        "choices": [
+            "Eliminate all government debt",
+            "Smooth out business cycle fluctuations",
+            "Maximize government revenue",
+            "Privatize all state assets"
+        ],
+        "correct": 1,
+        "explanation": "Stabilization policy aims to reduce economic fluctuations associated with the business cycle.",
+        "tags": ["fiscal-policy", "stabilisation"]
+    },
+    {
+        "question": "Primary surplus excludes:",
+        "choices": [
+            "Tax revenue",
+            "Government spending on services",
+            "Interest payments on debt",
+            "All government expenditure"
+        ],
+        "correct": 2,
+        "explanation": "Primary surplus is revenue minus spending, excluding interest payments.",
+        "tags": ["budget"]
+    },
+    {
+        "question": "If GDP growth rate exceeds the real interest rate, then:",
+        "choices": [
+            "Debt grows faster than the economy",
+            "Government must run a surplus",
+            "Debt shrinks relative to the economy",
+            "Fiscal policy is ineffective"
+        ],
+        "correct": 2,
+        "explanation": "When growth exceeds interest rates, debt becomes smaller relative to economic size.",
+        "tags": ["government-debt"]
+    },
+    {
+        "question": "Fiscal policy can affect aggregate supply by:",
+        "choices": [
+            "Only changing consumer demand",
+            "Investing in training and infrastructure",
+            "Reducing the money supply",
+            "Eliminating all taxes"
+        ],
+        "correct": 1,
+        "explanation": "Supply-side fiscal policy includes investments in education, training, and infrastructure.",
+        "tags": ["fiscal-policy"]
+    },
+    {
+        "question": "Which is a source of government receipts?",
+        "choices": [
+            "Budget deficits",
+            "Taxes on income and consumption",
+            "Government debt",
+            "Capital expenditure"
+        ],
+        "correct": 1,
+        "explanation": "Government receipts include taxes, sales, transfers, fines, and investment income.",
+        "tags": ["government-revenue"]
+    }
+]
+
+# (number, name, questions) for every test, in menu order
+TESTS = [
+    (1, "Measuring Economic Performance", TEST_1_QUESTIONS),
+    (2, "Public Sector Economics - Part 1", TEST_2_QUESTIONS),
+    (3, "Public Sector Economics - Part 2", TEST_3_QUESTIONS),
+]
+
+# Numeric questions tagged "template:<name>" get fresh numbers on every
+# attempt (see templates.py). Distractors fill the wrong-answer slots in
+# order, each one a typical mistake
+TEMPLATES = {
+    "cpi-inflation": {
+        "vars": {
+            "year": "randint(2005, 2024)",
+            "base": "randint(90, 160)",
+            "later": "base + randint(1, base // 5)",
+            "rate": "(later - base) / base * 100",
+        },
+        "require": ["round(rate, 1) >= 1"],
+        "question": "If the CPI was {base} in {year} and {later} in {year + 1}, the inflation rate is:",
+        "answer": "{rate:.1f}%",
+        "distractors": [
+            "{later / base * 100:.1f}%",  # the new index as a share of the old
+            "{rate / 10:.2f}%",  # decimal point slipped
+            "{rate * 10:.0f}%",
+        ],
+        "explanation": "Inflation rate = ({later}-{base})/{base} × 100 = {rate:.1f}%",
+    },
+    "unemployment-rate": {
+        "vars": {
+            "unemployed": "randint(5, 60) / 10",
+            "employed": "randint(120, 600) / 10",
+            "rate": "unemployed / (unemployed + employed) * 100",
+        },
+        "question": "If unemployment is {unemployed} million and employment is {employed} million, "
+                    "the unemployment rate is:",
+        "answer": "{rate:.2f}%",
+        "distractors": [
+            "{unemployed / employed * 100:.2f}%",  # divided by employment, not the labour force
+            "{unemployed}%",
+            "{employed}%",
+        ],
+        "explanation": "Unemployment rate = {unemployed}/({employed}+{unemployed}) × 100 "
+                       "= {unemployed}/{employed + unemployed:g} × 100 = {rate:.2f}%",
+    },
+}
@@ -5,697 +5,629 @@ By Sophie Kasse
 A command-line quiz application for Economics 1 students
 """
 
-import random
-import json
-from typing import List, Dict, Tuple
-
-# Color codes for terminal output
-class Colors:
-    HEADER = '\033[95m'
-    BLUE = '\033[94m'
-    CYAN = '\033[96m'
-    GREEN = '\033[92m'
-    YELLOW = '\033[93m'
-    RED = '\033[91m'
-    BOLD = '\033[1m'
-    UNDERLINE = '\033[4m'
-    END = '\033[0m'
+import contextlib
+import os
+import signal
+import sys
+import time
+import getpass
+from typing import List, Dict, Sequence, Tuple
+
+# Run as a script this module is __main__: register it under its own name
+# too, so the feature modules' "from quiz import ..." don't load a second copy
+if __name__ == "__main__":
+    sys.modules.setdefault("quiz", sys.modules[__name__])
+
+import bank
+import instrument
+import policy
+import render
+import shuffle
+
+# Screens are buffered and written once per prompt; Colors is the
+# renderer's theme, so piped output carries no colour codes
+screen = render.make_renderer()
+Colors = screen.theme
+# Headers and question screens, rendered once per theme and choice order
+SCREENS = render.ScreenCache()
 
 def clear_screen():
     """Clear the terminal screen"""
-    print("\n" * 50)
+    screen.clear()
 
 def print_header(text: str):
     """Print a formatted header"""
-    print(f"\n{Colors.HEADER}{Colors.BOLD}{'=' * 70}")
-    print(f"{text.center(70)}")
-    print(f"{'=' * 70}{Colors.END}\n")
+    screen.write(SCREENS.get(("header", text, Colors.__name__), lambda: (
+        f"\n{Colors.HEADER}{Colors.BOLD}{'=' * 70}\n"
+        f"{text.center(70)}\n"
+        f"{'=' * 70}{Colors.END}\n\n")))
 
 def print_question(q_num: int, total: int, question: str):
     """Print a formatted question"""
-    print(f"{Colors.CYAN}{Colors.BOLD}Question {q_num}/{total}{Colors.END}")
-    print(f"{Colors.BOLD}{question}{Colors.END}\n")
+    screen.line(f"{Colors.CYAN}{Colors.BOLD}Question {q_num}/{total}{Colors.END}")
+    screen.line(f"{Colors.BOLD}{question}{Colors.END}\n")
 
-def print_choices(choices: List[str]):
+def print_choices(choices: Sequence[str]):
     """Print formatted answer choices"""
     for i, choice in enumerate(choices, 1):
-        print(f"  {i}. {choice}")
-    print()
+        screen.line(f"  {i}. {choice}")
+    screen.line()
+
+def question_body(question: str, choices: Sequence[str]) -> str:
+    """What print_question and print_choices show below the question number"""
+    lines = [f"{Colors.BOLD}{question}{Colors.END}", ""]
+    lines.extend(f"  {i}. {choice}" for i, choice in enumerate(choices, 1))
+    return "\n".join(lines) + "\n\n"
 
 def get_user_choice(num_choices: int) -> int:
     """Get and validate user input"""
     while True:
         try:
-            choice = input(f"{Colors.YELLOW}Enter your answer (1-{num_choices}): {Colors.END}")
+            choice = screen.input(f"{Colors.YELLOW}Enter your answer (1-{num_choices}): {Colors.END}")
             choice = int(choice)
             if 1 <= choice <= num_choices:
                 return choice
             else:
-                print(f"{Colors.RED}Please enter a number between 1 and {num_choices}{Colors.END}")
+                screen.line(f"{Colors.RED}Please enter a number between 1 and {num_choices}{Colors.END}")
         except ValueError:
-            print(f"{Colors.RED}Please enter a valid number{Colors.END}")
+            screen.line(f"{Colors.RED}Please enter a valid number{Colors.END}")
         except KeyboardInterrupt:
-            print(f"\n{Colors.RED}Quiz interrupted. Exiting...{Colors.END}")
+            screen.line(f"\n{Colors.RED}Quiz interrupted. Exiting...{Colors.END}")
+            screen.present()
             exit(0)
 
 def show_result(is_correct: bool, correct_answer: str, explanation: str = ""):
     """Show whether answer was correct"""
     if is_correct:
-        print(f"{Colors.GREEN}{Colors.BOLD}✓ Correct!{Colors.END}")
+        screen.line(f"{Colors.GREEN}{Colors.BOLD}✓ Correct!{Colors.END}")
     else:
-        print(f"{Colors.RED}{Colors.BOLD}✗ Incorrect{Colors.END}")
-        print(f"{Colors.YELLOW}The correct answer was: {correct_answer}{Colors.END}")
+        screen.line(f"{Colors.RED}{Colors.BOLD}✗ Incorrect{Colors.END}")
+        screen.line(f"{Colors.YELLOW}The correct answer was: {correct_answer}{Colors.END}")
     
     if explanation:
-        print(f"{Colors.CYAN}Explanation: {explanation}{Colors.END}")
+        screen.line(f"{Colors.CYAN}Explanation: {explanation}{Colors.END}")
     
-    input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
+    screen.input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
 
-def calculate_grade(score: int, total: int) -> Tuple[str, str]:
-    """Calculate letter grade and pass/fail status"""
-    percentage = (score / total) * 100
-    
-    if percentage >= 75:
-        grade = "A"
-        status = "PASSED"
-    elif percentage >= 70:
-        grade = "B"
-        status = "PASSED"
-    elif percentage >= 60:
-        grade = "C"
-        status = "PASSED"
-    elif percentage >= 50:
-        grade = "D"
-        status = "PASSED"
-    else:
-        grade = "F"
-        status = "FAILED"
-    
+def calculate_grade(score: float, total: int) -> Tuple[str, str]:
+    """Calculate letter grade and pass/fail status under the grading policy"""
+    grade, status, _ = POLICY.result(score, total)
     return grade, status
 
-def show_final_results(score: int, total: int, test_name: str):
-    """Display final test results"""
+def show_final_results(score: float, total: int, test_name: str, test_num: int = 0):
+    """Display final test results, and how they compare with the test's cohort if stored"""
     percentage = (score / total) * 100
-    grade, status = calculate_grade(score, total)
+    grade, status, feedback = POLICY.result(score, total)
     
     clear_screen()
     print_header(f"{test_name} - RESULTS")
     
-    print(f"{Colors.BOLD}Your Score: {score}/{total}{Colors.END}")
-    print(f"{Colors.BOLD}Percentage: {percentage:.1f}%{Colors.END}")
-    print(f"{Colors.BOLD}Grade: {grade}{Colors.END}")
+    screen.line(f"{Colors.BOLD}Your Score: {score:g}/{total}{Colors.END}")
+    screen.line(f"{Colors.BOLD}Percentage: {percentage:.1f}%{Colors.END}")
+    screen.line(f"{Colors.BOLD}Grade: {grade}{Colors.END}")
     
     if status == "PASSED":
-        print(f"\n{Colors.GREEN}{Colors.BOLD}🎉 CONGRATULATIONS! YOU PASSED! 🎉{Colors.END}")
+        screen.line(f"\n{Colors.GREEN}{Colors.BOLD}🎉 CONGRATULATIONS! YOU PASSED! 🎉{Colors.END}")
     else:
-        print(f"\n{Colors.RED}{Colors.BOLD}Unfortunately, you did not pass this time.{Colors.END}")
-        print(f"{Colors.YELLOW}Keep studying and try again!{Colors.END}")
-    
-    print(f"\n{Colors.CYAN}Performance Analysis:{Colors.END}")
-    if percentage >= 80:
-        print("Excellent work! You have a strong grasp of the material.")
-    elif percentage >= 70:
-        print("Good job! You understand most concepts well.")
-    elif percentage >= 60:
-        print("Fair performance. Review the material to strengthen your understanding.")
-    elif percentage >= 50:
-        print("You passed, but there's room for improvement. Focus on weak areas.")
+        screen.line(f"\n{Colors.RED}{Colors.BOLD}Unfortunately, you did not pass this time.{Colors.END}")
+        screen.line(f"{Colors.YELLOW}Keep studying and try again!{Colors.END}")
+    
+    if feedback:
+        screen.line(f"\n{Colors.CYAN}Performance Analysis:{Colors.END}")
+        screen.line(feedback)
+    
+    if ATTEMPTS is not None and test_num:
+        show_cohort_standing(test_num, score, total)
+    
+    screen.input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
+
+def show_cohort_standing(test_num: int, score: int, total: int):
+    """How a score compares with everyone's attempts at the test"""
+    standing = ATTEMPTS.cohort.standing(test_num, score, total)
+    # The student's own attempt is already counted
+    others = standing["attempts"] - 1
+    if others < 1:
+        return
+    screen.line(f"\n{Colors.CYAN}Compared with {others} other attempt{'s' if others != 1 else ''}:{Colors.END}")
+    screen.line(f"You scored higher than {standing['beaten'] * 100:.0f}% of all attempts.")
+    screen.line(f"Mean {standing['mean_percentage']:.1f}%, median {standing['percentiles']['p50']:.1f}%, "
+                f"pass rate {standing['pass_rate'] * 100:.1f}%")
+    screen.line("Grades: " + "  ".join(f"{grade} {share * 100:.0f}%" for grade, share in policy_grades(standing["grades"])))
+
+def policy_grades(shares: Dict[str, float]) -> List[Tuple[str, float]]:
+    """Grade shares in the grading policy's order, plus any other grades that were given"""
+    import cohort
+    return [(grade, shares.get(grade, 0.0)) for grade in cohort.grade_names(shares, POLICY.grade_names())]
+
+def forget_templates(*_):
+    """Bank listener: recompile question templates from the edited questions.py when next used"""
+    templates = sys.modules.get("templates")
+    if templates is not None:
+        templates.clear()
+
+# Questions live in questions.py and are compiled into a memory-mapped bank;
+# each TEST_n_QUESTIONS decodes a question only when it is asked
+BANK = bank.load_default_bank()
+BANK.add_listener(SCREENS.clear)
+BANK.add_listener(forget_templates)
+TEST_1_QUESTIONS = BANK.test(1)
+TEST_2_QUESTIONS = BANK.test(2)
+TEST_3_QUESTIONS = BANK.test(3)
+
+# How marks become grades (see policy.py); main() loads grading.json beside
+# the app, or --policy, in place of the built-in one
+POLICY = policy.DEFAULT
+
+# Finished tests are saved here (see store.py); main() opens it
+DEFAULT_STORE_PATH = os.path.join(bank.APP_DIR, "attempts")
+STUDENT_ID = getpass.getuser()
+ATTEMPTS = None
+# Randomize question and choice order for every attempt
+SHUFFLE = True
+# Sections of the menu's exam (exam.Section list); None = every test
+EXAM_SECTIONS = None
+
+def record_attempt(test_num: int, answers: List[Dict], score: int, total: int, marks: float = None, **extra):
+    """Save a finished test to the attempt store
+
+    score is the number of right answers; marks, if the grading policy
+    gives something else, is what the grade comes from.
+    """
+    if ATTEMPTS is None:
+        return
+    if marks is not None and marks != score:
+        extra["marks"] = marks
     else:
-        print("More study is needed. Review all topics thoroughly.")
-    
-    input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
-
-# TEST 1: MEASURING ECONOMIC PERFORMANCE
-TEST_1_QUESTIONS = [
-    {
-        "question": "Which of the following is NOT one of the five macroeconomic objectives?",
-        "choices": [
-            "Economic growth",
-            "Full employment",
-            "Increased exports",
-            "Price stability"
-        ],
-        "correct": 2,
-        "explanation": "The five objectives are: economic growth, full employment, price stability, balance of payments stability, and equitable distribution of income."
-    },
-    {
-        "question": "GDP is defined as:",
-        "choices": [
-            "Total value of all goods produced in a country",
-            "Total value of all final goods and services produced within a country's boundaries in a period",
-            "Total income earned by citizens",
-            "Total exports minus imports"
-        ],
-        "correct": 1,
-        "explanation": "GDP measures the total value of all FINAL goods and services produced WITHIN a country's boundaries in a specific period."
-    },
-    {
-        "question": "Which of the following would be considered an intermediate good?",
-        "choices": [
-            "Bread sold to a consumer",
-            "Flour sold to a bakery",
-            "A car sold to a household",
-            "A haircut"
-        ],
-        "correct": 1,
-        "explanation": "Flour sold to a bakery is an intermediate good because it's used in further production, not final consumption."
-    },
-    {
-        "question": "The product method of calculating GDP adds up:",
-        "choices": [
-            "All final goods sold",
-            "All incomes generated",
-            "Value added by all industries",
-            "All consumer expenditures"
-        ],
-        "correct": 2,
-        "explanation": "The product method sums the value added at each stage of production across all industries."
-    },
-    {
-        "question": "Real GDP differs from nominal GDP because:",
-        "choices": [
-            "It uses current prices",
-            "It uses constant prices from a base year",
-            "It includes imports",
-            "It excludes exports"
-        ],
-        "correct": 1,
-        "explanation": "Real GDP uses constant prices from a base year to eliminate the effect of inflation."
-    },
-    {
-        "question": "If the CPI was 100 in 2020 and 105 in 2021, the inflation rate is:",
-        "choices": [
-            "5%",
-            "105%",
-            "0.5%",
-            "50%"
-        ],
-        "correct": 0,
-        "explanation": "Inflation rate = (105-100)/100 × 100 = 5%"
-    },
-    {
-        "question": "The labour force consists of:",
-        "choices": [
-            "Only employed people",
-            "Only unemployed people",
-            "Employed plus unemployed people",
-            "The entire population"
-        ],
-        "correct": 2,
-        "explanation": "Labour force includes both employed and unemployed people who are actively seeking work."
-    },
-    {
-        "question": "GNI equals GDP plus:",
-        "choices": [
-            "Depreciation",
-            "Net income from abroad",
-            "Government spending",
-            "Taxes"
-        ],
-        "correct": 1,
-        "explanation": "GNI = GDP + Net income from abroad (income earned abroad minus income sent abroad)."
-    },
-    {
-        "question": "In the expenditure method, GDP = C + I + G + ?",
-        "choices": [
-            "X",
-            "M",
-            "(X - M)",
-            "(M - X)"
-        ],
-        "correct": 2,
-        "explanation": "GDP = C + I + G + (X - M), where (X - M) represents net exports."
-    },
-    {
-        "question": "The base year in an index number always has a value of:",
-        "choices": [
-            "0",
-            "1",
-            "10",
-            "100"
-        ],
-        "correct": 3,
-        "explanation": "By convention, the base year is assigned a value of 100 in index numbers."
-    },
-    {
-        "question": "Which statement about nominal GDP is TRUE?",
-        "choices": [
-            "It always accurately reflects economic growth",
-            "It can increase even when actual production stays the same",
-            "It is adjusted for inflation",
-            "It uses base year prices"
-        ],
-        "correct": 1,
-        "explanation": "Nominal GDP can increase due to price increases (inflation) even if actual production remains constant."
-    },
-    {
-        "question": "Depreciation in national accounts refers to:",
-        "choices": [
-            "Currency losing value",
-            "Capital equipment wearing out or becoming obsolete",
-            "Stock market decline",
-            "Increase in imports"
-        ],
-        "correct": 1,
-        "explanation": "Depreciation is the allowance for capital consumption as equipment wears out or becomes obsolete."
-    },
-    {
-        "question": "If unemployment is 2 million and employment is 28 million, the unemployment rate is:",
-        "choices": [
-            "7.14%",
-            "6.67%",
-            "2%",
-            "28%"
-        ],
-        "correct": 1,
-        "explanation": "Unemployment rate = 2/(28+2) × 100 = 2/30 × 100 = 6.67%"
-    },
-    {
-        "question": "Double counting in GDP calculation means:",
-        "choices": [
-            "Counting exports twice",
-            "Counting both intermediate and final goods",
-            "Counting government spending twice",
-            "Measuring GDP twice per year"
-        ],
-        "correct": 1,
-        "explanation": "Double counting occurs when we count the value of intermediate goods plus final goods, overstating GDP."
-    },
-    {
-        "question": "Which is NOT a method of calculating GDP?",
-        "choices": [
-            "Production method",
-            "Income method",
-            "Expenditure method",
-            "Consumption method"
-        ],
-        "correct": 3,
-        "explanation": "The three methods are: production (value added), income, and expenditure methods."
-    }
-]
-
-# TEST 2: PUBLIC SECTOR ECONOMICS - PART 1
-TEST_2_QUESTIONS = [
-    {
-        "question": "In a traditional economic system, production decisions are based on:",
-        "choices": [
-            "Central planning",
-            "Market forces",
-            "Custom and tradition",
-            "Government regulations"
-        ],
-        "correct": 2,
-        "explanation": "Traditional systems rely on customs and traditions passed down through generations."
-    },
-    {
-        "question": "Which economic system is characterized by private ownership and decentralized decision making?",
-        "choices": [
-            "Command system",
-            "Market system",
-            "Traditional system",
-            "Socialist system"
-        ],
-        "correct": 1,
-        "explanation": "Market systems feature private ownership, individualism, and decentralized decision making."
-    },
-    {
-        "question": "Market failure occurs when:",
-        "choices": [
-            "Prices are too high",
-            "The market cannot achieve efficient allocation of resources",
-            "There is too much competition",
-            "Government intervenes"
-        ],
-        "correct": 1,
-        "explanation": "Market failure means the market system cannot achieve efficient resource allocation."
-    },
-    {
-        "question": "A monopoly is a market structure with:",
-        "choices": [
-            "Many firms producing identical products",
-            "Few firms with barriers to entry",
-            "Only one firm in the industry",
-            "Many firms producing differentiated products"
-        ],
-        "correct": 2,
-        "explanation": "A monopoly exists when there is only one firm in the industry."
-    },
-    {
-        "question": "Public goods are characterized by:",
-        "choices": [
-            "Rivalry and excludability",
-            "Non-rivalry and non-excludability",
-            "High prices",
-            "Private ownership"
-        ],
-        "correct": 1,
-        "explanation": "Public goods are non-rivalrous (one person's use doesn't reduce availability) and non-excludable (can't prevent consumption)."
-    },
-    {
-        "question": "Which of the following is an example of a public good?",
-        "choices": [
-            "A sandwich",
-            "A cinema seat",
-            "Street lighting",
-            "A museum ticket"
-        ],
-        "correct": 2,
-        "explanation": "Street lighting is a classic public good - it's non-rivalrous and non-excludable."
-    },
-    {
-        "question": "A negative externality is:",
-        "choices": [
-            "A benefit experienced by society",
-            "A cost experienced by society but not by producers/consumers",
-            "A government subsidy",
-            "A type of tax"
-        ],
-        "correct": 1,
-        "explanation": "Negative externalities are costs imposed on society by producers/consumers who don't bear those costs."
-    },
-    {
-        "question": "Merit goods are goods that:",
-        "choices": [
-            "People will over-consume",
-            "Should be subsidized or provided free",
-            "Only wealthy people can afford",
-            "Generate negative externalities"
-        ],
-        "correct": 1,
-        "explanation": "Merit goods are beneficial to society and should be subsidized or provided free (like education)."
-    },
-    {
-        "question": "Progressive income taxation means:",
-        "choices": [
-            "Everyone pays the same tax rate",
-            "Lower income earners pay more tax",
-            "Higher income earners pay a greater percentage of their income in tax",
-            "No one pays tax"
-        ],
-        "correct": 2,
-        "explanation": "Progressive taxation means higher earners pay a higher percentage rate, not just a higher amount."
-    },
-    {
-        "question": "Privatization refers to:",
-        "choices": [
-            "Government taking over private assets",
-            "Selling state-owned assets to the private sector",
-            "Creating new public goods",
-            "Increasing government spending"
-        ],
-        "correct": 1,
-        "explanation": "Privatization is the sale of state-owned assets to private sector entities."
-    },
-    {
-        "question": "An oligopoly is characterized by:",
-        "choices": [
-            "One firm only",
-            "Many small firms",
-            "Few firms with barriers to entry",
-            "Perfect competition"
-        ],
-        "correct": 2,
-        "explanation": "Oligopolies have few enough firms that barriers can be erected against new entrants."
-    },
-    {
-        "question": "Which is an example of a positive externality?",
-        "choices": [
-            "Factory pollution",
-            "Traffic congestion",
-            "Education creating an informed citizenry",
-            "Noise pollution"
-        ],
-        "correct": 2,
-        "explanation": "Education benefits not just the individual but society as a whole - a positive externality."
-    },
-    {
-        "question": "In perfect competition, firms are:",
-        "choices": [
-            "Price makers",
-            "Price takers",
-            "Monopolists",
-            "Oligopolists"
-        ],
-        "correct": 1,
-        "explanation": "In perfect competition, no single firm can influence market price - they are price takers."
-    },
-    {
-        "question": "A mixed good is:",
-        "choices": [
-            "Purely public",
-            "Purely private",
-            "Partially excludable or rivalrous",
-            "Always free"
-        ],
-        "correct": 2,
-        "explanation": "Mixed goods have some characteristics of public goods but can be partially excludable or rivalrous."
-    },
-    {
-        "question": "The free-rider problem occurs with:",
-        "choices": [
-            "Private goods",
-            "Public goods",
-            "Merit goods",
-            "Luxury goods"
-        ],
-        "correct": 1,
-        "explanation": "Public goods suffer from free-rider problems because people can benefit without paying."
-    }
-]
-
-# TEST 3: PUBLIC SECTOR ECONOMICS - PART 2
-TEST_3_QUESTIONS = [
-    {
-        "question": "Fiscal policy involves:",
-        "choices": [
-            "Setting interest rates",
-            "Controlling money supply",
-            "Manipulating government expenditure and tax rates",
-            "Regulating banks"
-        ],
-        "correct": 2,
-        "explanation": "Fiscal policy uses government spending and taxation to influence the economy."
-    },
-    {
-        "question": "An expansionary fiscal policy includes:",
-        "choices": [
-            "Cutting government spending",
-            "Raising taxes",
-            "Raising government expenditure or reducing taxes",
-            "Privatizing state assets"
-        ],
-        "correct": 2,
-        "explanation": "Expansionary policy increases spending or cuts taxes to stimulate the economy."
-    },
-    {
-        "question": "A deflationary fiscal policy would be appropriate to:",
-        "choices": [
-            "Prevent a recession",
-            "Prevent rampant inflation",
-            "Increase unemployment",
-            "Reduce exports"
-        ],
-        "correct": 1,
-        "explanation": "Deflationary policy (cutting spending/raising taxes) helps cool an overheating economy and control inflation."
-    },
-    {
-        "question": "A budget deficit occurs when:",
-        "choices": [
-            "Government spending exceeds tax receipts",
-            "Tax receipts exceed government spending",
-            "Exports exceed imports",
-            "GDP is falling"
-        ],
-        "correct": 0,
-        "explanation": "A deficit exists when government spends more than it receives in revenue."
-    },
-    {
-        "question": "A budget surplus occurs when:",
-        "choices": [
-            "Government spending exceeds revenues",
-            "Tax receipts exceed government spending",
-            "The economy is in recession",
-            "Debt is increasing"
-        ],
-        "correct": 1,
-        "explanation": "A surplus exists when government revenues exceed spending."
-    },
-    {
-        "question": "Capital expenditures include spending on:",
-        "choices": [
-            "Wages and salaries",
-            "Welfare benefits",
-            "Roads, hospitals, and schools",
-            "Administrative costs"
-        ],
-        "correct": 2,
-        "explanation": "Capital expenditures are investments in long-term assets like infrastructure."
-    },
-    {
-        "question": "Current expenditures include:",
-        "choices": [
-            "Building new infrastructure",
-            "Wages and salaries of public sector staff",
-            "Purchasing land",
-            "Building hospitals"
-        ],
-        "correct": 1,
-        "explanation": "Current expenditures are recurring operational costs like wages and benefits."
-    },
-    {
-        "question": "Government debt represents:",
-        "choices": [
-            "Annual deficit",
-            "Accumulated deficits over years",
-            "Current year spending",
-            "Tax receipts"
-        ],
-        "correct": 1,
-        "explanation": "Total debt is the accumulation of all past deficits minus any surpluses."
-    },
-    {
-        "question": "For public finances to be sustainable, the debt-to-GDP ratio should:",
-        "choices": [
-            "Increase rapidly",
-            "Not rise",
-            "Double annually",
-            "Be eliminated completely"
-        ],
-        "correct": 1,
-        "explanation": "Sustainable finances require the debt-to-GDP ratio to remain stable or decrease."
-    },
-    {
-        "question": "South Africa achieved its first back-to-back primary budget surplus in:",
-        "choices": [
-            "10 years",
-            "12 years",
-            "16 years",
-            "20 years"
-        ],
-        "correct": 2,
-        "explanation": "South Africa achieved this milestone after 16 years in the 2025 fiscal year."
-    },
-    {
-        "question": "Which best describes the purpose of stabilization policy?",
-        "choices": [
-            "Eliminate all government debt",
-            "Smooth out business cycle fluctuations",
-            "Maximize government revenue",
-            "Privatize all state assets"
-        ],
-        "correct": 1,
-        "explanation": "Stabilization policy aims to reduce economic fluctuations associated with the business cycle."
-    },
-    {
-        "question": "Primary surplus excludes:",
-        "choices": [
-            "Tax revenue",
-            "Government spending on services",
-            "Interest payments on debt",
-            "All government expenditure"
-        ],
-        "correct": 2,
-        "explanation": "Primary surplus is revenue minus spending, excluding interest payments."
-    },
-    {
-        "question": "If GDP growth rate exceeds the real interest rate, then:",
-        "choices": [
-            "Debt grows faster than the economy",
-            "Government must run a surplus",
-            "Debt shrinks relative to the economy",
-            "Fiscal policy is ineffective"
-        ],
-        "correct": 2,
-        "explanation": "When growth exceeds interest rates, debt becomes smaller relative to economic size."
-    },
-    {
-        "question": "Fiscal policy can affect aggregate supply by:",
-        "choices": [
-            "Only changing consumer demand",
-            "Investing in training and infrastructure",
-            "Reducing the money supply",
-            "Eliminating all taxes"
-        ],
-        "correct": 1,
-        "explanation": "Supply-side fiscal policy includes investments in education, training, and infrastructure."
-    },
-    {
-        "question": "Which is a source of government receipts?",
-        "choices": [
-            "Budget deficits",
-            "Taxes on income and consumption",
-            "Government debt",
-            "Capital expenditure"
-        ],
-        "correct": 1,
-        "explanation": "Government receipts include taxes, sales, transfers, fines, and investment income."
-    }
-]
-
-def run_test(test_num: int, questions: List[Dict], test_name: str):
-    """Run a single test"""
+        marks = score
+    grade, status = calculate_grade(marks, total)
+    ATTEMPTS.record({
+        "student": STUDENT_ID,
+        "test": test_num,
+        "answers": answers,
+        "score": score,
+        "total": total,
+        "grade": grade,
+        "status": status,
+        **extra,
+    })
+
+def attempt_number(test_num: int) -> int:
+    """How many times this student has already taken a test"""
+    if ATTEMPTS is None:
+        return 0
+    return sum(1 for a in ATTEMPTS.attempts_for_student(STUDENT_ID) if a["test"] == test_num)
+
+def calibration_path():
+    """Where adaptive-test ratings are kept, or None when nothing is stored"""
+    if ATTEMPTS is None:
+        return None
+    return os.path.join(ATTEMPTS.path, "adaptive.json")
+
+def prepare_test(test_num: int, questions: Sequence[bank.Question], attempt: int = None, seed: int = None):
+    """Work out an attempt's layout and render its questions ahead of time
+
+    Returns the layout seed and, in the order they will be asked, each
+    question's bank index, Question, shown choices, shown correct index,
+    choice permutation and rendered body. A resumed attempt passes the
+    seed it started with.
+    """
+    if seed is None:
+        if attempt is None:
+            attempt = attempt_number(test_num)
+        # Question and choice order come from a per-student, per-attempt seed,
+        # so the same attempt always has the same layout
+        seed = shuffle.attempt_seed(STUDENT_ID, test_num, attempt)
+    layout = shuffle.Layout(seed, len(questions), shuffle_questions=SHUFFLE)
+    
+    # Questions from a bank test have bank-wide ids to cache their screens
+    # under; hand-built lists (custom quizzes) are rendered every time
+    first = getattr(questions, "first", None)
+    
+    import random
+    import templates
+    
+    items = []
+    for index in layout.order:
+        q = questions[index]
+        template = templates.template_for(q) if SHUFFLE else None
+        if template is not None:
+            # Fresh numbers, drawn from the layout seed so a resumed attempt
+            # gets the same ones back
+            q = template.apply(q, random.Random(shuffle.mix(seed, index)))
+        if SHUFFLE:
+            # perm maps each shown position back to the original choice
+            choices, correct, perm = layout.choices(index, q)
+        else:
+            choices, correct, perm = q.choices, q.correct, range(len(q.choices))
+        if first is None or template is not None:
+            body = question_body(q.question, choices)
+        else:
+            key = ("question", first + index, tuple(perm), Colors.__name__)
+            body = SCREENS.get(key, lambda: question_body(q.question, choices))
+        items.append((index, q, choices, correct, perm, body))
+    return seed, items
+
+def run_test(test_num: int, questions: Sequence[bank.Question], test_name: str, record: bool = True,
+             prepared=None, resume=None):
+    """Run a single test; test 0 is a custom quiz with no number of its own
+
+    prepared is what prepare_test returned, if the test was set up in
+    advance; resume is a session.SessionState to carry on from.
+    """
+    if resume is None and record and ATTEMPTS is not None:
+        resume = offer_resume(test_num, questions)
+        if resume is not None:
+            prepared = None
+    if resume is not None:
+        prepared = prepare_test(test_num, questions, seed=resume.seed)
+    elif prepared is None:
+        prepared = prepare_test(test_num, questions)
+    seed, items = prepared
+    
     clear_screen()
-    print_header(f"TEST {test_num}: {test_name}")
+    print_header(f"TEST {test_num}: {test_name}" if test_num else test_name)
     
-    print(f"{Colors.CYAN}Welcome to Test {test_num}!{Colors.END}")
-    print(f"{Colors.CYAN}This test contains {len(questions)} multiple choice questions.{Colors.END}")
-    print(f"{Colors.CYAN}You need 50% to pass (50% = D, 60% = C, 70% = B, 75%+ = A){Colors.END}")
-    print(f"{Colors.YELLOW}\nGood luck!{Colors.END}")
+    screen.line(f"{Colors.CYAN}Welcome to {f'Test {test_num}' if test_num else 'your quiz'}!{Colors.END}")
+    screen.line(f"{Colors.CYAN}This test contains {len(questions)} multiple choice questions.{Colors.END}")
+    screen.line(f"{Colors.CYAN}You need {POLICY.pass_mark:g}% to pass ({POLICY.breakdown()}){Colors.END}")
+    if POLICY.marking_note():
+        screen.line(f"{Colors.CYAN}{POLICY.marking_note()}{Colors.END}")
+    if resume is not None:
+        screen.line(f"{Colors.CYAN}Carrying on from question {resume.position + 1}, "
+                    f"with {resume.score} correct so far.{Colors.END}")
+    screen.line(f"{Colors.YELLOW}\nGood luck!{Colors.END}")
     
-    input(f"\n{Colors.YELLOW}Press Enter to start the test...{Colors.END}")
+    screen.input(f"\n{Colors.YELLOW}Press Enter to start the test...{Colors.END}")
     
-    score = 0
+    score = resume.score if resume is not None else 0
+    done = resume.position if resume is not None else 0
     total = len(questions)
+    answers = []
     
-    # Optionally shuffle questions
-    test_questions = questions.copy()
-    # Uncomment the line below to randomize question order
-    # random.shuffle(test_questions)
+    # Stored tests log each answer so an interrupted one can be resumed
+    log = None
+    if record and ATTEMPTS is not None:
+        import session
+        path = session.session_path(ATTEMPTS.path, STUDENT_ID, test_num)
+        if resume is not None:
+            log = session.SessionLog(path, resumed=resume)
+        else:
+            log = session.SessionLog(path, {"student": STUDENT_ID, "test": test_num, "name": test_name,
+                                            "seed": seed, "shuffled": SHUFFLE, "total": total})
+    try:
+        score, answers = ask_questions(test_num, items, done, score, log)
+    except BaseException:
+        # Ctrl+C, or the terminal going away: what was answered is kept
+        if log is not None:
+            log.close()
+            screen.line(f"{Colors.YELLOW}Your answers so far are saved. "
+                        f"Carry on with: {resume_hint(test_num)}{Colors.END}")
+            screen.present()
+        raise
+    if resume is not None:
+        answers = resume.answers() + answers
     
-    for i, q in enumerate(test_questions, 1):
-        clear_screen()
-        print_question(i, total, q["question"])
+    marks = POLICY.marks(test_num, answers, total)
+    instrument.event("test", test=test_num, score=score, total=total, shuffled=SHUFFLE)
+    # Custom quizzes mix questions from several tests, so they aren't stored
+    if record and SHUFFLE:
+        record_attempt(test_num, answers, score, total, marks, seed=seed)
+    elif record:
+        record_attempt(test_num, answers, score, total, marks)
+    if log is not None:
+        log.discard()
+    show_final_results(marks, total, test_name, test_num if record else 0)
+    
+    return marks, total
+
+def offer_resume(test_num: int, questions: Sequence[bank.Question]):
+    """An unfinished attempt at the test to carry on with, if the student wants to
+
+    Starting afresh replaces the unfinished attempt, so the student is
+    asked first. Returns its session.SessionState, or None to start over.
+    """
+    import session
+    state = session.load(session.session_path(ATTEMPTS.path, STUDENT_ID, test_num))
+    if state is None or not state.position or state.student != STUDENT_ID:
+        return None
+    if state.total != len(questions) or state.shuffled != SHUFFLE:
+        screen.line(f"{Colors.YELLOW}Your unfinished attempt at this test can't be carried on here "
+                    f"and will be replaced.{Colors.END}")
+        return None
+    reply = screen.input(f"{Colors.YELLOW}You have an unfinished attempt at this test "
+                         f"({state.position} of {state.total} answered). Carry on with it? [Y/n] {Colors.END}")
+    if reply.strip().lower() in ("n", "no"):
+        screen.line(f"{Colors.YELLOW}Starting again; the unfinished attempt will be replaced.{Colors.END}")
+        return None
+    return state
+
+def resume_hint(test_num: int) -> str:
+    """The command that carries on with this student's interrupted test"""
+    import shlex
+    parts = ["python3", os.path.basename(bank.ARCHIVE or "quiz.py"), "--student", STUDENT_ID]
+    if ATTEMPTS is not None and os.path.abspath(ATTEMPTS.path) != os.path.abspath(DEFAULT_STORE_PATH):
+        parts += ["--store", ATTEMPTS.path]
+    parts += ["resume", "--test", str(test_num)]
+    return " ".join(shlex.quote(part) for part in parts)
+
+def ask_questions(test_num: int, items, done: int, score: int, log=None) -> Tuple[int, List[Dict]]:
+    """Ask the prepared questions after the first done; returns the score and the new answers"""
+    total = len(items)
+    answers = []
+    
+    for i, (index, q, choices, correct, perm, body) in enumerate(items[done:], done + 1):
+        with instrument.span("render", test=test_num, question=index):
+            clear_screen()
+            screen.line(f"{Colors.CYAN}{Colors.BOLD}Question {i}/{total}{Colors.END}")
+            screen.write(body)
+            screen.present()
         
-        # Optionally shuffle choices
-        choices = q["choices"].copy()
-        # Create mapping of shuffled positions to original positions
-        original_correct = q["correct"]
-        # For simplicity, we're keeping choices in order
-        # To shuffle, uncomment below and adjust correct answer tracking
+        started = time.monotonic()
+        user_answer = get_user_choice(len(choices))
+        latency = time.monotonic() - started
         
-        print_choices(choices)
+        with instrument.span("score", test=test_num, question=index):
+            is_correct = (user_answer - 1) == correct
+            if is_correct:
+                score += 1
+            # Answers are stored in bank order, whatever order they were shown in
+            answers.append({"question": index, "answer": perm[user_answer - 1] + 1,
+                            "correct": is_correct, "latency": round(latency, 3)})
+        instrument.event("answer", test=test_num, question=index, position=i,
+                         answer=answers[-1]["answer"], correct=is_correct, latency=latency)
         
-        user_answer = get_user_choice(len(choices))
-        is_correct = (user_answer - 1) == q["correct"]
+        if log is not None:
+            log.answer(i, score, answers[-1])
         
-        if is_correct:
-            score += 1
+        with instrument.span("feedback", test=test_num, question=index):
+            show_result(is_correct, choices[correct], q.explanation)
+    
+    return score, answers
+
+def run_exam(sections=None):
+    """Take several tests as one exam and show the weighted overall grade
+
+    Defaults to EXAM_SECTIONS, or every test in the bank.
+    """
+    import exam
+
+    sections = sections or EXAM_SECTIONS or [exam.Section(t.number) for t in BANK.tests()]
+    questions_bank = BANK
+    tests = [questions_bank.test(s.test) for s in sections]
+    # Attempt numbers are taken up front, so a test that appears twice
+    # gets two layouts and the prefetch thread never reads the store
+    taken = {}
+    attempts = []
+    for test in tests:
+        if test.number not in taken:
+            taken[test.number] = attempt_number(test.number)
+        attempts.append(taken[test.number])
+        taken[test.number] += 1
+    
+    prefetch = exam.Prefetcher(lambda i: prepare_test(tests[i].number, tests[i], attempts[i]),
+                               range(len(tests)))
+    sections_iter = iter(prefetch)
+    
+    default_weights = (exam.uses_default_weights(sections)
+                       and all(POLICY.weight(t.number) is None for t in tests))
+    # A section's own weight, else the policy's for its test, else its length
+    weights = [next(w for w in (s.weight, POLICY.weight(t.number), len(t)) if w is not None)
+               for s, t in zip(sections, tests)]
+    total_weight = sum(weights)
+    
+    clear_screen()
+    print_header("EXAM")
+    screen.line(f"{Colors.CYAN}This exam has {len(tests)} sections:{Colors.END}\n")
+    for test, weight in zip(tests, weights):
+        share = f", {weight / total_weight:.0%} of the grade" if total_weight and not default_weights else ""
+        screen.line(f"  Test {test.number}: {test.name} ({len(test)} questions{share})")
+    screen.input(f"\n{Colors.YELLOW}Press Enter to begin...{Colors.END}")
+    
+    results = []
+    for i, prepared in sections_iter:
+        test = tests[i]
+        score, total = run_test(test.number, test, test.name.upper(), prepared=prepared)
+        results.append(exam.SectionResult(test.number, test.name, score, total, weights[i]))
+    
+    percentage, grade, status = exam.weighted_result(results, POLICY)
+    instrument.event("exam", tests=[r.test for r in results], percentage=percentage, grade=grade)
+    
+    # Show overall results
+    clear_screen()
+    print_header("OVERALL RESULTS - ALL TESTS" if default_weights else "OVERALL RESULTS - EXAM")
+    screen.line("")
+    for r in results:
+        weight = "" if default_weights else f"  (weight {r.weight:g})"
+        screen.line(f"{Colors.BOLD}Test {r.test} Score: {r.score:g}/{r.total} ({r.percentage:.1f}%){weight}{Colors.END}")
+    if default_weights:
+        total_score = sum(r.score for r in results)
+        total_questions = sum(r.total for r in results)
+        screen.line(f"\n{Colors.BOLD}{Colors.CYAN}TOTAL SCORE: {total_score:g}/{total_questions} ({percentage:.1f}%){Colors.END}")
+    else:
+        screen.line(f"\n{Colors.BOLD}{Colors.CYAN}WEIGHTED SCORE: {percentage:.1f}%{Colors.END}")
+    screen.line(f"{Colors.BOLD}Overall Grade: {grade}{Colors.END}")
+    
+    if status == "PASSED":
+        screen.line(f"\n{Colors.GREEN}{Colors.BOLD}🎉 OVERALL: PASSED! 🎉{Colors.END}")
+    else:
+        screen.line(f"\n{Colors.RED}{Colors.BOLD}OVERALL: NOT PASSED{Colors.END}")
+    
+    screen.input(f"\n{Colors.YELLOW}Press Enter to return to main menu...{Colors.END}")
+    return results
+
+def run_adaptive_test(test_num: int, questions: Sequence[bank.Question], test_name: str):
+    """Run a shorter test that picks each question to suit the student"""
+    import adaptive
+
+    path = calibration_path()
+    calibration = adaptive.Calibration.load(path) if path else adaptive.Calibration()
+    test = adaptive.AdaptiveTest(calibration, STUDENT_ID, test_num, len(questions), grading_policy=POLICY)
+
+    clear_screen()
+    print_header(f"ADAPTIVE TEST {test_num}: {test_name}")
+    
+    screen.line(f"{Colors.CYAN}Each question is chosen to match how you are doing.{Colors.END}")
+    screen.line(f"{Colors.CYAN}The test ends once your grade is clear, after at most {test.max_questions} questions.{Colors.END}")
+    screen.line(f"{Colors.YELLOW}\nGood luck!{Colors.END}")
+    
+    screen.input(f"\n{Colors.YELLOW}Press Enter to start the test...{Colors.END}")
+    
+    answers = []
+    while True:
+        index = test.next_question()
+        if index is None:
+            break
+        q = questions[index]
+        clear_screen()
+        print_question(len(test.asked) + 1, test.max_questions, q.question)
+        print_choices(q.choices)
         
-        show_result(is_correct, choices[q["correct"]], q["explanation"])
+        started = time.monotonic()
+        user_answer = get_user_choice(len(q.choices))
+        latency = time.monotonic() - started
+        is_correct = (user_answer - 1) == q.correct
+        
+        test.answer(index, is_correct)
+        answers.append({"question": index, "answer": user_answer,
+                        "correct": is_correct, "latency": round(latency, 3)})
+        
+        show_result(is_correct, q.answer, q.explanation)
     
+    score, total, grade, status = test.results()
+    if path:
+        calibration.save(path)
+    record_attempt(test_num, answers, score, total, mode="adaptive", asked=len(test.asked))
     show_final_results(score, total, test_name)
     
     return score, total
 
+def choose_adaptive_test():
+    """Ask which test to take adaptively, then run it"""
+    clear_screen()
+    print_header("ADAPTIVE TEST")
+    screen.line(f"  1. Test 1: Measuring Economic Performance")
+    screen.line(f"  2. Test 2: Public Sector Economics - Part 1")
+    screen.line(f"  3. Test 3: Public Sector Economics - Part 2\n")
+    choice = get_user_choice(3)
+    if choice == 1:
+        run_adaptive_test(1, TEST_1_QUESTIONS, "MEASURING ECONOMIC PERFORMANCE")
+    elif choice == 2:
+        run_adaptive_test(2, TEST_2_QUESTIONS, "PUBLIC SECTOR ECONOMICS - PART 1")
+    else:
+        run_adaptive_test(3, TEST_3_QUESTIONS, "PUBLIC SECTOR ECONOMICS - PART 2")
+
+def run_review(max_questions: int = 20):
+    """Review the questions that are due for this student"""
+    import review
+
+    directory = os.path.join(ATTEMPTS.path, "review") if ATTEMPTS is not None else None
+    schedule = review.ReviewSchedule.load(directory, STUDENT_ID)
+    fresh = review.new_questions(BANK, schedule.new_cursor)
+    introduced = 0
+    asked = 0
+    score = 0
+    
+    try:
+        while asked < max_questions:
+            item = schedule.next_due()
+            if item is None and introduced < review.NEW_PER_SESSION:
+                item = next(fresh, None)
+                if item is not None:
+                    schedule.introduce(*item)
+                    introduced += 1
+            if item is None:
+                break
+            
+            test_num, index = item
+            q = BANK.test(test_num)[index]
+            asked += 1
+            clear_screen()
+            print_header(f"REVIEW - TEST {test_num}")
+            print_question(asked, max_questions, q.question)
+            print_choices(q.choices)
+            
+            started = time.monotonic()
+            user_answer = get_user_choice(len(q.choices))
+            latency = time.monotonic() - started
+            is_correct = (user_answer - 1) == q.correct
+            if is_correct:
+                score += 1
+            schedule.answer(test_num, index, is_correct, latency)
+            
+            show_result(is_correct, q.answer, q.explanation)
+    finally:
+        schedule.save()
+    
+    clear_screen()
+    print_header("REVIEW COMPLETE")
+    if asked:
+        screen.line(f"{Colors.BOLD}Reviewed {asked} questions, {score} correct.{Colors.END}")
+    else:
+        screen.line(f"{Colors.GREEN}Nothing is due for review right now.{Colors.END}")
+    next_time = schedule.next_review_time()
+    if next_time is not None:
+        when = time.strftime("%Y-%m-%d %H:%M", time.localtime(next_time))
+        screen.line(f"{Colors.CYAN}Next review due: {when}{Colors.END}")
+    screen.input(f"\n{Colors.YELLOW}Press Enter to return to main menu...{Colors.END}")
+
+def run_custom_quiz(max_questions: int = 20):
+    """Build a quiz from a topic search and run it"""
+    import search
+
+    screen.line(f"\n{Colors.CYAN}Search by topic, e.g.  gdp cpi   or   #fiscal-policy AND NOT debt{Colors.END}")
+    query = screen.input(f"{Colors.YELLOW}Topic: {Colors.END}").strip()
+    if not query:
+        return
+    try:
+        found = search.index_for_bank(BANK).search(query, limit=max_questions)
+    except search.QueryError as e:
+        screen.line(f"{Colors.RED}Couldn't read that search: {e}{Colors.END}")
+        found = []
+    if not found:
+        screen.line(f"{Colors.RED}No questions match '{query}'{Colors.END}")
+        screen.input(f"\n{Colors.YELLOW}Press Enter to return to main menu...{Colors.END}")
+        return
+    run_test(0, [BANK.question(i) for i in found], f"CUSTOM QUIZ: {query.upper()}", record=False)
+
+def use_bank(new_bank):
+    """Switch the menu to a reloaded bank; tests already running keep the old one"""
+    global BANK, TEST_1_QUESTIONS, TEST_2_QUESTIONS, TEST_3_QUESTIONS
+    BANK.remove_listener(SCREENS.clear)
+    BANK.remove_listener(forget_templates)
+    SCREENS.clear()
+    forget_templates()
+    new_bank.add_listener(SCREENS.clear)
+    new_bank.add_listener(forget_templates)
+    BANK = new_bank
+    TEST_1_QUESTIONS = BANK.test(1)
+    TEST_2_QUESTIONS = BANK.test(2)
+    TEST_3_QUESTIONS = BANK.test(3)
+
 def main_menu():
     """Display main menu and handle user selection"""
     while True:
         clear_screen()
         print_header("ECONOMICS 1 QUIZ APPLICATION")
         
-        print(f"{Colors.CYAN}{Colors.BOLD}By Sophie Kasse{Colors.END}\n")
-        print(f"{Colors.BOLD}Select a test to begin:{Colors.END}\n")
-        print(f"  1. Test 1: Measuring Economic Performance ({len(TEST_1_QUESTIONS)} questions)")
-        print(f"  2. Test 2: Public Sector Economics - Part 1 ({len(TEST_2_QUESTIONS)} questions)")
-        print(f"  3. Test 3: Public Sector Economics - Part 2 ({len(TEST_3_QUESTIONS)} questions)")
-        print(f"  4. Take All Tests")
-        print(f"  5. Exit")
+        screen.line(f"{Colors.CYAN}{Colors.BOLD}By Sophie Kasse{Colors.END}\n")
+        screen.line(f"{Colors.BOLD}Select a test to begin:{Colors.END}\n")
+        screen.line(f"  1. Test 1: Measuring Economic Performance ({len(TEST_1_QUESTIONS)} questions)")
+        screen.line(f"  2. Test 2: Public Sector Economics - Part 1 ({len(TEST_2_QUESTIONS)} questions)")
+        screen.line(f"  3. Test 3: Public Sector Economics - Part 2 ({len(TEST_3_QUESTIONS)} questions)")
+        if EXAM_SECTIONS:
+            screen.line(f"  4. Take Exam (Tests {', '.join(str(s.test) for s in EXAM_SECTIONS)})")
+        else:
+            screen.line(f"  4. Take All Tests")
+        screen.line(f"  5. Adaptive Test (fewer questions)")
+        screen.line(f"  6. Review Due Questions")
+        screen.line(f"  7. Custom Quiz (search by topic)")
+        screen.line(f"  8. Exit")
         
-        print(f"\n{Colors.YELLOW}Passing grade: 50% or higher{Colors.END}")
-        print(f"{Colors.YELLOW}Grade breakdown: 75%+=A, 70%+=B, 60%+=C, 50%+=D{Colors.END}")
+        screen.line(f"\n{Colors.YELLOW}Passing grade: {POLICY.pass_mark:g}% or higher{Colors.END}")
+        screen.line(f"{Colors.YELLOW}Grade breakdown: {POLICY.breakdown()}{Colors.END}")
         
         try:
-            choice = input(f"\n{Colors.YELLOW}Enter your choice (1-5): {Colors.END}")
+            choice = screen.input(f"\n{Colors.YELLOW}Enter your choice (1-8): {Colors.END}")
             choice = int(choice)
             
             if choice == 1:
@@ -705,59 +637,537 @@ def main_menu():
             elif choice == 3:
                 run_test(3, TEST_3_QUESTIONS, "PUBLIC SECTOR ECONOMICS - PART 2")
             elif choice == 4:
-                total_score = 0
-                total_questions = 0
-                
-                score1, total1 = run_test(1, TEST_1_QUESTIONS, "MEASURING ECONOMIC PERFORMANCE")
-                total_score += score1
-                total_questions += total1
-                
-                score2, total2 = run_test(2, TEST_2_QUESTIONS, "PUBLIC SECTOR ECONOMICS - PART 1")
-                total_score += score2
-                total_questions += total2
+                run_exam()
                 
-                score3, total3 = run_test(3, TEST_3_QUESTIONS, "PUBLIC SECTOR ECONOMICS - PART 2")
-                total_score += score3
-                total_questions += total3
-                
-                # Show overall results
-                clear_screen()
-                print_header("OVERALL RESULTS - ALL TESTS")
-                print(f"\n{Colors.BOLD}Test 1 Score: {score1}/{total1} ({(score1/total1)*100:.1f}%){Colors.END}")
-                print(f"{Colors.BOLD}Test 2 Score: {score2}/{total2} ({(score2/total2)*100:.1f}%){Colors.END}")
-                print(f"{Colors.BOLD}Test 3 Score: {score3}/{total3} ({(score3/total3)*100:.1f}%){Colors.END}")
-                print(f"\n{Colors.BOLD}{Colors.CYAN}TOTAL SCORE: {total_score}/{total_questions} ({(total_score/total_questions)*100:.1f}%){Colors.END}")
-                
-                grade, status = calculate_grade(total_score, total_questions)
-                print(f"{Colors.BOLD}Overall Grade: {grade}{Colors.END}")
+            elif choice == 5:
+                choose_adaptive_test()
                 
-                if status == "PASSED":
-                    print(f"\n{Colors.GREEN}{Colors.BOLD}🎉 OVERALL: PASSED! 🎉{Colors.END}")
-                else:
-                    print(f"\n{Colors.RED}{Colors.BOLD}OVERALL: NOT PASSED{Colors.END}")
+            elif choice == 6:
+                run_review()
                 
-                input(f"\n{Colors.YELLOW}Press Enter to return to main menu...{Colors.END}")
+            elif choice == 7:
+                run_custom_quiz()
                 
-            elif choice == 5:
+            elif choice == 8:
                 clear_screen()
-                print(f"\n{Colors.GREEN}Thank you for using the Economics 1 Quiz Application!{Colors.END}")
-                print(f"{Colors.CYAN}Keep studying and good luck with your exams!{Colors.END}\n")
+                screen.line(f"\n{Colors.GREEN}Thank you for using the Economics 1 Quiz Application!{Colors.END}")
+                screen.line(f"{Colors.CYAN}Keep studying and good luck with your exams!{Colors.END}\n")
+                screen.present()
                 break
             else:
-                print(f"{Colors.RED}Please enter a number between 1 and 5{Colors.END}")
-                input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
+                screen.line(f"{Colors.RED}Please enter a number between 1 and 8{Colors.END}")
+                screen.input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
                 
         except ValueError:
-            print(f"{Colors.RED}Please enter a valid number{Colors.END}")
-            input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
+            screen.line(f"{Colors.RED}Please enter a valid number{Colors.END}")
+            screen.input(f"\n{Colors.YELLOW}Press Enter to continue...{Colors.END}")
         except KeyboardInterrupt:
             clear_screen()
-            print(f"\n{Colors.GREEN}Thank you for using the Economics 1 Quiz Application!{Colors.END}\n")
+            screen.line(f"\n{Colors.GREEN}Thank you for using the Economics 1 Quiz Application!{Colors.END}\n")
+            screen.present()
             break
 
-if __name__ == "__main__":
+def compile_bank_command(args):
+    """Compile question sources (or questions.py) into a bank file"""
+    if args.sources:
+        import itertools
+        import formats
+        # Streamed: each source is read as the bank is written
+        tests = itertools.chain.from_iterable(formats.read_tests(path, args.format) for path in args.sources)
+    else:
+        import questions
+        tests = questions.TESTS
+    count = bank.compile_bank(tests, args.output)
+    print(f"{Colors.GREEN}Compiled {count} questions into {args.output}{Colors.END}")
+
+def export_bank_command(args):
+    """Write a bank's questions as JSON Lines, CSV, GIFT or QTI"""
+    import formats
+
+    questions_bank = open_bank(args.bank)
+    if args.output == "-":
+        formats.write_tests(questions_bank, sys.stdout, args.format or "jsonl")
+        return
+    fmt = formats.format_for(args.output, args.format)
+    with open(args.output, "w", newline="" if fmt == "csv" else None, encoding="utf-8") as f:
+        formats.write_tests(questions_bank, f, fmt)
+    print(f"{Colors.GREEN}Exported {questions_bank.question_count} questions to {args.output}{Colors.END}")
+
+def open_bank(path=None):
+    """The bank at path, or the built-in one"""
+    if path is None:
+        return BANK
+    return bank.Bank(path)
+
+def generate_command(args):
+    """Write versions of a test with fresh numbers in its templated questions"""
+    import json
+    import templates
+
+    test = list(open_bank(args.bank).test(args.test))
+    dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+    # Questions without a template read the same in every version: encode them once
+    fixed = [None if templates.template_for(q) else dumps(q.to_dict())[1:] + "\n" for q in test]
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        for version, questions in enumerate(templates.variants(test, args.count, args.seed), 1):
+            prefix = f'{{"version":{version},"test":{args.test},'
+            out.write("".join(prefix + (line or dumps(q.to_dict())[1:] + "\n")
+                              for q, line in zip(questions, fixed)))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{Colors.GREEN}Generated {args.count} versions of test {args.test} in {elapsed:.2f}s "
+          f"({args.count / elapsed if elapsed else 0:,.0f} versions/s){Colors.END}", file=sys.stderr)
+
+def grade_command(args):
+    """Grade a file of answer sheets without any prompts"""
+    import grading
+
+    grader = grading.BatchGrader(open_bank(args.bank), POLICY)
+    fmt = args.format or ("jsonl" if args.sheets.endswith((".jsonl", ".json")) else "csv")
+    reader = grading.read_jsonl_sheets if fmt == "jsonl" else grading.read_csv_sheets
+
+    start = time.perf_counter()
+    infile = sys.stdin if args.sheets == "-" else open(args.sheets, newline="", encoding="utf-8")
+    outfile = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
     try:
-        main_menu()
+        counts = grading.write_results(grader.grade(reader(infile)), outfile)
+    except (grading.GradingError, bank.BankError, ValueError) as e:
+        # A bad sheet or an unknown test is the input's fault, not a bug
+        print(f"{Colors.RED}Can't grade {args.sheets}: {e}{Colors.END}", file=sys.stderr)
+        sys.exit(2)
+    finally:
+        if infile is not sys.stdin:
+            infile.close()
+        if outfile is not sys.stdout:
+            outfile.close()
+    elapsed = time.perf_counter() - start
+
+    rate = counts["answers"] / elapsed if elapsed else 0
+    print(f"Graded {counts['sheets']} sheets ({counts['passed']} passed) "
+          f"in {elapsed:.2f}s, {rate:,.0f} answers/s", file=sys.stderr)
+
+def serve_command(args):
+    """Run the multi-user network quiz server"""
+    import asyncio
+    import server
+
+    sources = args.watch or ([] if args.bank or bank.ARCHIVE else [bank.SOURCE_PATH])
+    try:
+        asyncio.run(server.serve(open_bank(args.bank), args.host, args.port, sources, POLICY))
+    except KeyboardInterrupt:
+        print(f"\n{Colors.GREEN}Quiz server stopped.{Colors.END}")
+
+def history_command(args):
+    """Show stored attempts for a student, or pass rates for a test"""
+    import store
+
+    with store.open_store(args.store) as attempts:
+        if args.test is not None:
+            since = time.time() - args.days * 86400 if args.days else None
+            stats = attempts.test_stats(args.test, since=since)
+            window = f" in the last {args.days:g} days" if args.days else ""
+            print(f"{Colors.BOLD}Test {args.test}{window}: {stats['attempts']} attempts, "
+                  f"{stats['passed']} passed ({stats['pass_rate'] * 100:.1f}%), "
+                  f"mean score {stats['mean_percentage']:.1f}%{Colors.END}")
+            return
+        for attempt in attempts.attempts_for_student(args.student):
+            when = time.strftime("%Y-%m-%d %H:%M", time.localtime(attempt["time"]))
+            print(f"{when}  Test {attempt['test']}: {attempt.get('marks', attempt['score']):g}/{attempt['total']} "
+                  f"{attempt['grade']} {attempt['status']}")
+
+def exit_on_hangup():
+    """End the quiz like Ctrl+C when its terminal closes, so a running test's answers are saved"""
+    if hasattr(signal, "SIGHUP") and signal.getsignal(signal.SIGHUP) == signal.SIG_DFL:
+        signal.signal(signal.SIGHUP, lambda *_: sys.exit(1))
+
+def resume_command(args):
+    """Carry on with an interrupted test"""
+    import session
+    import store
+
+    global STUDENT_ID, ATTEMPTS, SHUFFLE
+    STUDENT_ID = args.student
+    exit_on_hangup()
+    with store.open_store(args.store) as ATTEMPTS:
+        sessions = session.unfinished(ATTEMPTS.path, STUDENT_ID)
+        if args.test is not None:
+            sessions = [s for s in sessions if s.test == args.test]
+        if not sessions:
+            print(f"{Colors.YELLOW}No unfinished tests for {STUDENT_ID}{Colors.END}")
+            return
+        state = sessions[0]
+        try:
+            questions = BANK.test(state.test)
+        except bank.BankError:
+            questions = None
+        if questions is None or len(questions) != state.total:
+            print(f"{Colors.RED}Test {state.test} has changed since it was started, "
+                  f"so it can't be resumed{Colors.END}")
+            os.remove(state.path)
+            return
+        SHUFFLE = state.shuffled
+        run_test(state.test, questions, state.header["name"], resume=state)
+
+def leaderboard_command(args):
+    """Show cohort statistics and the best students for each test"""
+    import store
+
+    with store.open_store(args.store) as attempts:
+        tests = [args.test] if args.test is not None else [t.number for t in BANK.tests()]
+        for number in tests:
+            stats = attempts.cohort_stats(number)
+            print(f"{Colors.BOLD}Test {number}: {stats['attempts']} attempts, "
+                  f"{stats['pass_rate'] * 100:.1f}% passed{Colors.END}")
+            if not stats["attempts"]:
+                print()
+                continue
+            percentiles = "  ".join(f"{name}={value:.1f}%" for name, value in stats["percentiles"].items())
+            print(f"  Mean {stats['mean_percentage']:.1f}% (sd {stats['sd_percentage']:.1f})  {percentiles}")
+            print("  Grades: " + "  ".join(f"{grade} {share * 100:.1f}%" for grade, share in policy_grades(stats["grades"])))
+            for rank, entry in enumerate(attempts.leaderboard(number, args.limit), 1):
+                when = time.strftime("%Y-%m-%d", time.localtime(entry["time"]))
+                print(f"  {rank:>3}. {entry['student']:<20} {entry['score']:g}/{entry['total']} "
+                      f"({entry['percentage']:.1f}%)  {when}")
+            print()
+
+def report_command(args):
+    """Term-end grade distributions over every student in the store"""
+    import report
+
+    results = report.term_report(args.store, pick=args.pick, workers=args.workers, grading_policy=POLICY)
+    report.print_report(results)
+    if args.output:
+        import json
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+def shard_store_command(args):
+    """Copy the attempt store into a new store sharded by student"""
+    import shutil
+    import store
+
+    try:
+        count = store.reshard(args.store, args.output, args.shards)
+    except store.StoreError as e:
+        print(f"{Colors.RED}{e}{Colors.END}")
+        sys.exit(1)
+    # Calibration, review schedules and unfinished tests live beside the attempts
+    for name in ("adaptive.json", "review", "sessions"):
+        source = os.path.join(args.store, name)
+        if os.path.isdir(source):
+            shutil.copytree(source, os.path.join(args.output, name), dirs_exist_ok=True)
+        elif os.path.exists(source):
+            shutil.copy2(source, os.path.join(args.output, name))
+    print(f"{Colors.GREEN}Copied {count} attempts into {args.shards} shards at {args.output}; "
+          f"use it with --store {args.output}{Colors.END}")
+
+def calibrate_command(args):
+    """Re-estimate adaptive-test ratings from every stored attempt"""
+    import adaptive
+    import store
+
+    with store.open_store(args.store) as attempts:
+        calibration = adaptive.calibrate(attempts.scan())
+        calibration.save(os.path.join(attempts.path, "adaptive.json"))
+    print(f"{Colors.GREEN}Calibrated {len(calibration.items)} questions and "
+          f"{len(calibration.students)} students{Colors.END}")
+
+def analytics_command(args):
+    """Report item difficulty, discrimination and distractor use from stored attempts"""
+    import json
+    import analytics
+    import store
+
+    questions_bank = open_bank(args.bank)
+    with store.open_store(args.store) as attempts:
+        reports = analytics.analyse(attempts.scan(), questions_bank)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(reports, f, indent=2)
+
+    for number, report in reports.items():
+        test = questions_bank.test(number)
+        print(f"\n{Colors.HEADER}{Colors.BOLD}TEST {number}: {test.name.upper()}{Colors.END}")
+        if not report["attempts"]:
+            print("  No complete attempts yet.")
+            continue
+        alpha = "n/a" if report["alpha"] is None else f"{report['alpha']:.2f}"
+        print(f"  Attempts: {report['attempts']}   Mean score: {report['mean_score']:.1f}/{len(test)}   "
+              f"Cronbach's alpha: {alpha}")
+        for item in report["items"]:
+            d = "  n/a" if item["discrimination"] is None else f"{item['discrimination']:5.2f}"
+            rates = " ".join(f"{r * 100:3.0f}%" for r in item["choice_rates"])
+            text = test[item["question"]].question
+            print(f"  Q{item['question'] + 1:<3} p={item['p_value']:.2f} r={d}  [{rates}]  {text[:50]}")
+            for flag in item["flags"]:
+                print(f"        {Colors.YELLOW}! {flag}{Colors.END}")
+
+def search_command(args):
+    """List the questions matching a topic search"""
+    import search
+
+    questions_bank = open_bank(args.bank)
+    start = time.perf_counter()
+    index = search.index_for_bank(questions_bank)
+    try:
+        found = index.search(" ".join(args.query), limit=args.limit)
+    except search.QueryError as e:
+        print(f"{Colors.RED}Bad query: {e}{Colors.END}", file=sys.stderr)
+        sys.exit(2)
+    elapsed = time.perf_counter() - start
+
+    tests = questions_bank.tests()
+    for i in found:
+        test = next(t for t in tests if t.first <= i < t.first + t.count)
+        q = questions_bank.question(i)
+        topics = search.topic_tags(q.tags)
+        tags = f"  [{', '.join(topics)}]" if topics else ""
+        print(f"Test {test.number} Q{i - test.first + 1:<3} {q.question[:70]}{tags}")
+    print(f"{len(found)} questions in {elapsed * 1000:.1f} ms", file=sys.stderr)
+
+def simulate_command(args):
+    """Sit many synthetic students through an exam at once and report how it went"""
+    import json
+    import simulate
+
+    host, _, port = (args.connect or "").rpartition(":")
+    config = simulate.SimulationConfig(
+        students=args.students, workers=args.workers, concurrency=args.concurrency,
+        target="server" if args.connect or args.server else "engine",
+        host=host or "127.0.0.1", port=int(port or 0), bank_path=args.bank, test=args.test,
+        accuracy=args.accuracy, accuracy_sd=args.accuracy_sd,
+        think=args.think, think_mean=args.think_mean, seed=args.seed, grading_policy=POLICY)
+    report = simulate.run_simulation(config)
+    simulate.print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+def export_web_command(args):
+    """Write the static web version of the quiz"""
+    import webexport
+
+    written = webexport.export_site(open_bank(args.bank), args.output,
+                                    sync_url=args.sync_url or None, compress=not args.no_compress,
+                                    grading_policy=POLICY)
+    size = sum(os.path.getsize(path) for path in written if path.endswith((".html", ".json", ".js")))
+    print(f"{Colors.GREEN}Wrote {len(written)} files to {args.output} ({size / 1024:.1f} KiB uncompressed){Colors.END}")
+
+def collect_command(args):
+    """Receive results synced from the web version into the attempt store"""
+    import store
+    import webexport
+
+    questions_bank = open_bank(args.bank)
+    try:
+        if args.no_store:
+            webexport.collect(questions_bank, None, args.host, args.port, args.dir, POLICY)
+        else:
+            with store.open_store(args.store) as attempts:
+                webexport.collect(questions_bank, attempts, args.host, args.port, args.dir, POLICY)
+    except KeyboardInterrupt:
+        print(f"\n{Colors.GREEN}Stopped collecting results.{Colors.END}")
+
+def bundle_command(args):
+    """Pack the quiz into a single precompiled zipapp"""
+    import bundle
+
+    try:
+        size = bundle.build(args.output, args.python)
+    except ValueError as e:
+        print(f"{Colors.RED}{e}{Colors.END}")
+        sys.exit(1)
+    print(f"{Colors.GREEN}Wrote {args.output} ({size / 1024:.1f} KiB); "
+          f"run it with python3 {args.output}{Colors.END}")
+
+def main(argv=None):
+    """Run the interactive quiz, or one of the command-line tools"""
+    import argparse
+
+    global STUDENT_ID, ATTEMPTS, SHUFFLE, EXAM_SECTIONS, POLICY
+
+    parser = argparse.ArgumentParser(description="Economics 1 Quiz Application")
+    parser.add_argument("--student", default=STUDENT_ID, help="student ID to record attempts under")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="directory for the attempt store")
+    parser.add_argument("--no-store", action="store_true", help="don't record attempts")
+    parser.add_argument("--no-shuffle", action="store_true", help="ask questions and choices in bank order")
+    parser.add_argument("--no-reload", action="store_true", help="don't pick up edits to questions.py while running")
+    parser.add_argument("--policy", metavar="FILE",
+                        help=f"grading policy (default: {policy.DEFAULT_POLICY_NAME} beside the quiz, if there is one)")
+    parser.add_argument("--exam", metavar="TESTS",
+                        help="tests (and weights) for menu option 4, e.g. 1,2,3 or 1:0.5,2:0.25,3:0.25")
+    parser.add_argument("--trace", metavar="FILE", help="append timing records to FILE as JSON Lines")
+    parser.add_argument("--profile", choices=["cpu", "memory"], help="profile the run with cProfile or tracemalloc")
+    parser.add_argument("--profile-output", metavar="FILE", help="where to write the profile (default: quiz.prof or quiz.mem)")
+    commands = parser.add_subparsers(dest="command")
+
+    compile_parser = commands.add_parser("compile-bank", help="compile questions into a binary bank file")
+    compile_parser.add_argument("sources", nargs="*",
+                                help="JSON, JSON Lines, CSV, GIFT or QTI question files (default: questions.py)")
+    compile_parser.add_argument("-o", "--output", default=bank.DEFAULT_BANK_PATH, help="bank file to write")
+    compile_parser.add_argument("--format", choices=["json", "jsonl", "csv", "gift", "qti"],
+                                help="source format (default: from each file's extension)")
+    compile_parser.set_defaults(func=compile_bank_command)
+
+    export_bank_parser = commands.add_parser("export-bank", help="write questions as JSON Lines, CSV, GIFT or QTI")
+    export_bank_parser.add_argument("output", help="file to write ('-' for stdout)")
+    export_bank_parser.add_argument("--format", choices=["jsonl", "csv", "gift", "qti"],
+                                    help="output format (default: from the extension, jsonl for stdout)")
+    export_bank_parser.add_argument("--bank", help="bank file to export (default: built-in tests)")
+    export_bank_parser.set_defaults(func=export_bank_command)
+
+    generate_parser = commands.add_parser("generate", help="write versions of a test with fresh template numbers")
+    generate_parser.add_argument("test", type=int, help="test to generate versions of")
+    generate_parser.add_argument("-n", "--count", type=int, default=1, help="how many versions")
+    generate_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    generate_parser.add_argument("-o", "--output", default="-", help="JSON Lines file to write (default: stdout)")
+    generate_parser.add_argument("--bank", help="bank file to use (default: built-in tests)")
+    generate_parser.set_defaults(func=generate_command)
+
+    grade_parser = commands.add_parser("grade", help="grade answer sheets in bulk")
+    grade_parser.add_argument("sheets", help="CSV or JSON Lines answer sheets ('-' for stdin)")
+    grade_parser.add_argument("-o", "--output", default="-", help="CSV results file (default: stdout)")
+    grade_parser.add_argument("--format", choices=["csv", "jsonl"], help="sheet format (default: from extension)")
+    grade_parser.add_argument("--bank", help="bank file to grade against (default: built-in tests)")
+    grade_parser.set_defaults(func=grade_command)
+
+    serve_parser = commands.add_parser("serve", help="run quizzes for many students over TCP")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    serve_parser.add_argument("--bank", help="bank file to serve (default: built-in tests)")
+    serve_parser.add_argument("--watch", nargs="+", metavar="SOURCE",
+                              help="source files of --bank to reload when edited (default: questions.py)")
+    serve_parser.set_defaults(func=serve_command)
+
+    history_parser = commands.add_parser("history", help="show stored attempts")
+    history_parser.add_argument("--test", type=int, help="show pass rate for this test instead")
+    history_parser.add_argument("--days", type=float, help="only count the last N days (with --test)")
+    history_parser.set_defaults(func=history_command)
+
+    resume_parser = commands.add_parser("resume", help="carry on with an interrupted test")
+    resume_parser.add_argument("--test", type=int, help="which test (default: the last one interrupted)")
+    resume_parser.set_defaults(func=resume_command)
+
+    leaderboard_parser = commands.add_parser("leaderboard", help="cohort statistics and top students per test")
+    leaderboard_parser.add_argument("--test", type=int, help="only this test (default: every test)")
+    leaderboard_parser.add_argument("-n", "--limit", type=int, default=10,
+                                    help="students to list per test (at most 20)")
+    leaderboard_parser.set_defaults(func=leaderboard_command)
+
+    report_parser = commands.add_parser("report", help="term-end grade distributions for every student")
+    report_parser.add_argument("--pick", choices=["best", "latest"], default="best",
+                               help="which attempt at each test counts (default: best)")
+    report_parser.add_argument("--workers", type=int, default=0, help="processes to use (default: one per core)")
+    report_parser.add_argument("-o", "--output", help="also write the report as JSON")
+    report_parser.set_defaults(func=report_command)
+
+    shard_parser = commands.add_parser("shard-store", help="copy the attempt store into a store sharded by student")
+    shard_parser.add_argument("output", help="directory for the sharded store")
+    shard_parser.add_argument("--shards", type=int, default=32, help="number of shards (default: 32)")
+    shard_parser.set_defaults(func=shard_store_command)
+
+    calibrate_parser = commands.add_parser("calibrate", help="estimate question difficulties from stored attempts")
+    calibrate_parser.set_defaults(func=calibrate_command)
+
+    analytics_parser = commands.add_parser("analytics", help="item statistics from stored attempts")
+    analytics_parser.add_argument("-o", "--output", help="also write the full report as JSON")
+    analytics_parser.add_argument("--bank", help="bank the attempts were taken on (default: built-in tests)")
+    analytics_parser.set_defaults(func=analytics_command)
+
+    search_parser = commands.add_parser("search", help="find questions by topic or keyword")
+    search_parser.add_argument("query", nargs="+", help="words, #tags, or a boolean AND/OR/NOT query")
+    search_parser.add_argument("-n", "--limit", type=int, default=20, help="most results to show (0 for all)")
+    search_parser.add_argument("--bank", help="bank file to search (default: built-in tests)")
+    search_parser.set_defaults(func=search_command)
+
+    simulate_parser = commands.add_parser("simulate", help="load-test the quiz with synthetic students")
+    simulate_parser.add_argument("-n", "--students", type=int, default=1000, help="how many students sit the exam")
+    simulate_parser.add_argument("--workers", type=int, default=0, help="processes to use (default: one per core)")
+    simulate_parser.add_argument("--concurrency", type=int, default=200, help="students in flight per process")
+    simulate_parser.add_argument("--server", action="store_true", help="go through a local quiz server over TCP")
+    simulate_parser.add_argument("--connect", metavar="HOST:PORT", help="go through a running quiz server")
+    simulate_parser.add_argument("--test", type=int, help="test to sit (default: a random test per student)")
+    simulate_parser.add_argument("--accuracy", type=float, default=0.7, help="mean chance of a right answer")
+    simulate_parser.add_argument("--accuracy-sd", type=float, default=0.15, help="spread of accuracy between students")
+    simulate_parser.add_argument("--think", choices=["none", "fixed", "exponential", "lognormal"], default="none",
+                                 help="think time distribution between answers")
+    simulate_parser.add_argument("--think-mean", type=float, default=0.0, help="mean think time in seconds")
+    simulate_parser.add_argument("--seed", type=int, default=0, help="random seed")
+    simulate_parser.add_argument("--bank", help="bank file to use (default: built-in tests)")
+    simulate_parser.add_argument("-o", "--output", help="also write the report as JSON")
+    simulate_parser.set_defaults(func=simulate_command)
+
+    export_parser = commands.add_parser("export-web", help="write a static web version of the quiz")
+    export_parser.add_argument("output", nargs="?", default="web", help="directory to write (default: web)")
+    export_parser.add_argument("--sync-url", default="sync",
+                               help="where the page posts results (default: 'sync' beside the page; '' for none)")
+    export_parser.add_argument("--no-compress", action="store_true", help="don't write .gz/.br copies")
+    export_parser.add_argument("--bank", help="bank file to export (default: built-in tests)")
+    export_parser.set_defaults(func=export_web_command)
+
+    collect_parser = commands.add_parser("collect", help="receive results from the web version")
+    collect_parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    collect_parser.add_argument("--port", type=int, default=8080, help="port to listen on")
+    collect_parser.add_argument("--dir", help="also serve the exported files from this directory")
+    collect_parser.add_argument("--bank", help="bank the web version was exported from (default: built-in tests)")
+    collect_parser.set_defaults(func=collect_command)
+
+    bundle_parser = commands.add_parser("bundle", help="pack the quiz into one precompiled .pyz file")
+    bundle_parser.add_argument("output", nargs="?", default="quiz.pyz", help="archive to write (default: quiz.pyz)")
+    bundle_parser.add_argument("--python", default="/usr/bin/env python3",
+                               help="interpreter for the archive's #! line")
+    bundle_parser.set_defaults(func=bundle_command)
+
+    args = parser.parse_args(argv)
+    try:
+        POLICY = policy.GradingPolicy.load(args.policy) if args.policy else policy.default()
+    except (OSError, policy.PolicyError) as e:
+        parser.error(f"grading policy: {e}")
+    profiler = contextlib.nullcontext()
+    if args.profile:
+        default_output = "quiz.prof" if args.profile == "cpu" else "quiz.mem"
+        profiler = instrument.Profiler(args.profile, args.profile_output or default_output)
+
+    with profiler, instrument.tracing(args.trace):
+        if args.command is None:
+            STUDENT_ID = args.student
+            if args.exam:
+                import exam
+                try:
+                    EXAM_SECTIONS = exam.parse_sections(args.exam)
+                    for section in EXAM_SECTIONS:
+                        BANK.test(section.test)
+                except (ValueError, bank.BankError) as e:
+                    parser.error(f"--exam: {e}")
+            SHUFFLE = not args.no_shuffle
+            exit_on_hangup()
+            # A zipapp's questions can't be edited in place
+            if not args.no_reload and bank.ARCHIVE is None:
+                import hotreload
+                hotreload.BankWatcher(BANK, [bank.SOURCE_PATH], on_swap=use_bank).start()
+            if args.no_store:
+                main_menu()
+            else:
+                import store
+                with store.open_store(args.store) as ATTEMPTS:
+                    main_menu()
+        else:
+            args.func(args)
+
+def run():
+    """Entry point for the script and the zipapp"""
+    try:
+        main()
     except Exception as e:
-        print(f"\n{Colors.RED}An error occurred: {e}{Colors.END}")
-        print(f"{Colors.YELLOW}Please report this issue.{Colors.END}\n")
+        screen.line(f"\n{Colors.RED}An error occurred: {e}{Colors.END}")
+        screen.line(f"{Colors.YELLOW}Please report this issue.{Colors.END}\n")
+        screen.present()
+        sys.exit(1)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,230 @@
+"""
+Economics 1 Quiz Application - screen rendering
+Every screen is built up in a buffer and written to the terminal in one
+go when the quiz waits for input. AnsiRenderer redraws with real ANSI
+cursor sequences and only rewrites the rows that changed since the last
+frame; PlainRenderer streams uncoloured text for pipes and dumb terminals.
+ScreenCache keeps rendered fragments that many screens share.
+"""
+
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, TextIO, Tuple
+
+# Color codes for terminal output - the default theme
+class Colors:
+    HEADER = '\033[95m'
+    BLUE = '\033[94m'
+    CYAN = '\033[96m'
+    GREEN = '\033[92m'
+    YELLOW = '\033[93m'
+    RED = '\033[91m'
+    BOLD = '\033[1m'
+    UNDERLINE = '\033[4m'
+    END = '\033[0m'
+
+# Theme for output that should carry no escape codes at all
+class PlainColors:
+    HEADER = ''
+    BLUE = ''
+    CYAN = ''
+    GREEN = ''
+    YELLOW = ''
+    RED = ''
+    BOLD = ''
+    UNDERLINE = ''
+    END = ''
+
+CURSOR_HOME = "\033[H"
+CLEAR_TO_END = "\033[J"
+_SGR = re.compile(r"\033\[[0-9;]*m")
+
+
+def visible_width(line: str) -> int:
+    """Length of a line as shown, ignoring colour codes"""
+    return len(_SGR.sub("", line))
+
+
+class Renderer:
+    """Collects a screen in a buffer and writes it with a single call"""
+
+    theme = PlainColors
+
+    def __init__(self, out: Optional[TextIO] = None):
+        self.out = out if out is not None else sys.stdout
+        self._frame = ""
+
+    def clear(self):
+        """Start a new screen"""
+        self._frame = ""
+
+    def write(self, text: str):
+        """Add text to the current screen"""
+        self._frame += text
+
+    def line(self, text: str = ""):
+        """Add a line to the current screen, like print()"""
+        self._frame += text + "\n"
+
+    def present(self):
+        """Send the current screen to the terminal"""
+        data = self._render()
+        if data:
+            self.out.write(data)
+            self.out.flush()
+
+    def input(self, prompt: str = "") -> str:
+        """Show the screen with a prompt at the bottom and read a line"""
+        self.write(prompt)
+        self.present()
+        answer = input()
+        # The terminal echoed the answer and a newline; keep the model in step
+        self._echoed(answer + "\n")
+        return answer
+
+    def _render(self) -> str:
+        raise NotImplementedError
+
+    def _echoed(self, text: str):
+        raise NotImplementedError
+
+
+class PlainRenderer(Renderer):
+    """Uncoloured output for pipes: screens are appended, never redrawn"""
+
+    theme = PlainColors
+
+    def __init__(self, out: Optional[TextIO] = None):
+        super().__init__(out)
+        self._sent = 0
+
+    def clear(self):
+        self._frame = "\n" if self._sent else ""
+        self._sent = 0
+
+    def _render(self) -> str:
+        data = _SGR.sub("", self._frame[self._sent:])
+        self._sent = len(self._frame)
+        return data
+
+    def _echoed(self, text: str):
+        self._frame += text
+        self._sent = len(self._frame)
+
+
+class AnsiRenderer(Renderer):
+    """Full-screen colour output that redraws only the rows that changed"""
+
+    theme = Colors
+
+    def __init__(self, out: Optional[TextIO] = None):
+        super().__init__(out)
+        self._shown: Optional[List[str]] = None
+
+    def _fits(self, lines: List[str]) -> bool:
+        size = shutil.get_terminal_size()
+        return len(lines) < size.lines and all(visible_width(l) < size.columns for l in lines)
+
+    def _render(self) -> str:
+        new = self._frame.split("\n")
+        old = self._shown
+        self._shown = new
+
+        if old is None or not (self._fits(old) and self._fits(new)):
+            return CURSOR_HOME + CLEAR_TO_END + self._frame
+
+        row = 0
+        limit = min(len(old), len(new))
+        while row < limit and old[row] == new[row]:
+            row += 1
+        if row == len(old) == len(new):
+            return ""
+
+        cursor_row = len(old) - 1
+        if row == cursor_row and new[row].startswith(old[row]):
+            # Only text after the cursor changed: carry on writing from there
+            return "\n".join([new[row][len(old[row]):]] + new[row + 1:])
+        return f"\033[{row + 1};1H" + CLEAR_TO_END + "\n".join(new[row:])
+
+    def _echoed(self, text: str):
+        self._frame += text
+        self._shown = self._frame.split("\n")
+
+
+class ScreenCache:
+    """Rendered screen fragments by key, with LRU eviction and an optional TTL
+
+    Values are whatever the caller renders - text for the terminal, encoded
+    bytes for the server - and are limited both by count and by their total
+    size in memory. Keys should say everything the fragment depends on,
+    such as the question, the choice order and the theme.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 8 << 20, ttl: Optional[float] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int, float]]" = OrderedDict()
+        # Hot reload clears the cache from its own thread
+        self._lock = threading.Lock()
+        # Bumped by clear(), so a fragment built before a clear isn't stored after it
+        self._generation = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """The cached fragment for key, rendering it with build() on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (self.ttl is None or time.monotonic() - entry[2] < self.ttl):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            generation = self._generation
+        value = build()
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            if generation != self._generation:
+                return value
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size, time.monotonic())
+            self.bytes += size
+            while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+        return value
+
+    def clear(self, *_):
+        """Forget everything, e.g. after the question bank changed"""
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+            self._generation += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "bytes": self.bytes, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+
+
+def make_renderer(out: Optional[TextIO] = None) -> Renderer:
+    """A colour renderer for terminals, or a plain one for pipes and NO_COLOR"""
+    out = out if out is not None else sys.stdout
+    if out.isatty() and "NO_COLOR" not in os.environ and os.environ.get("TERM") != "dumb":
+        return AnsiRenderer(out)
+    return PlainRenderer(out)
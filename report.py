@@ -0,0 +1,178 @@
+"""
+Economics 1 Quiz Application - term reports
+Per-test and overall grade distributions over every student in an
+attempt store, for term-end reporting across a whole faculty.
+
+Each student counts once per test, with their best (or latest) full
+attempt; adaptive attempts are left out. Their overall result adds up
+those marks across the tests they took, as "Take All Tests" does, and
+every grade comes from the grading policy (see policy.py), which is
+handed to each worker along with its shard.
+
+The report is a map-reduce over the store's shards (see
+store.ShardedStore): a worker process reads one shard's log, works out
+every student in it - a student's attempts never span shards - and
+returns a fixed-size partial of counts, sums and a percentile sketch per
+test. Counts and percentiles merge exactly (means up to float rounding),
+so the result doesn't depend on how many workers ran, and merging costs
+nothing next to reading. An unsharded store is a single shard.
+"""
+
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Dict, Optional, Tuple
+
+import cohort
+import policy
+import store
+
+PICKS = ("best", "latest")
+
+
+class Distribution:
+    """Grades, pass count and percentage spread of one result per student"""
+
+    __slots__ = ("students", "passed", "total_percentage", "grades", "sketch")
+
+    def __init__(self):
+        self.students = 0
+        self.passed = 0
+        self.total_percentage = 0.0
+        self.grades: Counter = Counter()
+        self.sketch = cohort.QuantileSketch()
+
+    def add(self, marks: float, total: int, grading_policy: policy.GradingPolicy):
+        grade, status, _ = grading_policy.result(marks, total)
+        value = marks / total * 100
+        self.students += 1
+        self.passed += status == "PASSED"
+        self.total_percentage += value
+        self.grades[grade] += 1
+        self.sketch.add(value)
+
+    def merge(self, other: "Distribution"):
+        self.students += other.students
+        self.passed += other.passed
+        self.total_percentage += other.total_percentage
+        self.grades.update(other.grades)
+        self.sketch.merge(other.sketch)
+
+    def to_dict(self, grade_names=cohort.GRADES) -> Dict:
+        n = self.students
+        return {
+            "students": n,
+            "passed": self.passed,
+            "pass_rate": self.passed / n if n else 0.0,
+            "mean_percentage": self.total_percentage / n if n else 0.0,
+            "percentiles": {f"p{q}": self.sketch.quantile(q / 100) for q in (10, 25, 50, 75, 90)},
+            "grades": {grade: self.grades[grade] for grade in cohort.grade_names(self.grades, grade_names)},
+        }
+
+
+class Partial:
+    """A report over some of the students: per test, and overall"""
+
+    __slots__ = ("tests", "overall", "attempts")
+
+    def __init__(self):
+        self.tests: Dict[int, Distribution] = {}
+        self.overall = Distribution()
+        self.attempts = 0
+
+    def merge(self, other: "Partial"):
+        for test, distribution in other.tests.items():
+            mine = self.tests.get(test)
+            if mine is None:
+                mine = self.tests[test] = Distribution()
+            mine.merge(distribution)
+        self.overall.merge(other.overall)
+        self.attempts += other.attempts
+
+
+def summarize_shard(path: str, pick: str = "best",
+                    grading_policy: Optional[policy.GradingPolicy] = None) -> Partial:
+    """The partial report for the students whose attempts are in one shard (the map step)"""
+    if pick not in PICKS:
+        raise ValueError(f"unknown pick {pick!r}")
+    grading_policy = grading_policy or policy.default()
+    latest = pick == "latest"
+    # (student, test) -> (marks, total, time) of the attempt that counts
+    chosen: Dict[Tuple[str, int], Tuple[int, int, float]] = {}
+    partial = Partial()
+    for attempt in store.read_log(path):
+        if not cohort.counts_toward_cohort(attempt) or not attempt["total"]:
+            continue
+        partial.attempts += 1
+        key = (attempt["student"], attempt["test"])
+        score, total, when = cohort.marks(attempt), attempt["total"], attempt["time"]
+        current = chosen.get(key)
+        if (current is None
+                or (when > current[2] if latest else score * current[1] > current[0] * total)):
+            chosen[key] = (score, total, when)
+
+    # student -> (marks, total) over every test they took
+    combined: Dict[str, Tuple[float, int]] = {}
+    tests = partial.tests
+    for (student, test), (score, total, _) in chosen.items():
+        distribution = tests.get(test)
+        if distribution is None:
+            distribution = tests[test] = Distribution()
+        distribution.add(score, total, grading_policy)
+        so_far = combined.get(student, (0, 0))
+        combined[student] = (so_far[0] + score, so_far[1] + total)
+    for score, total in combined.values():
+        partial.overall.add(score, total, grading_policy)
+    return partial
+
+
+def term_report(path: str, pick: str = "best", workers: Optional[int] = None,
+                grading_policy: Optional[policy.GradingPolicy] = None) -> Dict:
+    """Summarize every shard of the store at path on a process pool and merge the partials"""
+    grading_policy = grading_policy or policy.default()
+    shards = store.shard_paths(path)
+    shards = [shard for shard in shards if os.path.exists(os.path.join(shard, store.LOG_NAME))]
+    workers = max(1, min(workers or os.cpu_count() or 1, len(shards)))
+    started = time.perf_counter()
+    if workers == 1:
+        merged = _merge(map(summarize_shard, shards, repeat(pick), repeat(grading_policy)))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            merged = _merge(pool.map(summarize_shard, shards, repeat(pick), repeat(grading_policy)))
+    elapsed = time.perf_counter() - started
+    names = grading_policy.grade_names()
+    return {
+        "pick": pick,
+        "policy": grading_policy.name,
+        "shards": len(shards),
+        "workers": workers,
+        "attempts": merged.attempts,
+        "elapsed_s": elapsed,
+        "tests": {str(test): merged.tests[test].to_dict(names) for test in sorted(merged.tests)},
+        "overall": merged.overall.to_dict(names),
+    }
+
+
+def _merge(partials) -> Partial:
+    """The reduce step"""
+    merged = Partial()
+    for partial in partials:
+        merged.merge(partial)
+    return merged
+
+
+def print_report(report: Dict):
+    print(f"Term report: {report['overall']['students']} students, {report['attempts']} attempts "
+          f"({report['pick']} attempt per test), {report['shards']} shard{'s' if report['shards'] != 1 else ''} "
+          f"on {report['workers']} worker{'s' if report['workers'] != 1 else ''} in {report['elapsed_s']:.2f}s")
+    print(f"{'':>8} {'Students':>9} {'Mean':>7} {'Median':>7} {'Pass':>6}  "
+          + "  ".join(f"{grade:>6}" for grade in report["overall"]["grades"]))
+    rows = [(f"Test {test}", stats) for test, stats in report["tests"].items()]
+    rows.append(("Overall", report["overall"]))
+    for label, stats in rows:
+        n = stats["students"] or 1
+        print(f"{label:>8} {stats['students']:>9} {stats['mean_percentage']:6.1f}% "
+              f"{stats['percentiles']['p50']:6.1f}% {stats['pass_rate'] * 100:5.1f}%  "
+              + "  ".join(f"{stats['grades'].get(grade, 0) / n * 100:5.1f}%" for grade in report["overall"]["grades"]))
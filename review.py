@@ -0,0 +1,144 @@
+"""
+Economics 1 Quiz Application - spaced-repetition review
+Schedules each question for each student with the SM-2 algorithm: answers
+that come easily are pushed further into the future, missed ones come back
+soon. Due questions sit in a heap keyed on due time, so finding the next
+one is O(log n) however many questions a student has seen.
+
+Each student's schedule is its own small JSON file, read only when that
+student starts a review. Questions never seen before are introduced a few
+at a time in bank order, so the bank is never walked up front.
+"""
+
+import hashlib
+import heapq
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+DAY = 86400.0
+# A missed question comes back this soon, within the same sitting
+RELEARN_DELAY = 600.0
+# Fast correct answers count as "easy"
+EASY_SECONDS = 10.0
+NEW_PER_SESSION = 10
+START_EASE = 2.5
+MIN_EASE = 1.3
+
+
+def sm2(quality: int, interval: float, ease: float, repetitions: int) -> Tuple[float, float, int]:
+    """Next (interval in days, ease, repetitions) after an answer of quality 0-5"""
+    if quality < 3:
+        return 0.0, max(MIN_EASE, ease - 0.2), 0
+    repetitions += 1
+    if repetitions == 1:
+        interval = 1.0
+    elif repetitions == 2:
+        interval = 6.0
+    else:
+        interval = interval * ease
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+    return interval, ease, repetitions
+
+
+def answer_quality(correct: bool, latency: float) -> int:
+    """SM-2 quality for a multiple-choice answer"""
+    if not correct:
+        return 1
+    return 5 if latency < EASY_SECONDS else 4
+
+
+class ReviewSchedule:
+    """One student's due dates, with a heap for the next due question"""
+
+    def __init__(self, student: str, path: Optional[str] = None):
+        self.student = student
+        self.path = path
+        # "test:index" -> [due, interval, ease, repetitions]
+        self.cards: Dict[str, List[float]] = {}
+        # How far through the bank new questions have been introduced
+        self.new_cursor = 0
+        self._heap: List[Tuple[float, str]] = []
+
+    @classmethod
+    def load(cls, directory: Optional[str], student: str) -> "ReviewSchedule":
+        """Read a student's schedule, or start an empty one"""
+        if directory is None:
+            return cls(student)
+        digest = hashlib.sha1(student.encode("utf-8")).hexdigest()[:16]
+        schedule = cls(student, os.path.join(directory, f"{digest}.json"))
+        try:
+            with open(schedule.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return schedule
+        schedule.cards = data["cards"]
+        schedule.new_cursor = data["new_cursor"]
+        schedule._heap = [(card[0], key) for key, card in schedule.cards.items()]
+        heapq.heapify(schedule._heap)
+        return schedule
+
+    def save(self):
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"student": self.student, "cards": self.cards, "new_cursor": self.new_cursor}, f)
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def key(test_num: int, index: int) -> str:
+        return f"{test_num}:{index}"
+
+    def next_due(self, now: Optional[float] = None) -> Optional[Tuple[int, int]]:
+        """(test, index) of the most overdue question, or None if nothing is due"""
+        now = time.time() if now is None else now
+        heap = self._heap
+        while heap:
+            due, key = heap[0]
+            if self.cards[key][0] != due:
+                heapq.heappop(heap)  # superseded by a later answer
+                continue
+            if due > now:
+                return None
+            test_num, index = key.split(":")
+            return int(test_num), int(index)
+        return None
+
+    def next_review_time(self) -> Optional[float]:
+        """When the next question falls due"""
+        self.next_due(float("-inf"))
+        return self._heap[0][0] if self._heap else None
+
+    def introduce(self, test_num: int, index: int, now: Optional[float] = None):
+        """Start scheduling a question the student has not seen"""
+        self.new_cursor += 1
+        key = self.key(test_num, index)
+        if key not in self.cards:
+            now = time.time() if now is None else now
+            self.cards[key] = [now, 0.0, START_EASE, 0]
+            heapq.heappush(self._heap, (now, key))
+
+    def answer(self, test_num: int, index: int, correct: bool, latency: float,
+               now: Optional[float] = None):
+        """Reschedule a question after the student answers it"""
+        now = time.time() if now is None else now
+        key = self.key(test_num, index)
+        card = self.cards.setdefault(key, [now, 0.0, START_EASE, 0])
+        interval, ease, repetitions = sm2(answer_quality(correct, latency), card[1], card[2], int(card[3]))
+        due = now + (interval * DAY if interval else RELEARN_DELAY)
+        self.cards[key] = [due, interval, ease, repetitions]
+        heapq.heappush(self._heap, (due, key))
+
+
+def new_questions(questions_bank, start: int):
+    """(test, index) of every question from a bank-wide position onwards"""
+    for test in questions_bank.tests():
+        if start >= len(test):
+            start -= len(test)
+            continue
+        for index in range(start, len(test)):
+            yield test.number, index
+        start = 0
@@ -0,0 +1,406 @@
+"""
+Economics 1 Quiz Application - question search
+An inverted index over every question's text, choices, explanation and
+tags, used to put together a quiz on a topic instead of a fixed test.
+
+Queries are either plain words, ranked by relevance:
+    gdp cpi
+    everything about fiscal policy
+or boolean, using AND / OR / NOT (upper case) and parentheses:
+    gdp OR cpi
+    (budget OR debt) AND NOT #south-africa
+#tag matches a question's tag exactly. Results are always ranked with
+BM25, so the best matches come first either way.
+
+The index is built once per bank and cached beside it; a query only
+touches the posting lists of its own terms, and a live edit to a question
+only re-indexes that question.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+import struct
+import sys
+import weakref
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from templates import TAG_PREFIX
+
+# Token weights by field: a match in the question counts for more than one
+# in an explanation
+FIELD_WEIGHTS = (("question", 2), ("choices", 1), ("explanation", 1))
+TAG_WEIGHT = 3
+# Tags that say how a question works rather than what it is about; not indexed
+STRUCTURAL_TAGS = (TAG_PREFIX,)
+# Bumped when indexing changes, so cached indexes are rebuilt
+INDEX_VERSION = 3
+
+# Cache file: magic, JSON header length, then the header (stamp and
+# [term, posting count] pairs) and little-endian uint32 arrays - question
+# lengths, then each term's ids and counts. Nothing in it is executed.
+_INDEX_MAGIC = b"QIDX"
+_INDEX_HEAD = struct.Struct("<4sI")
+
+STOP_WORDS = frozenset("""
+a about all an and are as at be by everything for from has in into is it its
+items of on or questions that the their this to was what which with
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUERY_TOKEN = re.compile(r"\(|\)|#[\w-]+|[A-Za-z0-9]+")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def stem(word: str) -> str:
+    """A light English stemmer: plurals, -ing/-ed and a final e"""
+    if len(word) <= 3 or word.isdigit():
+        return word
+    if word.endswith("sses"):
+        word = word[:-2]
+    elif word.endswith("ies") and len(word) > 4:
+        word = word[:-3] + "y"
+    elif word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        word = word[:-1]
+    if word.endswith("ing") and len(word) > 5:
+        word = word[:-3]
+    elif word.endswith("ed") and len(word) > 4:
+        word = word[:-2]
+    if word.endswith("e") and len(word) > 3:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Stemmed words of text, without stop words"""
+    return [stem(w) for w in _WORD.findall(text.lower()) if w not in STOP_WORDS]
+
+
+def topic_tags(tags: Iterable[str]) -> List[str]:
+    """The tags that say what a question is about, without the structural ones"""
+    return [tag for tag in tags if not tag.startswith(STRUCTURAL_TAGS)]
+
+
+def question_terms(q) -> Dict[str, int]:
+    """Weighted term counts for one bank.Question"""
+    counts: Dict[str, int] = {}
+    for field, weight in FIELD_WEIGHTS:
+        value = getattr(q, field)
+        text = " ".join(value) if isinstance(value, tuple) else value
+        for term in tokenize(text):
+            counts[term] = counts.get(term, 0) + weight
+    for tag in topic_tags(q.tags):
+        tag_term = "#" + tag.lower()
+        counts[tag_term] = counts.get(tag_term, 0) + 1
+        for term in tokenize(tag.replace("-", " ")):
+            counts[term] = counts.get(term, 0) + TAG_WEIGHT
+    return counts
+
+
+class QueryError(Exception):
+    """Raised for a query that cannot be parsed"""
+
+
+class QuestionIndex:
+    """Term -> (question ids, weighted counts), over bank-wide question ids"""
+
+    def __init__(self):
+        self.postings: Dict[str, Tuple[array, array]] = {}
+        self.lengths = array("I")
+        self._norm_cache: Optional[array] = None
+
+    @property
+    def doc_count(self) -> int:
+        return len(self.lengths)
+
+    def add(self, doc_id: int, q):
+        """Index a question; ids must be added in increasing order"""
+        terms = question_terms(q)
+        self._norm_cache = None
+        while len(self.lengths) <= doc_id:
+            self.lengths.append(0)
+        self.lengths[doc_id] = sum(terms.values())
+        for term, count in terms.items():
+            ids, counts = self.postings.setdefault(term, (array("I"), array("I")))
+            ids.append(doc_id)
+            counts.append(count)
+
+    def update(self, doc_id: int, old, new):
+        """Re-index one edited question, touching only the terms that changed
+
+        Posting lists are replaced rather than edited, so a search running
+        at the same time sees either the old or the new list.
+        """
+        old_terms = question_terms(old)
+        new_terms = question_terms(new)
+        for term in old_terms.keys() | new_terms.keys():
+            count = new_terms.get(term)
+            if count == old_terms.get(term):
+                continue
+            ids, counts = self.postings.get(term, (array("I"), array("I")))
+            ids, counts = array("I", ids), array("I", counts)
+            pos = bisect_left(ids, doc_id)
+            present = pos < len(ids) and ids[pos] == doc_id
+            if count is None:
+                del ids[pos], counts[pos]
+            elif present:
+                counts[pos] = count
+            else:
+                ids.insert(pos, doc_id)
+                counts.insert(pos, count)
+            if ids:
+                self.postings[term] = (ids, counts)
+            else:
+                self.postings.pop(term, None)
+        self.lengths[doc_id] = sum(new_terms.values())
+        self._norm_cache = None
+
+    @classmethod
+    def build(cls, questions: Iterable[Tuple[int, object]]) -> "QuestionIndex":
+        index = cls()
+        for doc_id, q in questions:
+            index.add(doc_id, q)
+        return index
+
+    # Persistence
+
+    def save(self, path: str, stamp: Tuple):
+        header = json.dumps({"stamp": list(stamp), "docs": len(self.lengths),
+                             "terms": [[term, len(ids)] for term, (ids, _) in self.postings.items()]},
+                            separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_INDEX_HEAD.pack(_INDEX_MAGIC, len(header)))
+            f.write(header)
+            f.write(_le_bytes(self.lengths))
+            for ids, counts in self.postings.values():
+                f.write(_le_bytes(ids))
+                f.write(_le_bytes(counts))
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str, stamp: Tuple) -> Optional["QuestionIndex"]:
+        """The cached index at path, or None if it is missing, out of date or damaged"""
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+        try:
+            magic, header_len = _INDEX_HEAD.unpack_from(data)
+            if magic != _INDEX_MAGIC:
+                return None
+            start = _INDEX_HEAD.size + header_len
+            header = json.loads(data[_INDEX_HEAD.size:start])
+            if header["stamp"] != list(stamp):
+                return None
+            doc_count = int(header["docs"])
+            terms = [(str(term), int(n)) for term, n in header["terms"]]
+            words = array("I")
+            words.frombytes(data[start:])
+        except (struct.error, ValueError, KeyError, TypeError):
+            return None
+        if any(n < 0 for _, n in terms) or len(words) != doc_count + 2 * sum(n for _, n in terms):
+            return None
+        if sys.byteorder == "big":
+            words.byteswap()
+        index = cls()
+        index.lengths = words[:doc_count]
+        pos = doc_count
+        for term, n in terms:
+            index.postings[term] = (words[pos:pos + n], words[pos + n:pos + 2 * n])
+            pos += 2 * n
+        if any(ids and ids[-1] >= doc_count for ids, _ in index.postings.values()):
+            return None
+        return index
+
+    # Querying
+
+    def _matches(self, term: str) -> Set[int]:
+        entry = self.postings.get(term)
+        return set(entry[0]) if entry else set()
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """Question ids matching query, best first"""
+        tokens = _QUERY_TOKEN.findall(query)
+        if not tokens:
+            return []
+        boolean = any(t in ("AND", "OR", "NOT", "(", ")") for t in tokens)
+        if boolean:
+            parser = _BooleanParser(self, tokens)
+            matched = parser.parse()
+            terms = parser.positive_terms
+        else:
+            terms = [t.lower() if t.startswith("#") else stem(t.lower()) for t in tokens
+                     if t.lower() not in STOP_WORDS]
+            matched = None
+
+        scores = self._rank(terms, matched, limit)
+        if limit:
+            ranked = heapq.nsmallest(limit, scores, key=lambda d: (-scores[d], d))
+        else:
+            ranked = sorted(scores, key=lambda d: (-scores[d], d))
+        if boolean and (not limit or len(ranked) < limit):
+            # Matches that share no scoring term (e.g. pure NOT queries) go last
+            ranked += sorted(matched.difference(scores))
+        return ranked[:limit] if limit else ranked
+
+    def _norms(self) -> array:
+        """Per-question BM25 length normalisation, cached until the index changes"""
+        if self._norm_cache is None:
+            n = self.doc_count
+            avg_len = (sum(self.lengths) / n if n else 0) or 1
+            self._norm_cache = array("d", (K1 * (1 - B + B * length / avg_len) for length in self.lengths))
+        return self._norm_cache
+
+    def _rank(self, terms: List[str], matched: Optional[Set[int]],
+              limit: Optional[int]) -> Dict[int, float]:
+        """BM25 scores, skipping work that cannot change the top limit results
+
+        Terms are scored rarest first. Once the limit-th best score beats
+        everything the remaining terms could add, those terms only top up
+        questions that are already candidates (MaxScore pruning).
+        """
+        n = self.doc_count
+        entries = []
+        for term in set(terms):
+            entry = self.postings.get(term)
+            if entry:
+                df = len(entry[0])
+                idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+                entries.append((idf * (K1 + 1), entry))
+        entries.sort(key=lambda e: -e[0])
+        remaining = [0.0] * (len(entries) + 1)
+        for j in range(len(entries) - 1, -1, -1):
+            remaining[j] = remaining[j + 1] + entries[j][0]
+
+        norms = self._norms()
+        scores: Dict[int, float] = {}
+        for j, (weight, (ids, counts)) in enumerate(entries):
+            candidates = None
+            if limit and len(scores) >= limit and heapq.nlargest(limit, scores.values())[-1] > remaining[j]:
+                candidates = scores
+            elif matched is not None and len(matched) * 8 < len(ids):
+                candidates = matched
+
+            if candidates is None:
+                get = scores.get
+                for doc_id, tf in zip(ids, counts):
+                    if matched is None or doc_id in matched:
+                        scores[doc_id] = get(doc_id, 0.0) + weight * tf / (tf + norms[doc_id])
+            else:
+                # Few candidates: look each one up in the sorted posting list
+                for doc_id in list(candidates):
+                    pos = bisect_left(ids, doc_id)
+                    if pos < len(ids) and ids[pos] == doc_id:
+                        tf = counts[pos]
+                        scores[doc_id] = scores.get(doc_id, 0.0) + weight * tf / (tf + norms[doc_id])
+        return scores
+
+
+class _BooleanParser:
+    """expr := and (OR and)* ; and := not (AND? not)* ; not := NOT not | ( expr ) | term"""
+
+    def __init__(self, index: QuestionIndex, tokens: List[str]):
+        self.index = index
+        self.tokens = tokens
+        self.pos = 0
+        self.positive_terms: List[str] = []
+
+    def parse(self) -> Set[int]:
+        result = self._or(True)
+        if self.pos != len(self.tokens):
+            raise QueryError(f"unexpected '{self.tokens[self.pos]}'")
+        return result
+
+    def _peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def _or(self, positive: bool) -> Set[int]:
+        result = self._and(positive)
+        while self._peek() == "OR":
+            self.pos += 1
+            result = result | self._and(positive)
+        return result
+
+    def _and(self, positive: bool) -> Set[int]:
+        result = self._not(positive)
+        while self._peek() not in (None, "OR", ")"):
+            if self._peek() == "AND":
+                self.pos += 1
+            result = result & self._not(positive)
+        return result
+
+    def _not(self, positive: bool) -> Set[int]:
+        token = self._peek()
+        if token is None:
+            raise QueryError("query ends too soon")
+        self.pos += 1
+        if token == "NOT":
+            return set(range(self.index.doc_count)) - self._not(not positive)
+        if token == "(":
+            result = self._or(positive)
+            if self._peek() != ")":
+                raise QueryError("missing ')'")
+            self.pos += 1
+            return result
+        if token in ("AND", "OR", ")"):
+            raise QueryError(f"unexpected '{token}'")
+        term = token.lower() if token.startswith("#") else stem(token.lower())
+        if positive:
+            self.positive_terms.append(term)
+        return self.index._matches(term)
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def bank_stamp(questions_bank) -> Tuple:
+    """Identifies a bank file's contents for cache checks"""
+    st = os.stat(questions_bank.path)
+    return (INDEX_VERSION, os.path.abspath(questions_bank.path), st.st_size, st.st_mtime_ns)
+
+
+# Open banks -> their index, kept current as the bank is patched
+_INDEXES: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def index_for_bank(questions_bank, cache: bool = True) -> QuestionIndex:
+    """The index for a bank, from memory or its cache file when that is current"""
+    index = _INDEXES.get(questions_bank)
+    if index is None:
+        index = _INDEXES[questions_bank] = _load_index(questions_bank, cache)
+
+        def reindex(changes):
+            for doc_id, (old, new) in changes.items():
+                index.update(doc_id, old, new)
+        questions_bank.add_listener(reindex)
+    return index
+
+
+def _load_index(questions_bank, cache: bool) -> QuestionIndex:
+    # A patched bank no longer matches its file, so neither would a cache
+    cache = cache and not questions_bank.patched
+    path = questions_bank.path + ".idx"
+    stamp = bank_stamp(questions_bank)
+    index = QuestionIndex.load(path, stamp) if cache else None
+    if index is None:
+        index = QuestionIndex.build((i, questions_bank.question(i))
+                                    for i in range(questions_bank.question_count))
+        if cache:
+            try:
+                index.save(path, stamp)
+            except OSError:
+                pass  # read-only: just rebuild next time
+    return index
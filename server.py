@@ -0,0 +1,226 @@
+"""
+Economics 1 Quiz Application - network quiz server
+Runs many quiz sessions at once in a single asyncio process. Students
+connect over TCP (telnet or nc is enough) and take a test line by line;
+each connection gets its own QuizSession, while the question bank, scoring
+and the grading policy (the quiz's, unless one is passed in) are shared
+with the terminal quiz.
+
+Protocol: the server sends lines of text and ends every turn with a prompt
+line starting with "> ". The client answers with one line. After the final
+results the server sends "BYE" and closes the connection.
+"""
+
+import asyncio
+from typing import List, Optional, Tuple
+
+import policy
+from bank import BankError
+from render import ScreenCache
+
+PROMPT = "> "
+# Sessions that stay silent this long are dropped
+IDLE_TIMEOUT = 600.0
+
+
+class QuizSession:
+    """One student's progress through a test, independent of any transport
+
+    Replies are UTF-8 bytes. Question screens and answer feedback are the
+    same for every student, so with a shared ScreenCache they are encoded
+    once and a question is only decoded from the bank on a cache miss.
+    """
+
+    def __init__(self, questions_bank, screens: Optional[ScreenCache] = None,
+                 grading_policy: Optional[policy.GradingPolicy] = None):
+        self.bank = questions_bank
+        self.policy = grading_policy or policy.default()
+        self.screens = screens if screens is not None else ScreenCache(max_entries=0)
+        self.test = None
+        self.question_id = None
+        self.correct = 0
+        self.num_choices = 0
+        self.index = 0
+        self.score = 0
+        # Marks so far, in the grading policy's units
+        self.units = 0
+        self.answers: List[int] = []
+        self.done = False
+
+    def start(self) -> bytes:
+        """The opening menu"""
+        lines = ["ECONOMICS 1 QUIZ APPLICATION", "", "Select a test to begin:"]
+        for test in self.bank.tests():
+            lines.append(f"  {test.number}. Test {test.number}: {test.name} ({len(test)} questions)")
+        numbers = [t.number for t in self.bank.tests()]
+        lines.append(f"{PROMPT}Enter your choice ({min(numbers)}-{max(numbers)}):")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def handle(self, line: str) -> bytes:
+        """Process one line from the student and return the reply"""
+        if self.test is None:
+            return self._choose_test(line)
+        return self._answer(line)
+
+    def _choose_test(self, line: str) -> bytes:
+        try:
+            self.test = self.bank.test(int(line))
+        except (ValueError, BankError):
+            return b"Please enter a valid test number\n" + self.start()
+        header = [f"TEST {self.test.number}: {self.test.name.upper()}",
+                  f"This test contains {len(self.test)} multiple choice questions.", ""]
+        return ("\n".join(header) + "\n").encode("utf-8") + self._question_text()
+
+    def _question_text(self) -> bytes:
+        # Everything below the question number is shared between students
+        self.question_id = self.test.first + self.index
+        self.correct = self.bank.correct_index(self.question_id)
+        self.num_choices = self.bank.choice_count(self.question_id)
+        number = f"Question {self.index + 1}/{len(self.test)}\n".encode("utf-8")
+        return number + self.screens.get(("question", self.question_id), self._render_question)
+
+    def _render_question(self) -> bytes:
+        q = self.bank.question(self.question_id)
+        lines = [q.question, ""]
+        lines.extend(f"  {i}. {choice}" for i, choice in enumerate(q.choices, 1))
+        lines.append(f"{PROMPT}Enter your answer (1-{len(q.choices)}):")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _render_feedback(self, is_correct: bool) -> bytes:
+        q = self.bank.question(self.question_id)
+        if is_correct:
+            lines = ["Correct!"]
+        else:
+            lines = ["Incorrect", f"The correct answer was: {q.answer}"]
+        if q.explanation:
+            lines.append(f"Explanation: {q.explanation}")
+        lines.append("")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _answer(self, line: str) -> bytes:
+        num_choices = self.num_choices
+        try:
+            choice = int(line)
+        except ValueError:
+            return f"Please enter a valid number\n{PROMPT}Enter your answer (1-{num_choices}):\n".encode("utf-8")
+        if not 1 <= choice <= num_choices:
+            return (f"Please enter a number between 1 and {num_choices}\n"
+                    f"{PROMPT}Enter your answer (1-{num_choices}):\n").encode("utf-8")
+
+        self.answers.append(choice)
+        is_correct = choice - 1 == self.correct
+        if is_correct:
+            self.score += 1
+        self.units += self.policy.credit_units(self.test.number, self.index, choice, is_correct)
+        feedback = self.screens.get(("feedback", self.question_id, is_correct),
+                                    lambda: self._render_feedback(is_correct))
+
+        self.index += 1
+        if self.index < len(self.test):
+            return feedback + self._question_text()
+        return feedback + self._results_text()
+
+    def results(self) -> Tuple[float, int, str, str]:
+        """Marks, total, grade and status for the finished test"""
+        total = len(self.test)
+        marks = self.policy.to_marks(self.units, total)
+        grade, status, _ = self.policy.result(marks, total)
+        return marks, total, grade, status
+
+    def _results_text(self) -> bytes:
+        self.done = True
+        score, total, grade, status = self.results()
+        lines = [f"{self.test.name.upper()} - RESULTS",
+                 f"Your Score: {score:g}/{total}",
+                 f"Percentage: {(score / total) * 100:.1f}%",
+                 f"Grade: {grade}",
+                 "CONGRATULATIONS! YOU PASSED!" if status == "PASSED"
+                 else "Unfortunately, you did not pass this time.",
+                 "BYE"]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class QuizServer:
+    """Accepts connections and runs a QuizSession for each one"""
+
+    def __init__(self, questions_bank, idle_timeout: float = IDLE_TIMEOUT,
+                 grading_policy: Optional[policy.GradingPolicy] = None):
+        self.policy = grading_policy or policy.default()
+        self.screens = None
+        self.bank = None
+        self.use_bank(questions_bank)
+        self.idle_timeout = idle_timeout
+        self.active = 0
+        self.completed = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def use_bank(self, questions_bank):
+        """Serve a new bank to new sessions; running ones keep the bank they started with
+
+        Each bank gets its own screen cache, so sessions still on the old
+        bank and those on the new one never share screens.
+        """
+        if self.bank is not None:
+            self.bank.remove_listener(self.screens.clear)
+        self.bank = questions_bank
+        self.screens = ScreenCache()
+        # Live edits to questions must not be served from stale screens
+        questions_bank.add_listener(self.screens.clear)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8765) -> asyncio.AbstractServer:
+        """Start listening; port 0 picks a free port"""
+        self._server = await asyncio.start_server(self._handle, host, port, backlog=4096)
+        return self._server
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        session = QuizSession(self.bank, self.screens, self.policy)
+        self.active += 1
+        try:
+            writer.write(session.start())
+            while not session.done:
+                await writer.drain()
+                line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+                if not line:
+                    break
+                writer.write(session.handle(line.decode("utf-8", "replace").strip()))
+            await writer.drain()
+            if session.done:
+                self.completed += 1
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            self.active -= 1
+            writer.close()
+
+
+async def serve(questions_bank, host: str = "127.0.0.1", port: int = 8765,
+                sources: Optional[List[str]] = None, grading_policy: Optional[policy.GradingPolicy] = None):
+    """Run the quiz server until cancelled, reloading edits to sources if given"""
+    server = QuizServer(questions_bank, grading_policy=grading_policy)
+    listener = await server.start(host, port)
+    print(f"Quiz server listening on {host}:{server.port}")
+    watcher = None
+    if sources:
+        import hotreload
+
+        def swap(new_bank):
+            server.use_bank(new_bank)
+            print(f"Reloaded question bank: {new_bank.question_count} questions")
+
+        watcher = hotreload.BankWatcher(questions_bank, sources, on_swap=swap,
+                                        on_error=lambda e: print(f"Not reloading questions: {e}"))
+        watcher.start()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        if watcher is not None:
+            watcher.stop()
@@ -0,0 +1,190 @@
+"""
+Economics 1 Quiz Application - resumable test sessions
+While a stored test is running, its progress is logged to
+sessions/<student>-<test>.jsonl in the attempt store, so a dropped
+terminal or Ctrl+C doesn't lose it. The first line holds the layout seed,
+from which the question order and every choice permutation are worked out
+again; each answer then adds one short line with the position and the
+running score.
+
+Lines are handed to a background thread, which writes (and fsyncs)
+whatever has queued up in one go, so answering never waits for the disk.
+Resuming reads only the first line and the last complete one, however
+far into the test the student got; the rest of the answers are read when
+the test is finished and stored.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+SESSION_DIR = "sessions"
+# Far more than one answer line, so the last complete line is always in it
+TAIL_BYTES = 4096
+
+
+def _student_key(student: str) -> str:
+    return hashlib.sha1(student.encode("utf-8")).hexdigest()[:16]
+
+
+def session_path(directory: str, student: str, test: int) -> str:
+    return os.path.join(directory, SESSION_DIR, f"{_student_key(student)}-{test}.jsonl")
+
+
+def _parse(line: bytes) -> Optional[Dict]:
+    """The record on a line, or None for a blank, torn or corrupt one"""
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return None
+    return record if isinstance(record, dict) else None
+
+
+class SessionState:
+    """An unfinished test as it stood at its last logged answer"""
+
+    def __init__(self, path: str, header: Dict, last: Optional[Dict], end: int):
+        self.path = path
+        self.header = header
+        self.end = end  # just past the last complete line
+        self.position = last["i"] if last else 0
+        self.score = last["s"] if last else 0
+
+    @property
+    def student(self) -> str:
+        return self.header["student"]
+
+    @property
+    def test(self) -> int:
+        return self.header["test"]
+
+    @property
+    def seed(self) -> int:
+        return self.header["seed"]
+
+    @property
+    def shuffled(self) -> bool:
+        return self.header["shuffled"]
+
+    @property
+    def total(self) -> int:
+        return self.header["total"]
+
+    @property
+    def updated(self) -> float:
+        return os.path.getmtime(self.path)
+
+    def answers(self) -> List[Dict]:
+        """Every answer logged so far, as stored in an attempt"""
+        answers = []
+        with open(self.path, "rb") as f:
+            f.readline()
+            for line in f:
+                record = _parse(line)
+                if record is None or record["i"] > self.position:
+                    break
+                answers.append({k: v for k, v in record.items() if k not in ("i", "s")})
+        return answers
+
+
+def load(path: str) -> Optional[SessionState]:
+    """The session logged at path, or None if there isn't a readable one"""
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return None
+    with f:
+        first = f.readline()
+        header = _parse(first)
+        if header is None:
+            return None
+        size = f.seek(0, os.SEEK_END)
+        start = max(len(first), size - TAIL_BYTES)
+        f.seek(start)
+        tail = f.read().split(b"\n")
+    # Walk back from the end to the last line that was written whole
+    for k in range(len(tail) - 2, -1, -1):
+        record = _parse(tail[k])
+        if record is not None and "i" in record:
+            end = start + sum(len(line) + 1 for line in tail[:k + 1])
+            return SessionState(path, header, record, end)
+    return SessionState(path, header, None, len(first))
+
+
+def unfinished(directory: str, student: str) -> List[SessionState]:
+    """A student's unfinished sessions, most recently used first"""
+    prefix = _student_key(student) + "-"
+    try:
+        names = os.listdir(os.path.join(directory, SESSION_DIR))
+    except FileNotFoundError:
+        return []
+    sessions = []
+    for name in names:
+        if name.startswith(prefix) and name.endswith(".jsonl"):
+            state = load(os.path.join(directory, SESSION_DIR, name))
+            if state is not None and state.student == student:
+                sessions.append(state)
+    return sorted(sessions, key=lambda s: s.updated, reverse=True)
+
+
+class SessionLog:
+    """Logs a running test's answers through a background writer thread
+
+    A new session starts from header; resuming appends to resumed's file,
+    first cutting off anything after its last complete line.
+    """
+
+    def __init__(self, path: str, header: Optional[Dict] = None, resumed: Optional[SessionState] = None):
+        self.path = path
+        if resumed is not None:
+            os.truncate(path, resumed.end)
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+        self._pending: List[str] = []
+        self._closed = False
+        self._wake = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="session-writer", daemon=True)
+        self._thread.start()
+        if header is not None:
+            self._put({**header, "started": time.time()})
+
+    def _put(self, record: Dict):
+        line = json.dumps(record, separators=(",", ":"), ensure_ascii=False) + "\n"
+        with self._wake:
+            self._pending.append(line)
+            self._wake.notify()
+
+    def answer(self, position: int, score: int, answer: Dict):
+        """Log the answer at a 1-based position and the score including it"""
+        self._put({"i": position, "s": score, **answer})
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while not self._pending and not self._closed:
+                    self._wake.wait()
+                lines, self._pending = self._pending, []
+                if not lines:
+                    return
+            # Answers that arrive during the write are batched into the next one
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self):
+        """Write everything queued and stop the writer"""
+        with self._wake:
+            self._closed = True
+            self._wake.notify()
+        self._thread.join()
+        self._file.close()
+
+    def discard(self):
+        """The test is finished and stored: close and delete the log"""
+        self.close()
+        os.remove(self.path)
@@ -0,0 +1,95 @@
+"""
+Economics 1 Quiz Application - question and choice shuffling
+Every attempt gets its own question order and choice order, derived from
+a seed so the same student, test and attempt number always see the same
+layout, and a stored sheet can be put back into bank order later.
+
+Choice orders come from precomputed permutation tables: a question with n
+choices uses permutation number hash(seed, question) of the n! orders,
+together with its inverse, so showing a shuffled question and remapping
+its correct answer are two table lookups. Each table is built the first
+time a question with that many choices comes up.
+"""
+
+from itertools import permutations
+from typing import Dict, List, Sequence, Tuple
+
+# Choice counts up to this get full permutation tables (6! = 720 orders)
+MAX_TABLE_CHOICES = 6
+
+_MASK = (1 << 64) - 1
+
+# n -> every ordering of range(n), and n -> the inverse of each ordering
+PERMUTATIONS: Dict[int, List[Tuple[int, ...]]] = {}
+INVERSES: Dict[int, List[Tuple[int, ...]]] = {}
+
+
+def _build_tables(n: int):
+    orders = list(permutations(range(n)))
+    # Inverses go in first: once PERMUTATIONS has n, other threads may use both
+    INVERSES[n] = [tuple(sorted(range(n), key=p.__getitem__)) for p in orders]
+    PERMUTATIONS[n] = orders
+
+
+def mix(seed: int, index: int) -> int:
+    """splitmix64 of seed and index: a cheap, well-spread 64-bit hash"""
+    z = (seed + (index + 1) * 0x9E3779B97F4A7C15) & _MASK
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK
+    return z ^ (z >> 31)
+
+
+def attempt_seed(student: str, test_num: int, attempt: int = 0) -> int:
+    """The layout seed for a student's nth attempt at a test"""
+    import hashlib
+    digest = hashlib.sha256(f"{student}:{test_num}:{attempt}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+def choice_permutation(seed: int, index: int, n: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """(shown position -> original choice, original choice -> shown position) for a question"""
+    if n <= MAX_TABLE_CHOICES:
+        if n not in PERMUTATIONS:
+            _build_tables(n)
+        perm_id = mix(seed, index) % len(PERMUTATIONS[n])
+        return PERMUTATIONS[n][perm_id], INVERSES[n][perm_id]
+    import random
+    order = list(range(n))
+    random.Random(mix(seed, index)).shuffle(order)
+    return tuple(order), tuple(sorted(range(n), key=order.__getitem__))
+
+
+def question_order(seed: int, total: int) -> List[int]:
+    """The order an attempt asks a test's questions in"""
+    import random
+    order = list(range(total))
+    random.Random(seed).shuffle(order)
+    return order
+
+
+class Layout:
+    """The shuffled question and choice order of one attempt"""
+
+    def __init__(self, seed: int, total: int, shuffle_questions: bool = True):
+        self.seed = seed
+        self.total = total
+        self.order = question_order(seed, total) if shuffle_questions else list(range(total))
+
+    def choices(self, index: int, q) -> Tuple[List[str], int, Tuple[int, ...]]:
+        """Shown choices, shown correct index and the permutation used, for a bank.Question"""
+        perm, inverse = choice_permutation(self.seed, index, len(q.choices))
+        shown = [q.choices[j] for j in perm]
+        return shown, inverse[q.correct], perm
+
+    def unpermute(self, shown_answers: Sequence[int], choice_counts: Sequence[int]) -> List[int]:
+        """Turn 1-based answers in shown order into answers in bank order
+
+        Blanks and out-of-range answers become 0, which never scores.
+        """
+        original = [0] * self.total
+        for position, answer in enumerate(shown_answers):
+            index = self.order[position]
+            if 0 < answer <= choice_counts[index]:
+                perm, _ = choice_permutation(self.seed, index, choice_counts[index])
+                original[index] = perm[answer - 1] + 1
+        return original
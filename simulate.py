@@ -0,0 +1,282 @@
+"""
+Economics 1 Quiz Application - exam simulator
+Sits a crowd of synthetic students through the quiz to see how it copes
+with a whole faculty at once. Students are spread over a process pool, one
+worker per core by default, and each worker runs many of them at once on
+an asyncio loop. They either drive QuizSession directly (the "engine"
+target) or connect to a quiz server over TCP (the "server" target, a
+local one is started if no address is given).
+
+Every student has an accuracy drawn around --accuracy and waits a think
+time between answers (none, fixed, exponential or lognormal). The report
+gives throughput, response latency percentiles and the grade distribution
+under the grading policy in the config (the quiz's by default).
+"""
+
+import asyncio
+import math
+import multiprocessing
+import os
+import random
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import policy
+
+# Spread of lognormal think times; the mean is kept at --think-mean
+LOGNORMAL_SIGMA = 0.6
+
+_QUESTION = re.compile(r"^Question (\d+)/(\d+)$", re.M)
+_CHOICES = re.compile(r"Enter your answer \(1-(\d+)\)")
+# Marks can be fractional or negative under some grading policies
+_SCORE = re.compile(r"^Your Score: (-?[\d.]+)/(\d+)$", re.M)
+
+
+@dataclass
+class SimulationConfig:
+    students: int = 1000
+    workers: int = 0  # 0 = one per core
+    concurrency: int = 200  # students in flight per worker
+    target: str = "engine"  # or "server"
+    host: str = "127.0.0.1"
+    port: int = 0
+    bank_path: Optional[str] = None
+    test: Optional[int] = None  # None = a random test per student
+    accuracy: float = 0.7
+    accuracy_sd: float = 0.15
+    think: str = "none"
+    think_mean: float = 0.0
+    seed: int = 0
+    grading_policy: Optional[policy.GradingPolicy] = None  # None = the quiz's
+
+
+class SyntheticStudent:
+    """Reads the quiz's replies and answers like a student of a given ability"""
+
+    def __init__(self, rng: random.Random, config: SimulationConfig, answer_keys: Dict[int, List[int]]):
+        self.rng = rng
+        self.config = config
+        self.keys = answer_keys
+        self.accuracy = min(1.0, max(0.0, rng.gauss(config.accuracy, config.accuracy_sd)))
+        self.test = config.test if config.test is not None else rng.choice(sorted(answer_keys))
+
+    def think_time(self) -> float:
+        mean = self.config.think_mean
+        kind = self.config.think
+        if kind == "none" or mean <= 0:
+            return 0.0
+        if kind == "fixed":
+            return mean
+        if kind == "exponential":
+            return self.rng.expovariate(1 / mean)
+        mu = math.log(mean) - LOGNORMAL_SIGMA ** 2 / 2
+        return self.rng.lognormvariate(mu, LOGNORMAL_SIGMA)
+
+    def answer(self, reply: str) -> str:
+        """The line to send back for a question prompt"""
+        index = int(_QUESTION.findall(reply)[-1][0]) - 1
+        n_choices = int(_CHOICES.search(reply).group(1))
+        correct = self.keys[self.test][index]
+        if n_choices == 1 or self.rng.random() < self.accuracy:
+            return str(correct + 1)
+        wrong = self.rng.randrange(n_choices - 1)
+        return str(wrong + 2 if wrong >= correct else wrong + 1)
+
+
+class _EngineConnection:
+    """A QuizSession called directly, with the same interface as a socket"""
+
+    def __init__(self, questions_bank, screens, grading_policy):
+        import server
+        self.session = server.QuizSession(questions_bank, screens, grading_policy)
+
+    async def open(self) -> str:
+        return self.session.start().decode("utf-8")
+
+    async def send(self, line: str) -> str:
+        return self.session.handle(line).decode("utf-8")
+
+    async def close(self):
+        pass
+
+
+class _ServerConnection:
+    """A quiz server connection; a reply ends at its prompt line or BYE"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+
+    async def open(self) -> str:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        return await self._reply()
+
+    async def send(self, line: str) -> str:
+        self.writer.write(line.encode("utf-8") + b"\n")
+        return await self._reply()
+
+    async def _reply(self) -> str:
+        lines = []
+        while True:
+            raw = await self.reader.readline()
+            if not raw:
+                raise ConnectionError("server closed the connection")
+            line = raw.decode("utf-8")
+            lines.append(line)
+            if line.startswith("> ") or line == "BYE\n":
+                return "".join(lines)
+
+    async def close(self):
+        self.writer.close()
+
+
+async def _sit_exam(student: SyntheticStudent, connect, latencies: List[float]) -> Tuple[int, int]:
+    """Take one test from the menu to the results; returns (score, total)"""
+    conn = connect()
+    try:
+        started = time.perf_counter()
+        reply = await conn.open()
+        latencies.append(time.perf_counter() - started)
+        line = str(student.test)
+        while True:
+            started = time.perf_counter()
+            reply = await conn.send(line)
+            latencies.append(time.perf_counter() - started)
+            result = _SCORE.search(reply)
+            if result:
+                return float(result.group(1)), int(result.group(2))
+            delay = student.think_time()
+            if delay:
+                await asyncio.sleep(delay)
+            line = student.answer(reply)
+    finally:
+        await conn.close()
+
+
+async def _run_worker(config: SimulationConfig, worker: int, students: int) -> Dict:
+    import bank
+
+    questions_bank = bank.Bank(config.bank_path) if config.bank_path else bank.load_default_bank()
+    keys = {t.number: list(t.answer_key()) for t in questions_bank.tests()}
+    grading_policy = config.grading_policy or policy.default()
+    if config.target == "engine":
+        from render import ScreenCache
+        screens = ScreenCache()
+        connect = lambda: _EngineConnection(questions_bank, screens, grading_policy)
+    else:
+        connect = lambda: _ServerConnection(config.host, config.port)
+
+    rng = random.Random(config.seed * 1_000_003 + worker)
+    latencies: List[float] = []
+    durations: List[float] = []
+    grades: Counter = Counter()
+    errors = Counter()
+    slots = asyncio.Semaphore(config.concurrency)
+
+    async def one_student():
+        async with slots:
+            student = SyntheticStudent(rng, config, keys)
+            started = time.perf_counter()
+            try:
+                score, total = await _sit_exam(student, connect, latencies)
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                errors[type(e).__name__] += 1
+                return
+            durations.append(time.perf_counter() - started)
+            grade, _, _ = grading_policy.result(score, total)
+            grades[grade] += 1
+
+    await asyncio.gather(*(one_student() for _ in range(students)))
+    return {"latencies": latencies, "durations": durations, "grades": grades, "errors": errors}
+
+
+def _worker_main(config: SimulationConfig, worker: int, students: int) -> Dict:
+    return asyncio.run(_run_worker(config, worker, students))
+
+
+def _local_server(bank_path: Optional[str], grading_policy: Optional[policy.GradingPolicy], port_pipe):
+    """Child process: run a quiz server on a free port and report the port"""
+    import bank
+    import server
+
+    async def run():
+        questions_bank = bank.Bank(bank_path) if bank_path else bank.load_default_bank()
+        quiz_server = server.QuizServer(questions_bank, grading_policy=grading_policy)
+        listener = await quiz_server.start("127.0.0.1", 0)
+        port_pipe.send(quiz_server.port)
+        async with listener:
+            await listener.serve_forever()
+
+    asyncio.run(run())
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """The q-th percentile (0-100) of already-sorted values, nearest rank"""
+    if not sorted_values:
+        return float("nan")
+    rank = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[rank]
+
+
+def run_simulation(config: SimulationConfig) -> Dict:
+    """Run the whole simulation and return the combined report"""
+    workers = config.workers or os.cpu_count() or 1
+    workers = max(1, min(workers, config.students))
+    shares = [config.students // workers + (1 if i < config.students % workers else 0)
+              for i in range(workers)]
+
+    server_process = None
+    if config.target == "server" and not config.port:
+        receive, send = multiprocessing.Pipe(duplex=False)
+        server_process = multiprocessing.Process(target=_local_server, args=(config.bank_path, config.grading_policy, send),
+                                                 daemon=True)
+        server_process.start()
+        config.port = receive.recv()
+
+    try:
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_worker_main, [config] * workers, range(workers), shares))
+        elapsed = time.perf_counter() - started
+    finally:
+        if server_process is not None:
+            server_process.terminate()
+            server_process.join()
+
+    latencies = sorted(l for part in parts for l in part["latencies"])
+    durations = sorted(d for part in parts for d in part["durations"])
+    grades = sum((part["grades"] for part in parts), Counter())
+    errors = sum((part["errors"] for part in parts), Counter())
+    completed = len(durations)
+    return {
+        "target": config.target,
+        "workers": workers,
+        "students": config.students,
+        "completed": completed,
+        "errors": dict(errors),
+        "elapsed_s": elapsed,
+        "sessions_per_s": completed / elapsed if elapsed else 0.0,
+        "requests_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": dict([(f"p{q:g}", percentile(latencies, q) * 1000) for q in (50, 90, 99, 99.9)]
+                           + [("max", latencies[-1] * 1000 if latencies else float("nan"))]),
+        "session_s": {f"p{q:g}": percentile(durations, q) for q in (50, 90, 99)},
+        "grades": {grade: grades[grade] for grade in sorted(grades)},
+    }
+
+
+def print_report(report: Dict):
+    print(f"Target: {report['target']}   workers: {report['workers']}   "
+          f"students: {report['completed']}/{report['students']} finished in {report['elapsed_s']:.2f}s")
+    if report["errors"]:
+        print("Errors: " + ", ".join(f"{name} x{count}" for name, count in report["errors"].items()))
+    print(f"Throughput: {report['sessions_per_s']:,.1f} exams/s, {report['requests_per_s']:,.0f} replies/s")
+    print("Reply latency (ms): " + "  ".join(f"{k}={v:.2f}" for k, v in report["latency_ms"].items()))
+    print("Exam duration (s):  " + "  ".join(f"{k}={v:.2f}" for k, v in report["session_s"].items()))
+    completed = report["completed"] or 1
+    print("Grades:")
+    for grade, count in report["grades"].items():
+        print(f"  {grade}  {count:>8}  {count / completed * 100:5.1f}%")
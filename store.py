@@ -0,0 +1,637 @@
+"""
+Economics 1 Quiz Application - attempt store
+Every finished test is appended to a local log so results outlive the
+session. Records are JSON lines guarded by a CRC, written through an
+append-only log that is fsynced in batches; a torn record left by a crash
+is cut off the next time the store is opened, and index entries newer than
+the last checkpoint are rebuilt from the log.
+
+Two secondary indexes sit beside the log:
+    by_test/<test>.idx      time, log offset, score, total, passed
+    by_student/<nn>.idx     student hash, log offset (hash-bucketed)
+so per-student history and per-test pass rates never scan the whole log.
+Like the cohort statistics, by_test only holds full tests: an adaptive
+attempt's score is an estimate, so it is left out of per-test figures.
+Per-test cohort statistics (cohort.py) are kept up to date in memory as
+attempts are recorded and saved inside each checkpoint.
+
+Several processes can record into one store at once (every quiz on a
+lab machine, say, plus collect). Each writes the log and indexes only
+while holding an exclusive flock on the store's lock file, and first
+reads in the attempts the others appended since, so every process's
+cohort statistics - and so every checkpoint - cover the whole log. A
+process that dies while holding the lock leaves a mark in the lock file,
+and the next one to take it recovers the store from the last checkpoint.
+
+A large store can be sharded: ShardedStore keeps one such store per
+shard-<nn>/ directory and sends each student to a shard by a hash of
+their ID, so one student's attempts are always together and per-student
+work (like report.py's term reports) runs shard by shard in parallel.
+open_store picks whichever kind a directory holds.
+"""
+
+import heapq
+import json
+import os
+import struct
+import time
+import zlib
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import cohort
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # no flock (Windows): one process per store
+
+LOG_NAME = "attempts.log"
+CHECKPOINT_NAME = "checkpoint.json"
+LOCK_NAME = "lock"
+# 2: by_test leaves out attempts that don't count toward the cohort
+INDEX_VERSION = 2
+# The lock file's one byte: set while a process is writing the store
+_WRITING, _IDLE = b"1", b"0"
+SHARDS_NAME = "shards.json"
+STUDENT_BUCKETS = 64
+# Enough shards to keep every core of a big machine busy in a report
+DEFAULT_SHARDS = 32
+
+_TEST_ENTRY = struct.Struct("<dQHHB")
+_STUDENT_ENTRY = struct.Struct("<IQ")
+
+
+class StoreError(Exception):
+    """Raised for a corrupt or unreadable attempt store"""
+
+
+def _student_hash(student: str) -> int:
+    return zlib.crc32(student.encode("utf-8"))
+
+
+def _encode_record(attempt: Dict) -> bytes:
+    body = json.dumps(attempt, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return b"%08x " % zlib.crc32(body) + body + b"\n"
+
+
+def _decode_record(line: bytes) -> Optional[Dict]:
+    """The attempt in a log line, or None if the line is torn or corrupt"""
+    if len(line) < 10 or not line.endswith(b"\n"):
+        return None
+    body = line[9:-1]
+    try:
+        if int(line[:8], 16) != zlib.crc32(body):
+            return None
+    except ValueError:
+        return None
+    return json.loads(body)
+
+
+@contextmanager
+def _shared_lock(path: str):
+    """Hold a shared lock on the store at path, so no process is part way through writing it"""
+    try:
+        fd = os.open(os.path.join(path, LOCK_NAME), os.O_RDONLY)
+    except FileNotFoundError:
+        fd = None  # no process has ever opened the store for writing
+    if fd is None or fcntl is None:
+        yield
+        return
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH)
+        yield
+    finally:
+        os.close(fd)
+
+
+def read_log(path: str) -> Iterator[Dict]:
+    """Every attempt in the log of the store at path, oldest first
+
+    Reads without opening the store, and only as far as the log went when
+    it started, so other processes can go on recording meanwhile; it stops
+    at the first torn record. A shard no student has been sent to yet
+    has no log, and so no attempts.
+    """
+    log_path = os.path.join(path, LOG_NAME)
+    with _shared_lock(path):
+        try:
+            end = os.path.getsize(log_path)
+        except FileNotFoundError:
+            return
+    with open(log_path, "rb") as f:
+        offset = 0
+        for line in f:
+            offset += len(line)
+            attempt = _decode_record(line) if offset <= end else None
+            if attempt is None:
+                break
+            yield attempt
+
+
+def _fsync(f):
+    f.flush()
+    os.fsync(f.fileno())
+
+
+class _EntryView:
+    """Fixed-size index entries decoded on access, so bisect never unpacks the whole file"""
+
+    def __init__(self, data: bytes, entry: struct.Struct, start: int = 0, stop: Optional[int] = None):
+        self.data = data
+        self.entry = entry
+        self.start = start
+        self.stop = len(data) // entry.size if stop is None else stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, _ = index.indices(len(self))
+            return _EntryView(self.data, self.entry, self.start + start, self.start + max(start, stop))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index entry out of range")
+        return self.entry.unpack_from(self.data, (self.start + index) * self.entry.size)
+
+    def __iter__(self):
+        size = self.entry.size
+        return self.entry.iter_unpack(self.data[self.start * size:self.stop * size])
+
+
+class AttemptStore:
+    """Append-only attempt log with per-student and per-test indexes"""
+
+    def __init__(self, path: str, sync_every: int = 64, sync_interval: float = 1.0,
+                 checkpoint_every: int = 16):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(os.path.join(path, "by_test"), exist_ok=True)
+        os.makedirs(os.path.join(path, "by_student"), exist_ok=True)
+
+        self._lock_fd = os.open(os.path.join(path, LOCK_NAME), os.O_RDWR | os.O_CREAT, 0o666)
+        self._lock_depth = 0
+        self._log = open(os.path.join(path, LOG_NAME), "ab+")
+        # Attempts recorded but not yet written
+        self._queued: List[Dict] = []
+        self._pending: Dict[str, List[bytes]] = {}
+        self._syncs = 0
+        self._last_sync = time.monotonic()
+        # How far into the log this process has read or written
+        self._end: Optional[int] = None
+        self.cohort = cohort.CohortStats()
+        with self._locked():
+            self._recover()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """Sync and checkpoint everything, then close the log"""
+        if not self._log.closed:
+            self.sync()
+            self.checkpoint()
+            self._log.close()
+            os.close(self._lock_fd)
+
+    # Locking
+
+    @contextmanager
+    def _locked(self):
+        """Hold the store's write lock, catching up with other processes on taking it
+
+        Reentrant, so a sync can checkpoint without letting go in between.
+        """
+        if self._lock_depth == 0 and fcntl is not None:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                if self._end is not None:
+                    if os.pread(self._lock_fd, 1, 0) == _WRITING:
+                        # The last writer died part way through: start again from its checkpoint
+                        self._recover()
+                    else:
+                        self._catch_up()
+                os.pwrite(self._lock_fd, _WRITING, 0)
+            except BaseException:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+                raise
+        self._lock_depth += 1
+        try:
+            yield
+        finally:
+            self._lock_depth -= 1
+            if self._lock_depth == 0 and fcntl is not None:
+                os.pwrite(self._lock_fd, _IDLE, 0)
+                fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _catch_up(self):
+        """Count the attempts other processes have written since this one last looked"""
+        if os.fstat(self._log.fileno()).st_size == self._end:
+            return
+        self._log.seek(self._end)
+        for line in self._log:
+            attempt = _decode_record(line)
+            if attempt is None:
+                break
+            self.cohort.add(attempt)
+            self._end += len(line)
+
+    # Writing
+
+    def record(self, attempt: Dict):
+        """Queue one attempt to be appended to the log
+
+        attempt needs student, test, score, total and status; time is
+        filled in when missing. It is written, and durable, at the next
+        sync, which happens every sync_every records or sync_interval
+        seconds.
+        """
+        attempt.setdefault("time", time.time())
+        self._queued.append(attempt)
+        self.cohort.add(attempt)
+        if (len(self._queued) >= self.sync_every
+                or time.monotonic() - self._last_sync >= self.sync_interval):
+            self.sync()
+
+    def _index(self, attempt: Dict, offset: int):
+        self._index_test(attempt, offset)
+        student_hash = _student_hash(attempt["student"])
+        self._pending.setdefault(self._student_file(student_hash), []).append(
+            _STUDENT_ENTRY.pack(student_hash, offset))
+
+    def _index_test(self, attempt: Dict, offset: int):
+        if cohort.counts_toward_cohort(attempt):
+            test_entry = _TEST_ENTRY.pack(attempt["time"], offset, attempt["score"], attempt["total"],
+                                          attempt["status"] == "PASSED")
+            self._pending.setdefault(self._test_file(attempt["test"]), []).append(test_entry)
+
+    def sync(self):
+        """Write and fsync every queued attempt
+
+        Only the log is fsynced here. Index entries are written with it
+        but made durable by a checkpoint every checkpoint_every syncs;
+        anything after the last checkpoint is rebuilt from the log on open.
+        """
+        with self._locked():
+            if self._queued:
+                self._log.seek(0, os.SEEK_END)
+                offset = self._log.tell()
+                records = []
+                for attempt in self._queued:
+                    record = _encode_record(attempt)
+                    self._index(attempt, offset)
+                    records.append(record)
+                    offset += len(record)
+                self._log.write(b"".join(records))
+                _fsync(self._log)
+                self._queued.clear()
+                self._end = offset
+                self._syncs += 1
+            self._write_pending()
+            self._last_sync = time.monotonic()
+            if self._syncs >= self.checkpoint_every:
+                self.checkpoint()
+
+    def _write_pending(self):
+        for name, entries in self._pending.items():
+            with open(name, "ab") as f:
+                f.write(b"".join(entries))
+        self._pending.clear()
+
+    def checkpoint(self):
+        """fsync the indexes and record how much of the log they cover"""
+        with self._locked():
+            self._checkpoint()
+
+    def _checkpoint(self):
+        for name, _ in self._index_files():
+            with open(name, "rb+") as f:
+                os.fsync(f.fileno())
+        state = {
+            "log": os.fstat(self._log.fileno()).st_size,
+            "indexes": {os.path.relpath(name, self.path): os.path.getsize(name)
+                        for name, _ in self._index_files()},
+            "cohort": self.cohort.to_dict(),
+            "index_version": INDEX_VERSION,
+        }
+        tmp = os.path.join(self.path, CHECKPOINT_NAME + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(state, f)
+            _fsync(f)
+        os.replace(tmp, os.path.join(self.path, CHECKPOINT_NAME))
+        self._syncs = 0
+
+    # Recovery
+
+    def _recover(self):
+        """Cut off a torn log tail and bring the indexes up to the log (with the lock held)"""
+        try:
+            with open(os.path.join(self.path, CHECKPOINT_NAME)) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            state = {"log": 0, "indexes": {}}
+
+        # Index bytes written after the checkpoint may be missing or garbage
+        for name, _ in self._index_files():
+            size = state["indexes"].get(os.path.relpath(name, self.path), 0)
+            if os.path.getsize(name) != size:
+                with open(name, "rb+") as f:
+                    f.truncate(size)
+
+        self._pending.clear()
+        if state.get("index_version", 1) < INDEX_VERSION:
+            # by_test was written with adaptive attempts in it: rebuild it once
+            for name, entry in list(self._index_files()):
+                if entry is _TEST_ENTRY:
+                    os.remove(name)
+            self._log.seek(0)
+            offset = 0
+            for line in self._log:
+                attempt = _decode_record(line)
+                if offset + len(line) > state["log"] or attempt is None:
+                    break
+                self._index_test(attempt, offset)
+                offset += len(line)
+
+        if "cohort" in state:
+            self.cohort = cohort.CohortStats.from_dict(state["cohort"])
+        else:
+            self.cohort = cohort.CohortStats()
+            # Written before cohort statistics existed: build them once
+            self._log.seek(0)
+            offset = 0
+            for line in self._log:
+                offset += len(line)
+                attempt = _decode_record(line)
+                if offset > state["log"] or attempt is None:
+                    break
+                self.cohort.add(attempt)
+
+        self._log.seek(state["log"])
+        offset = state["log"]
+        for line in self._log:
+            attempt = _decode_record(line)
+            if attempt is None:
+                break
+            self._index(attempt, offset)
+            self.cohort.add(attempt)
+            offset += len(line)
+        self._log.truncate(offset)
+        _fsync(self._log)
+        self._end = offset
+        self._write_pending()
+        self._checkpoint()
+        # Attempts this process has queued but not written yet still count
+        for attempt in self._queued:
+            self.cohort.add(attempt)
+
+    def _index_files(self) -> Iterator[Tuple[str, struct.Struct]]:
+        for directory, entry in (("by_test", _TEST_ENTRY), ("by_student", _STUDENT_ENTRY)):
+            full = os.path.join(self.path, directory)
+            for name in os.listdir(full):
+                if name.endswith(".idx"):
+                    yield os.path.join(full, name), entry
+
+    # Reading
+
+    def _test_file(self, test: int) -> str:
+        return os.path.join(self.path, "by_test", f"{test}.idx")
+
+    def _student_file(self, student_hash: int) -> str:
+        return os.path.join(self.path, "by_student", f"{student_hash % STUDENT_BUCKETS:02d}.idx")
+
+    def _read_entries(self, name: str, entry: struct.Struct) -> "_EntryView":
+        with self._locked():
+            self.sync()
+            try:
+                with open(name, "rb") as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = b""
+        return _EntryView(data, entry)
+
+    def _read_many(self, offsets: Iterable[int]) -> Iterator[Dict]:
+        with open(os.path.join(self.path, LOG_NAME), "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                attempt = _decode_record(f.readline())
+                if attempt is None:
+                    raise StoreError(f"no valid attempt at offset {offset}")
+                yield attempt
+
+    def read(self, offset: int) -> Dict:
+        """The attempt stored at a log offset"""
+        self._log.flush()
+        return next(self._read_many([offset]))
+
+    def scan(self) -> Iterator[Dict]:
+        """Every stored attempt, oldest first"""
+        self.sync()
+        yield from read_log(self.path)
+
+    def attempts_for_student(self, student: str) -> Iterator[Dict]:
+        """All attempts by one student, oldest first"""
+        student_hash = _student_hash(student)
+        entries = self._read_entries(self._student_file(student_hash), _STUDENT_ENTRY)
+        offsets = [offset for h, offset in entries if h == student_hash]
+        for attempt in self._read_many(offsets):
+            if attempt["student"] == student:
+                yield attempt
+
+    def _test_window(self, test: int, since: Optional[float], until: Optional[float]) -> "_EntryView":
+        entries = self._read_entries(self._test_file(test), _TEST_ENTRY)
+        start = 0 if since is None else bisect_left(entries, (since,))
+        end = len(entries) if until is None else bisect_left(entries, (until,))
+        return entries[start:end]
+
+    def attempts_for_test(self, test: int, since: Optional[float] = None,
+                          until: Optional[float] = None) -> Iterator[Dict]:
+        """All full-test attempts at one test, optionally limited to since <= time < until"""
+        yield from self._read_many(e[1] for e in self._test_window(test, since, until))
+
+    def cohort_stats(self, test: int) -> Dict:
+        """test_stats over all time plus spread, percentiles and grade shares, without reading any attempts"""
+        self.sync()
+        return self.cohort.test(test).stats()
+
+    def leaderboard(self, test: int, n: Optional[int] = None) -> List[Dict]:
+        """The best students at a test, by their best attempt"""
+        self.sync()
+        return self.cohort.test(test).leaderboard.top(n)
+
+    def test_stats(self, test: int, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Dict:
+        """Attempt count, pass count, pass rate and mean percentage, read from the index alone
+
+        Adaptive attempts aren't counted, as in cohort_stats.
+        The index holds right answers, not marks, so under a policy with
+        negative marking or partial credit the mean is of right answers.
+        """
+        entries = self._test_window(test, since, until)
+        passed = sum(e[4] for e in entries)
+        count = len(entries)
+        return {
+            "attempts": count,
+            "passed": passed,
+            "pass_rate": passed / count if count else 0.0,
+            "mean_percentage": (sum(e[2] / e[3] for e in entries) / count) * 100 if count else 0.0,
+        }
+
+
+def shard_of(student: str, shards: int) -> int:
+    """The shard a student's attempts go to"""
+    # Above the bits that pick the by_student bucket, so every shard
+    # still spreads its students over all the buckets
+    return _student_hash(student) // STUDENT_BUCKETS % shards
+
+
+def shard_paths(path: str) -> List[str]:
+    """The directories holding a store's logs: its shards, or just path if it isn't sharded"""
+    try:
+        with open(os.path.join(path, SHARDS_NAME)) as f:
+            count = json.load(f)["shards"]
+    except FileNotFoundError:
+        return [path]
+    return [os.path.join(path, f"shard-{i:02d}") for i in range(count)]
+
+
+class ShardedStore:
+    """AttemptStores split by student, with the same interface as one
+
+    Shards are opened the first time they are needed, so recording or
+    looking up one student touches only that student's shard. Per-test
+    queries and scans go through every shard, merging by time.
+    """
+
+    def __init__(self, path: str, shards: Optional[int] = None, **options):
+        self.path = path
+        self._options = options
+        manifest = os.path.join(path, SHARDS_NAME)
+        if os.path.exists(manifest):
+            count = len(shard_paths(path))
+            if shards is not None and shards != count:
+                raise StoreError(f"{path} has {count} shards, not {shards}")
+        elif os.path.exists(os.path.join(path, LOG_NAME)):
+            raise StoreError(f"{path} holds an unsharded store")
+        else:
+            count = shards or DEFAULT_SHARDS
+            if count < 1:
+                raise StoreError("a sharded store needs at least one shard")
+            os.makedirs(path, exist_ok=True)
+            with open(manifest + ".tmp", "w") as f:
+                json.dump({"shards": count}, f)
+                _fsync(f)
+            os.replace(manifest + ".tmp", manifest)
+        self._paths = shard_paths(path)
+        self._open: Dict[int, AttemptStore] = {}
+        self._cohort: Optional[cohort.CohortStats] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def shard_count(self) -> int:
+        return len(self._paths)
+
+    def shard(self, index: int) -> AttemptStore:
+        store = self._open.get(index)
+        if store is None:
+            store = self._open[index] = AttemptStore(self._paths[index], **self._options)
+        return store
+
+    def _all(self) -> List[AttemptStore]:
+        return [self.shard(i) for i in range(len(self._paths))]
+
+    def close(self):
+        for store in self._open.values():
+            store.close()
+
+    def record(self, attempt: Dict):
+        """Queue one attempt in its student's shard"""
+        self.shard(shard_of(attempt["student"], len(self._paths))).record(attempt)
+        if self._cohort is not None:
+            self._cohort.add(attempt)
+
+    def sync(self):
+        for store in self._open.values():
+            store.sync()
+
+    def checkpoint(self):
+        for store in self._open.values():
+            store.checkpoint()
+
+    @property
+    def cohort(self) -> cohort.CohortStats:
+        """Every shard's cohort statistics merged (opens every shard the first time)"""
+        if self._cohort is None:
+            merged = cohort.CohortStats()
+            for store in self._all():
+                merged.merge(store.cohort)
+            self._cohort = merged
+        return self._cohort
+
+    def scan(self) -> Iterator[Dict]:
+        """Every stored attempt, oldest first"""
+        return heapq.merge(*(store.scan() for store in self._all()), key=lambda a: a["time"])
+
+    def attempts_for_student(self, student: str) -> Iterator[Dict]:
+        return self.shard(shard_of(student, len(self._paths))).attempts_for_student(student)
+
+    def attempts_for_test(self, test: int, since: Optional[float] = None,
+                          until: Optional[float] = None) -> Iterator[Dict]:
+        return heapq.merge(*(store.attempts_for_test(test, since, until) for store in self._all()),
+                           key=lambda a: a["time"])
+
+    def cohort_stats(self, test: int) -> Dict:
+        return self.cohort.test(test).stats()
+
+    def leaderboard(self, test: int, n: Optional[int] = None) -> List[Dict]:
+        return self.cohort.test(test).leaderboard.top(n)
+
+    def test_stats(self, test: int, since: Optional[float] = None,
+                   until: Optional[float] = None) -> Dict:
+        parts = [store.test_stats(test, since, until) for store in self._all()]
+        count = sum(p["attempts"] for p in parts)
+        passed = sum(p["passed"] for p in parts)
+        return {
+            "attempts": count,
+            "passed": passed,
+            "pass_rate": passed / count if count else 0.0,
+            "mean_percentage": sum(p["mean_percentage"] * p["attempts"] for p in parts) / count if count else 0.0,
+        }
+
+
+def open_store(path: str, **options) -> Union[AttemptStore, ShardedStore]:
+    """The store at path, sharded or not; a new store is unsharded"""
+    if os.path.exists(os.path.join(path, SHARDS_NAME)):
+        return ShardedStore(path, **options)
+    return AttemptStore(path, **options)
+
+
+def reshard(source: str, target: str, shards: int = DEFAULT_SHARDS) -> int:
+    """Copy every attempt in the store at source into a new sharded store at target
+
+    The source's shards are merged by time, so each target shard's log
+    and indexes stay in time order.
+    """
+    if os.path.exists(os.path.join(target, LOG_NAME)) or os.path.exists(os.path.join(target, SHARDS_NAME)):
+        raise StoreError(f"{target} already holds a store")
+    count = 0
+    # A bulk copy: sync in large batches, and once more on close
+    with ShardedStore(target, shards, sync_every=8192, sync_interval=float("inf")) as sharded:
+        logs = [read_log(path) for path in shard_paths(source)]
+        for attempt in heapq.merge(*logs, key=lambda a: a["time"]):
+            sharded.record(attempt)
+            count += 1
+    return count
@@ -0,0 +1,205 @@
+"""
+Economics 1 Quiz Application - parametric questions
+A numeric question can be tagged "template:<name>" to have fresh numbers
+on every attempt. The template, in questions.TEMPLATES, gives:
+
+    vars          name -> expression, drawn in order; randint, uniform and
+                  choice pick random values, and later vars may use earlier
+    require       conditions the values must meet (drawn again if not)
+    question      f-string style text, e.g. "... was {base} in {year} ..."
+    answer        the correct choice
+    distractors   one wrong choice per remaining slot, in slot order
+    explanation   text shown after answering
+
+The correct answer keeps the question's "correct" slot and each distractor
+rule its own slot, so answer keys, grading and item analysis still line
+up with the frozen question in the bank.
+
+Each template is compiled once into a Python function whose body does the
+draws, checks and formatting directly - random draws are rewritten into
+arithmetic on random() - so a variant costs a few microseconds.
+"""
+
+import ast
+import math
+import random
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import bank
+
+TAG_PREFIX = "template:"
+# Draws per variant before giving up on the template's requirements
+MAX_TRIES = 100
+
+# All a template's expressions can call
+_SAFE_NAMES = {
+    "abs": abs, "min": min, "max": max, "round": round, "int": int, "float": float,
+    "sum": sum, "range": range, "len": len,
+    "sqrt": math.sqrt, "log": math.log, "exp": math.exp, "floor": math.floor, "ceil": math.ceil,
+}
+
+
+_DRAWS = ("randint", "uniform", "choice")
+
+
+class TemplateError(Exception):
+    """Raised for a template that can't be compiled or can't produce a valid variant"""
+
+
+class Variant(NamedTuple):
+    question: str
+    answer: str
+    distractors: Tuple[str, ...]
+    explanation: str
+
+
+def _fstring(text: str) -> str:
+    return "f" + repr(text)
+
+
+def _source(name: str, spec: Dict) -> str:
+    """The Python source of a template's generator function"""
+    lines = ["def generate(_rng):",
+             "    _random = _rng.random",
+             f"    for _ in range({MAX_TRIES}):"]
+    for var, expr in spec.get("vars", {}).items():
+        if not var.isidentifier() or var.startswith("_") or var in _SAFE_NAMES or var in _DRAWS:
+            raise TemplateError(f"template {name}: bad variable name {var!r}")
+        lines.append(f"        {var} = ({expr})")
+    for condition in spec.get("require", []):
+        lines.append(f"        if not ({condition}): continue")
+    distractors = spec.get("distractors", [])
+    lines.append(f"        _answer = {_fstring(spec['answer'])}")
+    lines.append(f"        _wrong = ({''.join(_fstring(d) + ', ' for d in distractors)})")
+    # Every choice must read differently, or the question can't be answered
+    lines.append(f"        if len({{_answer, *_wrong}}) != {len(distractors) + 1}: continue")
+    lines.append(f"        return _Variant({_fstring(spec['question'])}, _answer, _wrong, "
+                 f"{_fstring(spec.get('explanation', ''))})")
+    lines.append(f"    raise _TemplateError('template {name}: no values met its requirements "
+                 f"in {MAX_TRIES} draws')")
+    return "\n".join(lines)
+
+
+class _InlineDraws(ast.NodeTransformer):
+    """Rewrites randint(a, b), uniform(a, b) and choice(seq) into expressions on _random()
+
+    Each argument is evaluated once, through a walrus target unique to the
+    call, so nested draws keep their meaning.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        self.generic_visit(node)
+        if not (isinstance(node.func, ast.Name) and node.func.id in _DRAWS and not node.keywords):
+            return node
+        name = node.func.id
+        expected = 1 if name == "choice" else 2
+        if len(node.args) != expected:
+            raise TemplateError(f"{name}() takes {expected} argument{'s' if expected > 1 else ''}")
+        self.calls += 1
+        target = f"_d{self.calls}"
+        first = ast.NamedExpr(target=ast.Name(target, ast.Store()), value=node.args[0])
+        random_call = ast.Call(ast.Name("_random", ast.Load()), [], [])
+        held = ast.Name(target, ast.Load())
+        if name == "randint":
+            # a + int(random() * (b - a + 1))
+            span = ast.BinOp(ast.BinOp(node.args[1], ast.Sub(), held), ast.Add(), ast.Constant(1))
+            offset = ast.Call(ast.Name("int", ast.Load()), [ast.BinOp(random_call, ast.Mult(), span)], [])
+            result = ast.BinOp(first, ast.Add(), offset)
+        elif name == "uniform":
+            # a + (b - a) * random()
+            span = ast.BinOp(node.args[1], ast.Sub(), held)
+            result = ast.BinOp(first, ast.Add(), ast.BinOp(span, ast.Mult(), random_call))
+        else:
+            # seq[int(random() * len(seq))]
+            length = ast.Call(ast.Name("len", ast.Load()), [held], [])
+            index = ast.Call(ast.Name("int", ast.Load()), [ast.BinOp(random_call, ast.Mult(), length)], [])
+            result = ast.Subscript(first, index, ast.Load())
+        return ast.copy_location(result, node)
+
+
+class Template:
+    """A compiled template"""
+
+    def __init__(self, name: str, spec: Dict):
+        self.name = name
+        for key in ("question", "answer", "distractors"):
+            if key not in spec:
+                raise TemplateError(f"template {name}: missing '{key}'")
+        self.choice_count = len(spec["distractors"]) + 1
+        namespace = dict(_SAFE_NAMES, __builtins__={}, _Variant=Variant, _TemplateError=TemplateError)
+        try:
+            tree = _InlineDraws().visit(ast.parse(_source(name, spec), f"<template {name}>"))
+            exec(compile(ast.fix_missing_locations(tree), f"<template {name}>", "exec"), namespace)
+        except SyntaxError as e:
+            raise TemplateError(f"template {name}: {e.msg}: {e.text}") from None
+        except TemplateError as e:
+            raise TemplateError(f"template {name}: {e}") from None
+        self.generate = namespace["generate"]
+
+    def apply(self, q: bank.Question, rng: random.Random) -> bank.Question:
+        """A fresh variant of q, with its correct answer in q's correct slot"""
+        if len(q.choices) != self.choice_count:
+            raise TemplateError(f"template {self.name} makes {self.choice_count} choices "
+                                 f"but its question has {len(q.choices)}")
+        variant = self.generate(rng)
+        choices = list(variant.distractors)
+        choices.insert(q.correct, variant.answer)
+        return bank.Question(variant.question, choices, q.correct, variant.explanation, q.tags)
+
+    def __repr__(self) -> str:
+        return f"<Template {self.name}>"
+
+
+_compiled: Optional[Dict[str, Template]] = None
+# Set by clear(): questions.py has changed since it was imported
+_stale = False
+
+
+def compile_templates(specs: Dict[str, Dict]) -> Dict[str, Template]:
+    return {name: Template(name, spec) for name, spec in specs.items()}
+
+
+def templates() -> Dict[str, Template]:
+    """questions.TEMPLATES, compiled the first time they are needed"""
+    global _compiled, _stale
+    if _compiled is None:
+        import questions
+        if _stale:
+            import importlib
+            questions = importlib.reload(questions)
+            _stale = False
+        _compiled = compile_templates(getattr(questions, "TEMPLATES", {}))
+    return _compiled
+
+
+def clear(*_):
+    """Forget the compiled templates, so the next use reads questions.py again
+
+    A bank listener: the bank calls it when its source has been edited.
+    """
+    global _compiled, _stale
+    _compiled = None
+    _stale = True
+
+
+def template_for(q: bank.Question) -> Optional[Template]:
+    """The template a question is tagged with, if any"""
+    for tag in q.tags:
+        if tag.startswith(TAG_PREFIX):
+            name = tag[len(TAG_PREFIX):]
+            try:
+                return templates()[name]
+            except KeyError:
+                raise TemplateError(f"no template named {name!r}") from None
+    return None
+
+
+def variants(questions: List[bank.Question], count: int, seed: int = 0):
+    """count versions of a list of questions, templated ones regenerated each time"""
+    rng = random.Random(seed)
+    slots = [(q, template_for(q)) for q in questions]
+    for _ in range(count):
+        yield [q if template is None else template.apply(q, rng) for q, template in slots]
@@ -0,0 +1,172 @@
+"""
+Economics 1 Quiz Application - compiled question bank tests
+Compiles small banks into a temporary directory and checks the binary
+layout, decoding, live patches, file permissions and when the built-in
+bank is rebuilt or taken from the user's cache.
+"""
+
+import os
+import struct
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import bank
+
+TESTS = [
+    (1, "Basics", [
+        {"question": "Scarcity means:", "choices": ["Limited resources", "Free goods"], "correct": 0,
+         "explanation": "Wants exceed resources.", "tags": ["scarcity", "basics"]},
+        {"question": "GDP measures:", "choices": ["Output", "Prices", "Jobs"], "correct": 0},
+    ]),
+    (3, "Prices", [
+        {"question": "Inflation is:", "choices": ["Falling prices", "Rising prices"], "correct": 1,
+         "explanation": "A general rise in prices."},
+    ]),
+]
+
+
+def _close(check, questions_bank):
+    check(questions_bank)
+    if questions_bank is not None:
+        questions_bank.close()
+
+
+class BankFileTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.path = os.path.join(self.dir, "test.qbk")
+
+    def open(self) -> bank.Bank:
+        questions_bank = bank.Bank(self.path)
+        self.addCleanup(questions_bank.close)
+        return questions_bank
+
+    def test_header_and_test_table(self):
+        self.assertEqual(bank.compile_bank(TESTS, self.path), 3)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        self.assertEqual(struct.unpack_from("<4sHHI", data), (bank.MAGIC, bank.VERSION, 2, 3))
+        self.assertEqual(struct.unpack_from("<HIIH", data, 12), (1, 0, 2, len("Basics")))
+        self.assertEqual(struct.unpack_from("<HIIH", data, 24), (3, 2, 1, len("Prices")))
+
+    def test_questions_round_trip(self):
+        bank.compile_bank(TESTS, self.path)
+        questions_bank = self.open()
+        self.assertEqual([(t.number, t.name, len(t)) for t in questions_bank.tests()],
+                         [(1, "Basics", 2), (3, "Prices", 1)])
+        for number, _, questions in TESTS:
+            test = questions_bank.test(number)
+            for i, q in enumerate(questions):
+                self.assertEqual(test[i], bank.Question.from_dict(q))
+            self.assertEqual(list(test.answer_key()), [q["correct"] for q in questions])
+            self.assertEqual(list(test.choice_counts()), [len(q["choices"]) for q in questions])
+
+    def test_unknown_test(self):
+        bank.compile_bank(TESTS, self.path)
+        with self.assertRaises(bank.BankError):
+            self.open().test(2)
+
+    def test_not_a_bank(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(bank.BankError):
+            bank.Bank(self.path)
+
+    def test_bad_questions_are_rejected(self):
+        for bad in ({"question": "q", "choices": ["a", "b"], "correct": 2},
+                    {"question": "q", "choices": [], "correct": 0},
+                    {"question": "q", "choices": ["a", "b"], "correct": 0, "tags": ["a,b"]}):
+            with self.subTest(bad=bad), self.assertRaises(bank.BankError):
+                bank.compile_bank([(1, "Bad", [bad])], self.path)
+        with self.assertRaises(bank.BankError):
+            bank.compile_bank([TESTS[0], TESTS[0]], self.path)
+
+    def test_patch_tells_listeners(self):
+        bank.compile_bank(TESTS, self.path)
+        questions_bank = self.open()
+        seen = []
+        questions_bank.add_listener(seen.append)
+        new = {"question": "GDP counts:", "choices": ["Final goods", "All sales", "Jobs"], "correct": 0}
+        questions_bank.patch({1: new})
+        self.assertTrue(questions_bank.patched)
+        self.assertEqual(questions_bank.question(1).question, "GDP counts:")
+        self.assertEqual(seen[0][1][1], bank.Question.from_dict(new))
+        questions_bank.remove_listener(seen.append)
+        questions_bank.patch({})
+        self.assertEqual(len(seen), 1)
+
+    def test_compiled_bank_is_readable_by_everyone(self):
+        old = os.umask(0o022)
+        try:
+            bank.compile_bank(TESTS, self.path)
+        finally:
+            os.umask(old)
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o644)
+
+
+class DefaultBankTest(unittest.TestCase):
+    """load_default_bank, with questions.py stood in for by a file of our own"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.source = os.path.join(self.dir, "questions.py")
+        with open(self.source, "w") as f:
+            f.write("# stand-in\n")
+        patcher = mock.patch.object(bank, "SOURCE_PATH", self.source)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(os.environ, {"XDG_CACHE_HOME": os.path.join(self.dir, "cache")})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def load(self, path: str) -> bank.Bank:
+        questions_bank = bank.load_default_bank(path)
+        self.addCleanup(questions_bank.close)
+        return questions_bank
+
+    def test_compiles_next_to_the_install(self):
+        path = os.path.join(self.dir, "economics1.qbk")
+        self.assertEqual(self.load(path).path, path)
+        self.assertTrue(os.path.exists(path))
+
+    def test_rebuilds_when_the_source_is_newer(self):
+        path = os.path.join(self.dir, "economics1.qbk")
+        bank.compile_bank(TESTS, path)
+        _close(self.assertIsNotNone, bank._open_if_fresh(path))
+        later = time.time() + 10
+        os.utime(self.source, (later, later))
+        self.assertIsNone(bank._open_if_fresh(path))
+
+    def test_unreadable_bank_is_not_fresh(self):
+        path = os.path.join(self.dir, "economics1.qbk")
+        bank.compile_bank(TESTS, path)
+        with mock.patch.object(bank, "Bank", side_effect=PermissionError(13, "Permission denied")):
+            self.assertIsNone(bank._open_if_fresh(path))
+
+    def test_read_only_install_uses_the_users_cache(self):
+        path = os.path.join(self.dir, "read-only", "economics1.qbk")  # a directory that doesn't exist
+        questions_bank = self.load(path)
+        cache = os.path.join(self.dir, "cache", "economics1-quiz")
+        self.assertEqual(os.path.dirname(questions_bank.path), cache)
+        self.assertEqual(os.stat(cache).st_mode & 0o777, 0o700)
+        # The next start reuses the cached copy
+        self.assertEqual(self.load(path).path, questions_bank.path)
+
+    def test_cached_bank_owned_by_someone_else_is_ignored(self):
+        path = os.path.join(self.dir, "read-only", "economics1.qbk")
+        cached = self.load(path).path
+        if not hasattr(os, "getuid"):
+            self.skipTest("no user ids on this platform")
+        with mock.patch.object(os, "getuid", return_value=os.getuid() + 1):
+            self.assertIsNone(bank._open_if_fresh(cached, owned=True))
+            _close(self.assertIsNotNone, bank._open_if_fresh(cached))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+"""
+Economics 1 Quiz Application - interchange format tests
+Writes the built-in bank out in every format, reads it back and compiles
+it again, and checks the mistakes in a source that must not slip through.
+"""
+
+import io
+import os
+import tempfile
+import unittest
+
+import bank
+import formats
+
+HEADER = "test,test_name,question,choice_1,choice_2,choice_3,choice_4,correct\n"
+
+
+class FormatsTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.bank = bank.load_default_bank()
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.dir, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def compile(self, source: str, fmt=None) -> bank.Bank:
+        path = os.path.join(self.dir, "out.qbk")
+        bank.compile_bank(formats.read_tests(source, fmt), path)
+        compiled = bank.Bank(path)
+        self.addCleanup(compiled.close)
+        return compiled
+
+    def test_round_trips(self):
+        for fmt, ext in (("jsonl", ".jsonl"), ("csv", ".csv"), ("gift", ".gift"), ("qti", ".xml")):
+            with self.subTest(fmt=fmt):
+                out = io.StringIO()
+                formats.write_tests(self.bank, out, fmt)
+                copy = self.compile(self.write("bank" + ext, out.getvalue()))
+                self.assertEqual([(t.number, t.name, len(t)) for t in copy.tests()],
+                                 [(t.number, t.name, len(t)) for t in self.bank.tests()])
+                for i in range(self.bank.question_count):
+                    self.assertEqual(copy.question(i), self.bank.question(i))
+
+    def test_format_from_extension(self):
+        self.assertEqual(formats.format_for("a.XML"), "qti")
+        self.assertEqual(formats.format_for("a.txt", "csv"), "csv")
+        with self.assertRaises(bank.BankError):
+            formats.format_for("a.docx")
+
+    def test_csv_trailing_blank_choices_are_trimmed(self):
+        source = self.write("q.csv", HEADER + "1,T,Pick one,a,b,,,1\n")
+        self.assertEqual(self.compile(source).question(0).choices, ("a", "b"))
+
+    def test_csv_blank_choice_before_a_filled_one(self):
+        source = self.write("q.csv", HEADER + "1,T,Pick one,a,,c,,2\n")
+        with self.assertRaisesRegex(bank.BankError, r"q\.csv:2: blank choice column choice_2"):
+            self.compile(source)
+
+    def test_tags_with_commas_are_rejected(self):
+        source = self.write("q.jsonl", '{"test": 1, "question": "q", "choices": ["a", "b"], '
+                                       '"correct": 0, "tags": ["supply,demand"]}\n')
+        with self.assertRaisesRegex(bank.BankError, r"q\.jsonl:1: tag 'supply,demand' contains a comma"):
+            self.compile(source)
+
+    def test_bad_answer_key_names_its_line(self):
+        source = self.write("q.jsonl", '{"test": 1, "question": "q", "choices": ["a"], "correct": 0}\n'
+                                       '{"test": 1, "question": "r", "choices": ["a", "b"], "correct": 5}\n')
+        with self.assertRaisesRegex(bank.BankError, r"q\.jsonl:2: correct index 5"):
+            self.compile(source)
+
+    def test_gift_needs_one_right_answer(self):
+        source = self.write("q.gift", "$CATEGORY: Test 1: Basics\n\nPick one {=a =b ~c}\n")
+        with self.assertRaisesRegex(bank.BankError, "exactly one right answer"):
+            self.compile(source)
+
+
+if __name__ == "__main__":
+    unittest.main()
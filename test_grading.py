@@ -0,0 +1,165 @@
+"""
+Economics 1 Quiz Application - grading tests
+Batch grading has to give every sheet the marks, grade and status the
+interactive quiz would have, under the built-in policy and under ones
+with negative marking, partial credit and a floor. Also covers the
+answer-sheet checks and the grade command's handling of bad input.
+"""
+
+import io
+import os
+import random
+import subprocess
+import sys
+import unittest
+
+import bank
+import grading
+import policy
+import shuffle
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+NEGATIVE = policy.GradingPolicy({
+    "name": "Negative marking",
+    "bands": [{"grade": "HD", "min": 85}, {"grade": "D", "min": 75}, {"grade": "C", "min": 65},
+              {"grade": "P", "min": 55}, {"grade": "N", "min": 0}],
+    "pass": 55, "wrong": -0.25, "floor": 0,
+    "partial": {"1": {"4": {"2": 0.5}}},
+})
+
+
+def _interactive(grading_policy: policy.GradingPolicy, test: bank.BankTest, answers):
+    """Marks, grade and status as quiz.run_test works them out, one answer at a time"""
+    key = test.answer_key()
+    stored = [{"question": i, "answer": a, "correct": a == key[i] + 1} for i, a in enumerate(answers)]
+    marks = grading_policy.marks(test.number, stored, len(test))
+    grade, status, _ = grading_policy.result(marks, len(test))
+    return marks, grade, status
+
+
+class PolicyTest(unittest.TestCase):
+    def test_default_bands(self):
+        for marks, grade, status in ((15, "A", "PASSED"), (11, "B", "PASSED"), (10, "C", "PASSED"),
+                                     (8, "D", "PASSED"), (7, "F", "FAILED"), (0, "F", "FAILED")):
+            self.assertEqual(policy.DEFAULT.result(marks, 15)[:2], (grade, status))
+        self.assertEqual(policy.DEFAULT.breakdown(), "75%+=A, 70%+=B, 60%+=C, 50%+=D")
+
+    def test_table_matches_classify(self):
+        for grading_policy in (policy.DEFAULT, NEGATIVE):
+            for total in (1, 7, 15, 40):
+                table = grading_policy.table(total)
+                for units in range(table.lo, total * grading_policy.scale + 1):
+                    self.assertEqual(table.lookup(units),
+                                     grading_policy.classify(units / grading_policy.scale / total * 100))
+
+    def test_negative_marking_and_floor(self):
+        self.assertEqual(NEGATIVE.scale, 4)
+        self.assertEqual(NEGATIVE.lowest(10), 0)
+        # Two right, eight wrong: 2 - 8 * 0.25 = 0, and never below the floor
+        self.assertEqual(NEGATIVE.to_marks(2 * 4 - 8, 10), 0)
+        self.assertEqual(NEGATIVE.to_marks(-20, 10), 0)
+        self.assertEqual(NEGATIVE.credit_units(1, 4, 2, False), 2)
+        self.assertEqual(NEGATIVE.marking_note(), "Each wrong answer loses 0.25 marks.")
+
+    def test_bad_policies(self):
+        for spec in ({"bands": []}, {"partial": {"1": {"0": {"1": 2}}}}, {"weights": {"1": -1}},
+                     {"wrong": 0.0001}):
+            with self.subTest(spec=spec), self.assertRaises(policy.PolicyError):
+                policy.GradingPolicy(spec)
+
+    def test_survives_pickling(self):
+        import pickle
+        copy = pickle.loads(pickle.dumps(NEGATIVE))
+        self.assertEqual(copy.to_dict(), NEGATIVE.to_dict())
+
+
+class BatchGraderTest(unittest.TestCase):
+    def setUp(self):
+        self.bank = bank.load_default_bank()
+
+    def random_sheets(self, rng: random.Random, count: int):
+        for _ in range(count):
+            test = rng.choice(self.bank.tests())
+            counts = test.choice_counts()
+            yield test, [rng.randint(0, counts[i]) for i in range(len(test))]
+
+    def test_matches_the_interactive_quiz(self):
+        rng = random.Random(2)
+        sheets = list(self.random_sheets(rng, 300))
+        for grading_policy in (policy.DEFAULT, NEGATIVE):
+            with self.subTest(policy=grading_policy.name):
+                grader = grading.BatchGrader(self.bank, grading_policy)
+                results = list(grader.grade(((f"s{i}", test.number, answers)
+                                             for i, (test, answers) in enumerate(sheets)), chunk_size=64))
+                for (test, answers), result in zip(sheets, results):
+                    self.assertEqual((result.score, result.grade, result.status),
+                                     _interactive(grading_policy, test, answers))
+
+    def test_shuffled_sheet_is_graded_in_bank_order(self):
+        test = self.bank.test(2)
+        layout = shuffle.Layout(shuffle.attempt_seed("s1", 2), len(test))
+        key = test.answer_key()
+        shown = []
+        for index in layout.order:
+            _, correct, _ = layout.choices(index, test[index])
+            shown.append(correct + 1)
+        grader = grading.BatchGrader(self.bank)
+        (result,) = grader.grade([("s1", 2, shown, layout.seed)])
+        self.assertEqual(result.score, len(key))
+
+    def test_string_and_list_answers_agree(self):
+        grader = grading.BatchGrader(self.bank)
+        (a,) = grader.grade([("s1", 1, "1-2" + "0" * 12)])
+        (b,) = grader.grade([("s1", 1, [1, 0, 2] + [0] * 12)])
+        self.assertEqual(a, b)
+
+    def test_bad_sheets(self):
+        grader = grading.BatchGrader(self.bank)
+        for answers in ("12a" + "0" * 12, [1] * 14 + [256], [1] * 14 + [-1], [1.5] * 15, "1" * 14):
+            with self.subTest(answers=answers), self.assertRaisesRegex(grading.GradingError, "s9"):
+                list(grader.grade([("s9", 1, answers)]))
+        with self.assertRaises(bank.BankError):
+            list(grader.grade([("s9", 99, "1")]))
+
+    def test_csv_sheets(self):
+        f = io.StringIO("student,test,answers,seed\ns1,1,123,\ns2,2,4-1,77\n")
+        self.assertEqual(list(grading.read_csv_sheets(f)), [("s1", 1, "123"), ("s2", 2, "4-1", 77)])
+        with self.assertRaises(grading.GradingError):
+            list(grading.read_csv_sheets(io.StringIO("s1,1\n")))
+
+    def test_write_results_counts(self):
+        results = [grading.SheetResult("s1", 1, 12, 15, "A", "PASSED"),
+                   grading.SheetResult("s2", 1, 3, 15, "F", "FAILED")]
+        out = io.StringIO()
+        self.assertEqual(grading.write_results(results, out), {"sheets": 2, "passed": 1, "answers": 30})
+        self.assertIn("s1,1,12,15,80.0,A,PASSED", out.getvalue())
+
+
+class GradeCommandTest(unittest.TestCase):
+    def run_quiz(self, *args, stdin=""):
+        return subprocess.run([sys.executable, os.path.join(HERE, "quiz.py"), "--no-store", *args],
+                              input=stdin, capture_output=True, text=True, cwd=HERE, timeout=60)
+
+    def test_grades_from_stdin(self):
+        done = self.run_quiz("grade", "-", "-o", "-", stdin="s1,1," + "1" * 15 + "\n")
+        self.assertEqual(done.returncode, 0, done.stderr)
+        self.assertIn("Graded 1 sheets", done.stderr)
+
+    def test_bad_sheet_is_an_input_error(self):
+        for sheet in ("s1,1,12\n", "s1,9,1\n", "s1\n"):
+            with self.subTest(sheet=sheet):
+                done = self.run_quiz("grade", "-", "-o", "-", stdin=sheet)
+                self.assertEqual(done.returncode, 2)
+                self.assertIn("Can't grade", done.stderr)
+                self.assertNotIn("report this issue", done.stdout + done.stderr)
+
+    def test_libraries_do_not_import_the_quiz(self):
+        code = ("import sys, adaptive, exam, grading, report, server, simulate, webexport; "
+                "sys.exit('quiz' in sys.modules)")
+        done = subprocess.run([sys.executable, "-c", code], cwd=HERE, capture_output=True, text=True, timeout=60)
+        self.assertEqual(done.returncode, 0, done.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
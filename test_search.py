@@ -0,0 +1,91 @@
+"""
+Economics 1 Quiz Application - question search tests
+Indexes a small compiled bank and checks ranking, boolean queries, live
+edits, the on-disk cache (which must never run code from the file) and
+that structural tags stay out of the index.
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+import bank
+import search
+
+TESTS = [
+    (1, "Basics", [
+        {"question": "Scarcity means resources are:", "choices": ["Limited", "Free"], "correct": 0,
+         "tags": ["scarcity"]},
+        {"question": "Inflation is a rise in:", "choices": ["Prices", "Output"], "correct": 0,
+         "tags": ["inflation", "template:cpi-inflation"]},
+        {"question": "GDP counts final goods and services:", "choices": ["Yes", "No"], "correct": 0,
+         "explanation": "Intermediate goods would be counted twice.", "tags": ["gdp"]},
+    ]),
+]
+
+
+class SearchTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "test.qbk")
+        bank.compile_bank(TESTS, path)
+        self.bank = bank.Bank(path)
+        self.addCleanup(self.bank.close)
+        self.stamp = search.bank_stamp(self.bank)
+
+    def build(self) -> search.QuestionIndex:
+        return search.QuestionIndex.build((i, self.bank.question(i)) for i in range(self.bank.question_count))
+
+    def test_queries(self):
+        index = self.build()
+        self.assertEqual(index.search("inflation"), [1])
+        self.assertEqual(index.search("#gdp"), [2])
+        self.assertEqual(index.search("goods AND NOT scarcity"), [2])
+        self.assertEqual(sorted(index.search("scarcity OR inflation")), [0, 1])
+        self.assertEqual(index.search("the"), [])
+        with self.assertRaises(search.QueryError):
+            index.search("(scarcity")
+
+    def test_structural_tags_are_not_indexed(self):
+        index = self.build()
+        self.assertFalse([term for term in index.postings if "template" in term or "cpi" in term])
+        self.assertEqual(search.topic_tags(self.bank.question(1).tags), ["inflation"])
+
+    def test_live_edit_matches_a_rebuild(self):
+        index = search.index_for_bank(self.bank, cache=False)
+        self.bank.patch({0: {"question": "Opportunity cost is:", "choices": ["Forgone", "Paid"], "correct": 0,
+                             "tags": ["choice"]}})
+        rebuilt = self.build()
+        self.assertEqual(index.search("opportunity"), [0])
+        self.assertEqual(index.search("scarcity"), [])
+        self.assertEqual({t: (list(i), list(c)) for t, (i, c) in index.postings.items()},
+                         {t: (list(i), list(c)) for t, (i, c) in rebuilt.postings.items()})
+
+    def test_cache_round_trip(self):
+        index = self.build()
+        path = self.bank.path + ".idx"
+        index.save(path, self.stamp)
+        loaded = search.QuestionIndex.load(path, self.stamp)
+        self.assertEqual(list(loaded.lengths), list(index.lengths))
+        self.assertEqual({t: (list(i), list(c)) for t, (i, c) in loaded.postings.items()},
+                         {t: (list(i), list(c)) for t, (i, c) in index.postings.items()})
+        self.assertIsNone(search.QuestionIndex.load(path, self.stamp[:-1] + (0,)))
+
+    def test_damaged_or_foreign_cache_is_ignored(self):
+        path = self.bank.path + ".idx"
+        self.build().save(path, self.stamp)
+        with open(path, "rb") as f:
+            data = f.read()
+        for name, damaged in (("truncated", data[:-4]), ("empty", b""),
+                              ("bad header", data[:8] + b"[" + data[9:]),
+                              ("pickle", pickle.dumps((self.stamp, {})))):
+            with self.subTest(name):
+                with open(path, "wb") as f:
+                    f.write(damaged)
+                self.assertIsNone(search.QuestionIndex.load(path, self.stamp))
+
+
+if __name__ == "__main__":
+    unittest.main()
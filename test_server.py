@@ -0,0 +1,80 @@
+"""
+Economics 1 Quiz Application - network server tests
+Runs a QuizServer on a free loopback port and drives sessions over TCP,
+the same way students and the simulate command connect.
+"""
+
+import asyncio
+import unittest
+
+import bank
+import server
+
+
+async def _read_turn(reader: asyncio.StreamReader) -> str:
+    """Lines up to and including the next prompt (or BYE)"""
+    lines = []
+    while True:
+        line = (await asyncio.wait_for(reader.readline(), 10)).decode("utf-8")
+        if not line:
+            raise ConnectionError("server closed the connection")
+        lines.append(line)
+        if line.startswith(server.PROMPT) or line.strip() == "BYE":
+            return "".join(lines)
+
+
+async def _sit_test(port: int, test: bank.BankTest, right: bool) -> str:
+    """Answer every question of a test, all right or all wrong, and return the final reply"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    try:
+        await _read_turn(reader)
+        writer.write(f"{test.number}\n".encode())
+        key = test.answer_key()
+        for i in range(len(test)):
+            reply = await _read_turn(reader)
+            assert f"Question {i + 1}/{len(test)}" in reply, reply
+            # Choices are 1-based; the key is 0-based
+            answer = key[i] + 1 if right else (1 if key[i] else 2)
+            writer.write(f"{answer}\n".encode())
+        return await _read_turn(reader)
+    finally:
+        writer.close()
+
+
+class QuizServerTest(unittest.TestCase):
+    def setUp(self):
+        self.bank = bank.load_default_bank()
+
+    def run_server(self, *sittings):
+        async def main():
+            quiz_server = server.QuizServer(self.bank)
+            await quiz_server.start("127.0.0.1", 0)
+            try:
+                replies = await asyncio.gather(*(_sit_test(quiz_server.port, test, right)
+                                                 for test, right in sittings))
+            finally:
+                await quiz_server.close()
+            return quiz_server, replies
+        return asyncio.run(main())
+
+    def test_session_runs_to_bye(self):
+        test = self.bank.test(1)
+        quiz_server, (reply,) = self.run_server((test, True))
+        self.assertIn(f"Your Score: {len(test)}/{len(test)}", reply)
+        self.assertIn("Grade: A", reply)
+        self.assertTrue(reply.rstrip().endswith("BYE"))
+        self.assertEqual(quiz_server.completed, 1)
+
+    def test_concurrent_sessions_are_independent(self):
+        tests = [self.bank.test(t.number) for t in self.bank.tests()]
+        sittings = [(test, i % 2 == 0) for i, test in enumerate(tests * 4)]
+        quiz_server, replies = self.run_server(*sittings)
+        for (test, right), reply in zip(sittings, replies):
+            score = len(test) if right else 0
+            self.assertIn(f"Your Score: {score}/{len(test)}", reply)
+        self.assertEqual(quiz_server.completed, len(sittings))
+        self.assertEqual(quiz_server.active, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""
+Economics 1 Quiz Application - resumable session tests
+Logs part of a test, then reads it back as a resumed quiz would: from the
+last answer written whole, carrying on in the same file.
+"""
+
+import os
+import tempfile
+import unittest
+
+import session
+
+HEADER = {"student": "s1234567", "test": 2, "name": "Prices", "seed": 42, "shuffled": True, "total": 5}
+
+
+def _answer(question: int, correct: bool) -> dict:
+    return {"question": question, "answer": 1 if correct else 2, "correct": correct}
+
+
+class SessionTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+        self.path = session.session_path(self.dir, HEADER["student"], HEADER["test"])
+
+    def log_answers(self, answers, resumed=None) -> None:
+        log = session.SessionLog(self.path, None if resumed else HEADER, resumed)
+        start = resumed.position if resumed else 0
+        score = resumed.score if resumed else 0
+        for position, answer in enumerate(answers, start + 1):
+            score += answer["correct"]
+            log.answer(position, score, answer)
+        log.close()
+
+    def test_resumes_at_the_last_answer(self):
+        answers = [_answer(3, True), _answer(0, False), _answer(4, True)]
+        self.log_answers(answers)
+        state = session.load(self.path)
+        self.assertEqual((state.student, state.test, state.seed, state.shuffled, state.total),
+                         (HEADER["student"], 2, 42, True, 5))
+        self.assertEqual((state.position, state.score), (3, 2))
+        self.assertEqual(state.answers(), answers)
+
+    def test_torn_last_line_is_ignored(self):
+        answers = [_answer(3, True), _answer(0, False)]
+        self.log_answers(answers)
+        with open(self.path, "a") as f:
+            f.write('{"i":3,"s":2,"quest')
+        state = session.load(self.path)
+        self.assertEqual((state.position, state.score), (2, 1))
+        self.assertEqual(state.answers(), answers)
+
+    def test_resuming_cuts_the_torn_line_and_appends(self):
+        first = [_answer(3, True), _answer(0, False)]
+        self.log_answers(first)
+        with open(self.path, "a") as f:
+            f.write('{"i":3,"s"')
+        rest = [_answer(1, True), _answer(2, True), _answer(4, False)]
+        self.log_answers(rest, session.load(self.path))
+        state = session.load(self.path)
+        self.assertEqual((state.position, state.score), (5, 3))
+        self.assertEqual(state.answers(), first + rest)
+
+    def test_header_only(self):
+        self.log_answers([])
+        state = session.load(self.path)
+        self.assertEqual((state.position, state.score, state.answers()), (0, 0, []))
+
+    def test_unreadable_or_missing_sessions(self):
+        self.assertIsNone(session.load(self.path))
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            f.write('{"student": "s12')
+        self.assertIsNone(session.load(self.path))
+
+    def test_unfinished_lists_only_the_students_own(self):
+        self.log_answers([_answer(0, True)])
+        other = session.SessionLog(session.session_path(self.dir, "s7654321", 1),
+                                   {**HEADER, "student": "s7654321", "test": 1})
+        other.close()
+        self.assertEqual([(s.student, s.test) for s in session.unfinished(self.dir, HEADER["student"])],
+                         [(HEADER["student"], 2)])
+        self.assertEqual(session.unfinished(self.dir, "nobody"), [])
+
+    def test_discard_removes_the_log(self):
+        log = session.SessionLog(self.path, HEADER)
+        log.answer(1, 1, _answer(0, True))
+        log.discard()
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(session.unfinished(self.dir, HEADER["student"]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Economics 1 Quiz Application - shuffling tests
+Checks that every layout is a true permutation, that it is the same for
+the same seed, and that a shuffled sheet unpermutes back to bank order.
+"""
+
+import random
+import unittest
+
+import bank
+import shuffle
+
+
+class ShuffleTest(unittest.TestCase):
+    def test_permutation_and_inverse(self):
+        for n in (1, 2, 4, shuffle.MAX_TABLE_CHOICES, shuffle.MAX_TABLE_CHOICES + 3):
+            for index in range(20):
+                with self.subTest(n=n, index=index):
+                    perm, inverse = shuffle.choice_permutation(12345, index, n)
+                    self.assertEqual(sorted(perm), list(range(n)))
+                    self.assertEqual([inverse[p] for p in perm], list(range(n)))
+
+    def test_layout_is_reproducible(self):
+        seed = shuffle.attempt_seed("s1234567", 2, 1)
+        self.assertEqual(seed, shuffle.attempt_seed("s1234567", 2, 1))
+        self.assertNotEqual(seed, shuffle.attempt_seed("s1234567", 2, 2))
+        self.assertEqual(shuffle.Layout(seed, 30).order, shuffle.Layout(seed, 30).order)
+        self.assertEqual(sorted(shuffle.question_order(seed, 30)), list(range(30)))
+        self.assertEqual(shuffle.Layout(seed, 5, shuffle_questions=False).order, [0, 1, 2, 3, 4])
+
+    def test_shown_correct_choice_is_the_right_answer(self):
+        q = bank.Question("q", ["a", "b", "c", "d", "e"], 3)
+        layout = shuffle.Layout(99, 1)
+        shown, correct, perm = layout.choices(0, q)
+        self.assertEqual(shown[correct], q.answer)
+        self.assertEqual([q.choices[j] for j in perm], shown)
+
+    def test_unpermute_restores_bank_order(self):
+        rng = random.Random(7)
+        counts = [rng.randint(2, 8) for _ in range(25)]
+        questions = [bank.Question(f"q{i}", [str(c) for c in range(n)], 0) for i, n in enumerate(counts)]
+        layout = shuffle.Layout(shuffle.attempt_seed("s1", 1), len(questions))
+        wanted = [rng.randint(1, n) for n in counts]  # 1-based, bank order
+        shown_answers = []
+        for index in layout.order:
+            _, _, perm = layout.choices(index, questions[index])
+            shown_answers.append(perm.index(wanted[index] - 1) + 1)
+        self.assertEqual(layout.unpermute(shown_answers, counts), wanted)
+
+    def test_unpermute_blanks_and_out_of_range(self):
+        layout = shuffle.Layout(1, 3)
+        self.assertEqual(layout.unpermute([0, 9, 0], [4, 4, 4]), [0, 0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,183 @@
+"""
+Economics 1 Quiz Application - attempt store tests
+Records attempts into a temporary store and checks they outlive the
+process, that a crash's leftovers are cleaned up on open, that the
+indexes agree with the log, and that several processes can record into
+one store at once.
+"""
+
+import json
+import multiprocessing
+import os
+import tempfile
+import unittest
+
+import store
+
+
+def _attempt(student: str, test: int, score: int, when: float, **extra) -> dict:
+    attempt = {"student": student, "test": test, "score": score, "total": 10,
+               "status": "PASSED" if score >= 5 else "FAILED", "grade": "C" if score >= 5 else "F",
+               "time": when}
+    attempt.update(extra)
+    return attempt
+
+
+def _record_many(path: str, worker: int, count: int):
+    with store.AttemptStore(path, sync_every=7) as attempts:
+        for i in range(count):
+            attempts.record(_attempt(f"w{worker}-{i % 5}", 1 + i % 2, i % 11, 1000.0 + i))
+
+
+class AttemptStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = directory.name
+
+    def fill(self, count: int = 40) -> list:
+        attempts = [_attempt(f"s{i % 4}", 1 + i % 3, i % 11, 1000.0 + i) for i in range(count)]
+        with store.AttemptStore(self.path, sync_every=8, checkpoint_every=2) as attempt_store:
+            for attempt in attempts:
+                attempt_store.record(dict(attempt))
+        return attempts
+
+    def open(self) -> store.AttemptStore:
+        attempt_store = store.AttemptStore(self.path)
+        self.addCleanup(attempt_store.close)
+        return attempt_store
+
+    def test_attempts_outlive_the_process(self):
+        attempts = self.fill()
+        attempt_store = self.open()
+        self.assertEqual(list(attempt_store.scan()), attempts)
+        self.assertEqual(list(attempt_store.attempts_for_student("s1")),
+                         [a for a in attempts if a["student"] == "s1"])
+        self.assertEqual(attempt_store.read(0), attempts[0])
+
+    def test_torn_log_tail_is_cut_off(self):
+        attempts = self.fill()
+        log = os.path.join(self.path, store.LOG_NAME)
+        with open(log, "ab") as f:
+            f.write(b'0badc0de {"student": "s9"')
+        attempt_store = self.open()
+        self.assertEqual(list(attempt_store.scan()), attempts)
+        attempt_store.record(_attempt("s9", 1, 9, 5000.0))
+        attempt_store.sync()
+        self.assertEqual(len(list(store.read_log(self.path))), len(attempts) + 1)
+
+    def test_index_garbage_after_the_checkpoint_is_rebuilt(self):
+        attempts = self.fill()
+        for name in ("by_test/1.idx", "by_student/00.idx"):
+            with open(os.path.join(self.path, name), "ab") as f:
+                f.write(b"\xff" * 13)
+        with open(os.path.join(self.path, store.CHECKPOINT_NAME)) as f:
+            state = json.load(f)
+        # Lose the last sync's index entries too, as a crash before the checkpoint would
+        state["log"] = 0
+        state["indexes"] = {}
+        with open(os.path.join(self.path, store.CHECKPOINT_NAME), "w") as f:
+            json.dump(state, f)
+        attempt_store = self.open()
+        self.assertEqual(list(attempt_store.attempts_for_test(1)), [a for a in attempts if a["test"] == 1])
+        self.assertEqual(list(attempt_store.attempts_for_student("s0")),
+                         [a for a in attempts if a["student"] == "s0"])
+
+    def test_a_dead_writer_is_recovered_from(self):
+        attempts = self.fill()
+        with open(os.path.join(self.path, store.LOCK_NAME), "r+b") as f:
+            f.write(store._WRITING)
+        with open(os.path.join(self.path, "by_test", "2.idx"), "ab") as f:
+            f.write(b"\0" * 5)
+        attempt_store = self.open()
+        attempt_store.record(_attempt("s0", 2, 10, 5000.0))
+        self.assertEqual(list(attempt_store.attempts_for_test(2))[:-1], [a for a in attempts if a["test"] == 2])
+
+    def test_test_queries_agree_with_a_scan(self):
+        attempts = self.fill()
+        attempt_store = self.open()
+        for test in (1, 2, 3):
+            with self.subTest(test=test):
+                scanned = [a for a in attempt_store.scan() if a["test"] == test]
+                self.assertEqual(list(attempt_store.attempts_for_test(test)), scanned)
+                window = [a for a in scanned if 1010 <= a["time"] < 1030]
+                self.assertEqual(list(attempt_store.attempts_for_test(test, 1010, 1030)), window)
+                stats = attempt_store.test_stats(test)
+                self.assertEqual(stats["attempts"], len(scanned))
+                self.assertEqual(stats["passed"], sum(a["status"] == "PASSED" for a in scanned))
+                self.assertAlmostEqual(stats["mean_percentage"],
+                                       sum(a["score"] * 10 for a in scanned) / len(scanned))
+                self.assertEqual(attempt_store.cohort_stats(test)["attempts"], len(scanned))
+        self.assertEqual(sum(1 for _ in attempts), len(list(store.read_log(self.path))))
+
+    def test_adaptive_attempts_are_left_out_of_test_figures(self):
+        attempt_store = self.open()
+        attempt_store.record(_attempt("s1", 1, 8, 1000.0))
+        attempt_store.record(_attempt("s2", 1, 2, 1001.0, mode="adaptive"))
+        self.assertEqual(list(attempt_store.attempts_for_student("s2"))[0]["mode"], "adaptive")
+        self.assertEqual([a["student"] for a in attempt_store.attempts_for_test(1)], ["s1"])
+        self.assertEqual(attempt_store.test_stats(1)["attempts"], 1)
+        self.assertEqual(attempt_store.cohort_stats(1)["attempts"], 1)
+
+    def test_read_log_stops_where_the_log_ended(self):
+        self.fill(10)
+        attempt_store = self.open()
+        seen = []
+        for attempt in store.read_log(self.path):
+            if not seen:
+                attempt_store.record(_attempt("late", 1, 5, 9000.0))
+                attempt_store.sync()
+            seen.append(attempt)
+        self.assertEqual(len(seen), 10)
+
+    def test_concurrent_writers(self):
+        if store.fcntl is None:
+            self.skipTest("no flock on this platform")
+        workers = [multiprocessing.Process(target=_record_many, args=(self.path, w, 50)) for w in range(3)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            self.assertEqual(worker.exitcode, 0)
+        attempt_store = self.open()
+        self.assertEqual(len(list(attempt_store.scan())), 150)
+        self.assertEqual(attempt_store.test_stats(1)["attempts"] + attempt_store.test_stats(2)["attempts"], 150)
+        self.assertEqual(attempt_store.cohort_stats(1)["attempts"] + attempt_store.cohort_stats(2)["attempts"],
+                         150)
+        self.assertEqual(len(list(attempt_store.attempts_for_student("w2-3"))), 10)
+
+
+class ShardedStoreTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def test_reshard_keeps_every_shard_in_time_order(self):
+        source = os.path.join(self.dir, "source")
+        with store.ShardedStore(source, 2) as sharded:
+            for i in range(60):
+                sharded.record(_attempt(f"s{i % 7}", 1, i % 11, 1000.0 + i))
+        target = os.path.join(self.dir, "target")
+        self.assertEqual(store.reshard(source, target, 3), 60)
+        for path in store.shard_paths(target):
+            times = [a["time"] for a in store.read_log(path)]
+            self.assertEqual(times, sorted(times))
+        with store.open_store(target) as sharded:
+            self.assertIsInstance(sharded, store.ShardedStore)
+            self.assertEqual(sharded.test_stats(1)["attempts"], 60)
+            times = [a["time"] for a in sharded.attempts_for_test(1)]
+            self.assertEqual(times, sorted(times))
+            self.assertEqual(len(list(sharded.attempts_for_student("s3"))), 9)
+        with self.assertRaises(store.StoreError):
+            store.reshard(source, target, 3)
+
+    def test_shard_count_must_match(self):
+        path = os.path.join(self.dir, "sharded")
+        store.ShardedStore(path, 4).close()
+        with self.assertRaises(store.StoreError):
+            store.ShardedStore(path, 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+Economics 1 Quiz Application - parametric question tests
+Compiles small templates and checks their variants: the right answer in
+the question's slot, requirements met, the same numbers for the same
+seed, and a fresh compile once questions.py has changed.
+"""
+
+import random
+import types
+import unittest
+from unittest import mock
+
+import bank
+import templates
+
+SPEC = {
+    "vars": {"a": "randint(2, 9)", "b": "a + randint(1, 5)", "rate": "uniform(0, 1)",
+             "unit": "choice(['kg', 'tonnes'])"},
+    "require": ["b % 2 == 0"],
+    "question": "What is {a} plus {b} {unit}?",
+    "answer": "{a + b}",
+    "distractors": ["{a * b}", "{b - a}"],
+    "explanation": "{a} + {b} = {a + b}",
+}
+
+
+def _question(correct: int = 1, name: str = "add") -> bank.Question:
+    return bank.Question("frozen", ["x", "y", "z"], correct, "", (templates.TAG_PREFIX + name, "basics"))
+
+
+class TemplateTest(unittest.TestCase):
+    def setUp(self):
+        # Leave the module's cache as we found it
+        patcher = mock.patch.multiple(templates, _compiled=None, _stale=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_answer_keeps_the_questions_slot(self):
+        template = templates.Template("add", SPEC)
+        rng = random.Random(1)
+        for correct in (0, 1, 2):
+            for _ in range(50):
+                q = template.apply(_question(correct), rng)
+                a, b = (int(n) for n in q.question.split()[2:5:2])
+                self.assertEqual(b % 2, 0)
+                self.assertTrue(2 <= a <= 9 and a + 1 <= b <= a + 5)
+                self.assertEqual(q.choices[correct], str(a + b))
+                self.assertEqual(q.correct, correct)
+                self.assertEqual(q.tags, _question().tags)
+
+    def test_bad_templates(self):
+        for spec, message in (({k: v for k, v in SPEC.items() if k != "answer"}, "missing 'answer'"),
+                              ({**SPEC, "vars": {"_x": "1"}}, "bad variable name"),
+                              ({**SPEC, "vars": {"a": "randint(1)"}}, r"randint\(\) takes 2 arguments"),
+                              ({**SPEC, "question": "{a +}"}, "template add")):
+            with self.subTest(message=message), self.assertRaisesRegex(templates.TemplateError, message):
+                templates.Template("add", spec)
+
+    def test_wrong_choice_count(self):
+        template = templates.Template("add", SPEC)
+        q = bank.Question("frozen", ["x", "y"], 0)
+        with self.assertRaisesRegex(templates.TemplateError, "makes 3 choices"):
+            template.apply(q, random.Random(0))
+
+    def test_unmeetable_requirements(self):
+        template = templates.Template("never", {**SPEC, "require": ["a > 100"]})
+        with self.assertRaisesRegex(templates.TemplateError, "no values met its requirements"):
+            template.apply(_question(), random.Random(0))
+
+    def test_variants_are_the_same_for_a_seed(self):
+        with mock.patch.object(templates, "_compiled", templates.compile_templates({"add": SPEC})):
+            questions = [_question(), bank.Question("plain", ["a", "b"], 0)]
+            first = list(templates.variants(questions, 5, seed=3))
+            self.assertEqual(first, list(templates.variants(questions, 5, seed=3)))
+            self.assertNotEqual(first, list(templates.variants(questions, 5, seed=4)))
+            self.assertTrue(all(v[1] is questions[1] for v in first))
+            with self.assertRaisesRegex(templates.TemplateError, "no template named 'missing'"):
+                templates.template_for(_question(name="missing"))
+
+    def test_built_in_templates_compile(self):
+        compiled = templates.templates()
+        self.assertTrue(compiled)
+        rng = random.Random(0)
+        for template in compiled.values():
+            variant = template.generate(rng)
+            self.assertEqual(len(variant.distractors) + 1, template.choice_count)
+
+    def test_clear_recompiles_from_a_reloaded_source(self):
+        before = templates.templates()
+        self.assertIs(templates.templates(), before)
+        edited = types.SimpleNamespace(TEMPLATES={"add": SPEC})
+        questions_bank = bank.load_default_bank()
+        self.addCleanup(questions_bank.close)
+        questions_bank.add_listener(templates.clear)
+        self.addCleanup(questions_bank.remove_listener, templates.clear)
+        questions_bank.patch({})
+        with mock.patch("importlib.reload", return_value=edited) as reload:
+            self.assertEqual(list(templates.templates()), ["add"])
+            reload.assert_called_once()
+            # Only once: the reloaded source is used until the next edit
+            templates.templates()
+            reload.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
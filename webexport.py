@@ -0,0 +1,345 @@
+"""
+Economics 1 Quiz Application - static web version
+Exports the question bank as a self-contained web quiz: one index.html
+with inline script and styles, a compact bank.json, and a service worker
+so the page keeps working offline once loaded. Tests run entirely in the
+browser; grades come from the grading policy's compiled tables (and
+marks from its per-test credit rows, when it has negative marking or
+partial credit), so they match the terminal quiz exactly. Every file gets .gz (and .br when the
+brotli package is installed) siblings for servers that send precompressed
+files.
+
+Finished attempts queue up in the browser's localStorage and are posted
+in batches to the sync URL whenever the browser is online; a batch the
+server turns away as too large is split in half until it fits. collect()
+receives them: it re-scores each attempt against the bank, ignores
+attempts it has already stored, and records the rest in the attempt
+store. It can serve the exported files too.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+from typing import Dict, List, Optional
+
+import policy
+from bank import BankError
+
+# Largest sync batch accepted, in bytes
+MAX_BATCH_BYTES = 4 << 20
+
+_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width,initial-scale=1">
+<title>Economics 1 Quiz</title>
+<style>
+body{font:17px/1.5 system-ui,sans-serif;max-width:46em;margin:0 auto;padding:1em;color:#222}
+h1{font-size:1.4em;text-align:center;border-bottom:3px double #a3a;padding-bottom:.4em}
+button{display:block;width:100%;text-align:left;font:inherit;margin:.4em 0;padding:.6em .8em;border:1px solid #bbb;border-radius:6px;background:#f7f7f7;cursor:pointer}
+button:hover{background:#eef}
+.n{color:#088;font-weight:bold}.q{font-weight:bold}.ok{color:#080;font-weight:bold}.bad{color:#c00;font-weight:bold}
+.ex{color:#066}.note{color:#a70}input{font:inherit;padding:.4em;width:60%}
+</style>
+</head>
+<body>
+<div id="app">Loading...</div>
+<script>
+(function(){
+"use strict";
+var app=document.getElementById("app"),store=window.localStorage,QUEUE="econ1.queue",STUDENT="econ1.student",bank;
+function el(tag,cls,text){var e=document.createElement(tag);if(cls)e.className=cls;if(text!==undefined)e.textContent=text;return e;}
+function screen(title){app.textContent="";app.appendChild(el("h1","",title));return app;}
+function button(text,fn){var b=el("button","",text);b.onclick=fn;app.appendChild(b);return b;}
+function queue(){try{return JSON.parse(store.getItem(QUEUE))||[];}catch(e){return [];}}
+function shuffle(a){for(var i=a.length-1;i>0;i--){var j=Math.floor(Math.random()*(i+1)),t=a[i];a[i]=a[j];a[j]=t;}return a;}
+function range(n){var a=[];for(var i=0;i<n;i++)a.push(i);return a;}
+function sync(size){
+var sent=queue().slice(0,size||undefined);
+if(!sent.length||!navigator.onLine||!bank.sync)return;
+fetch(bank.sync,{method:"POST",headers:{"Content-Type":"application/json"},body:JSON.stringify(sent)}).then(function(r){
+if(r.ok){var rest=queue().slice(sent.length);store.setItem(QUEUE,JSON.stringify(rest));if(rest.length)sync(size);}
+else if(r.status===413&&sent.length>1){sync(Math.ceil(sent.length/2));}
+}).catch(function(){});
+}
+function who(){
+screen("ECONOMICS 1 QUIZ");
+app.appendChild(el("p","","Enter your student ID:"));
+var input=el("input");app.appendChild(input);input.focus();
+button("Start",function(){if(input.value.trim()){store.setItem(STUDENT,input.value.trim());menu();}});
+}
+function menu(){
+if(!store.getItem(STUDENT))return who();
+screen("ECONOMICS 1 QUIZ APPLICATION");
+app.appendChild(el("p","","Select a test to begin:"));
+bank.tests.forEach(function(t){button("Test "+t.n+": "+t.name+" ("+t.q.length+" questions)",function(){run(t);});});
+app.appendChild(el("p","note",bank.note));
+var waiting=queue().length;
+if(waiting)app.appendChild(el("p","note",waiting+" result(s) waiting to be sent."));
+app.appendChild(el("p","","Signed in as "+store.getItem(STUDENT)+" "));
+button("Change student",function(){store.removeItem(STUDENT);who();});
+}
+function run(t){
+var order=shuffle(range(t.q.length)),pos=0,score=0,units=0,answers=[],started=Date.now();
+function ask(){
+var index=order[pos],q=t.q[index],shown=shuffle(range(q[1].length)),asked=Date.now();
+screen("TEST "+t.n+": "+t.name.toUpperCase());
+app.appendChild(el("p","n","Question "+(pos+1)+"/"+t.q.length));
+app.appendChild(el("p","q",q[0]));
+shown.forEach(function(c,i){button((i+1)+". "+q[1][c],function(){answer(index,q,c,(Date.now()-asked)/1000);});});
+document.onkeydown=function(e){var i=parseInt(e.key,10)-1;if(i>=0&&i<shown.length){answer(index,q,shown[i],(Date.now()-asked)/1000);}};
+}
+function answer(index,q,choice,latency){
+document.onkeydown=null;
+var right=choice===q[2];
+if(right)score++;
+units+=t.c?t.c[index][choice+1]:right?bank.scale:0;
+answers.push({question:index,answer:choice+1,correct:right,latency:Math.round(latency*1000)/1000});
+screen("TEST "+t.n+": "+t.name.toUpperCase());
+app.appendChild(el("p",right?"ok":"bad",right?"\\u2713 Correct!":"\\u2717 Incorrect"));
+if(!right)app.appendChild(el("p","note","The correct answer was: "+q[1][q[2]]));
+if(q[3])app.appendChild(el("p","ex","Explanation: "+q[3]));
+pos++;
+button(pos<t.q.length?"Next question":"See results",pos<t.q.length?ask:finish).focus();
+}
+function finish(){
+var total=t.q.length,lo=bank.lo[total],u=Math.max(units,lo),g=bank.grades[total][u-lo],marks=Math.round(u/bank.scale*1000)/1000;
+var queued=queue();
+queued.push({id:Date.now().toString(36)+Math.random().toString(36).slice(2),student:store.getItem(STUDENT),test:t.n,answers:answers,score:score,marks:marks,total:total,grade:g[0],status:g[1],time:started/1000});
+store.setItem(QUEUE,JSON.stringify(queued));
+sync();
+screen(t.name.toUpperCase()+" - RESULTS");
+app.appendChild(el("p","","Your Score: "+marks+"/"+total));
+app.appendChild(el("p","","Percentage: "+(u/bank.scale/total*100).toFixed(1)+"%"));
+app.appendChild(el("p","q","Grade: "+g[0]));
+app.appendChild(el("p",g[1]==="PASSED"?"ok":"bad",g[1]==="PASSED"?"CONGRATULATIONS! YOU PASSED!":"Unfortunately, you did not pass this time."));
+button("Return to main menu",menu).focus();
+}
+ask();
+}
+window.addEventListener("online",sync);
+if("serviceWorker" in navigator)navigator.serviceWorker.register("sw.js").catch(function(){});
+fetch("bank.json").then(function(r){return r.json();}).then(function(b){bank=b;menu();sync();}).catch(function(){app.textContent="Could not load the questions.";});
+})();
+</script>
+</body>
+</html>
+"""
+
+_SERVICE_WORKER = """
+var CACHE="econ1-%(version)s",FILES=["./","index.html","bank.json"];
+self.addEventListener("install",function(e){e.waitUntil(caches.open(CACHE).then(function(c){return c.addAll(FILES);}));self.skipWaiting();});
+self.addEventListener("activate",function(e){e.waitUntil(caches.keys().then(function(keys){return Promise.all(keys.filter(function(k){return k!==CACHE;}).map(function(k){return caches.delete(k);}));}));});
+self.addEventListener("fetch",function(e){if(e.request.method!=="GET")return;e.respondWith(caches.match(e.request).then(function(hit){return hit||fetch(e.request);}));});
+"""
+
+
+def minify(source: str) -> str:
+    """Drop indentation and blank lines (the page is written so this is safe)"""
+    return "\n".join(line.strip() for line in source.splitlines() if line.strip())
+
+
+def bank_bundle(questions_bank, sync_url: Optional[str] = "sync", grading_policy=None) -> Dict:
+    """Everything the page needs: questions as [text, choices, correct, explanation] and grade tables
+
+    Grade tables are indexed by units of marks above lo; when the policy
+    gives more than a mark per right answer, each test also carries its
+    credit rows ("c") of units per question and answer.
+    """
+    grading_policy = grading_policy or policy.default()
+    tests = []
+    for test in questions_bank.tests():
+        questions = [[q.question, list(q.choices), q.correct, q.explanation] for q in test]
+        entry = {"n": test.number, "name": test.name, "q": questions}
+        if not grading_policy.plain:
+            width = max((len(q[1]) for q in questions), default=0) + 1
+            entry["c"] = grading_policy.credit_rows(test.number, [q[2] for q in questions], width)
+        tests.append(entry)
+    totals = sorted({len(t["q"]) for t in tests if t["q"]})
+    tables = {total: grading_policy.table(total) for total in totals}
+    grades = {total: [list(entry) for entry in zip(table.grades, table.statuses)]
+              for total, table in tables.items()}
+    note = f"Passing grade: {grading_policy.pass_mark:g}% or higher. Grade breakdown: {grading_policy.breakdown()}"
+    if grading_policy.marking_note():
+        note += " " + grading_policy.marking_note()
+    return {"tests": tests, "grades": grades, "lo": {total: table.lo for total, table in tables.items()},
+            "scale": grading_policy.scale, "note": note, "sync": sync_url}
+
+
+def _write(directory: str, name: str, data: bytes, compress: bool) -> List[str]:
+    path = os.path.join(directory, name)
+    with open(path, "wb") as f:
+        f.write(data)
+    written = [path]
+    if compress:
+        with open(path + ".gz", "wb") as f:
+            f.write(gzip.compress(data, 9, mtime=0))
+        written.append(path + ".gz")
+        try:
+            import brotli
+        except ImportError:
+            pass
+        else:
+            with open(path + ".br", "wb") as f:
+                f.write(brotli.compress(data))
+            written.append(path + ".br")
+    return written
+
+
+def export_site(questions_bank, directory: str, sync_url: Optional[str] = "sync",
+                compress: bool = True, grading_policy=None) -> List[str]:
+    """Write the web quiz into directory and return the files written"""
+    os.makedirs(directory, exist_ok=True)
+    bundle = json.dumps(bank_bundle(questions_bank, sync_url, grading_policy), separators=(",", ":"),
+                        ensure_ascii=False).encode("utf-8")
+    page = minify(_PAGE).encode("utf-8")
+    # A new export gets a new cache name, so browsers drop the old questions
+    version = hashlib.sha1(bundle + page).hexdigest()[:12]
+    worker = minify(_SERVICE_WORKER % {"version": version}).encode("utf-8")
+
+    written = []
+    written += _write(directory, "bank.json", bundle, compress)
+    written += _write(directory, "index.html", page, compress)
+    written += _write(directory, "sw.js", worker, compress)
+    return written
+
+
+def score_web_attempt(questions_bank, result: Dict, grading_policy=None) -> Dict:
+    """Re-score an attempt sent by the page; raises ValueError if it is malformed
+
+    The attempt needs exactly one answer to every question. It is stamped
+    with the time it arrives, not a time the page claims, so the store's
+    indexes stay in time order.
+    """
+    try:
+        test = questions_bank.test(int(result["test"]))
+        student = str(result["student"])
+        sent = result["answers"]
+        key = test.answer_key()
+        counts = test.choice_counts()
+        total = len(test)
+        if len(sent) != total:
+            raise ValueError(f"expected {total} answers, got {len(sent)}")
+        answers = []
+        seen = set()
+        for item in sent:
+            index = int(item["question"])
+            answer = int(item["answer"])
+            if not 0 <= index < total or not 1 <= answer <= counts[index]:
+                raise ValueError(f"answer {answer} to question {index} is out of range")
+            if index in seen:
+                raise ValueError(f"question {index} is answered twice")
+            seen.add(index)
+            answers.append({"question": index, "answer": answer, "correct": answer - 1 == key[index],
+                            "latency": float(item.get("latency", 0))})
+    except (KeyError, TypeError, AttributeError, BankError) as e:
+        raise ValueError(f"malformed attempt: {e}") from None
+
+    grading_policy = grading_policy or policy.default()
+    score = sum(a["correct"] for a in answers)
+    marks = grading_policy.marks(test.number, answers, total)
+    grade, status, _ = grading_policy.result(marks, total)
+    extra = {"marks": marks} if marks != score else {}
+    return {"student": student, "test": test.number, "answers": answers, "score": score,
+            "total": total, "grade": grade, "status": status, **extra,
+            "time": time.time(), "source": "web", "id": str(result.get("id", ""))}
+
+
+class _SyncHandler(SimpleHTTPRequestHandler):
+    """Serves the exported files and accepts result batches on POST /sync"""
+
+    def end_headers(self):
+        self.send_header("Access-Control-Allow-Origin", "*")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type")
+        super().end_headers()
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self.end_headers()
+
+    def do_POST(self):
+        if self.path.rstrip("/").split("?")[0] != "/sync":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BATCH_BYTES:
+            self.send_error(413)
+            return
+        try:
+            batch = json.loads(self.rfile.read(length))
+            if not isinstance(batch, list):
+                raise ValueError("expected a list of attempts")
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+        reply = json.dumps(self.server.receive(batch)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SyncServer(HTTPServer):
+    """Records synced attempts in an attempt store (or drops them when there is none)"""
+
+    def __init__(self, address, questions_bank, attempts, directory: Optional[str] = None,
+                 grading_policy=None):
+        handler = lambda *a, **kw: _SyncHandler(*a, directory=directory or os.devnull, **kw)
+        super().__init__(address, handler)
+        self.bank = questions_bank
+        self.policy = grading_policy or policy.default()
+        self.attempts = attempts
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def receive(self, batch: List) -> Dict[str, int]:
+        accepted = duplicates = rejected = 0
+        with self._lock:
+            for result in batch:
+                try:
+                    attempt = score_web_attempt(self.bank, result, self.policy)
+                except ValueError:
+                    rejected += 1
+                    continue
+                if attempt["id"] and self._already_stored(attempt):
+                    duplicates += 1
+                    continue
+                if self.attempts is not None:
+                    self.attempts.record(attempt)
+                self._seen.add((attempt["student"], attempt["id"]))
+                accepted += 1
+            if self.attempts is not None:
+                self.attempts.sync()
+        return {"accepted": accepted, "duplicates": duplicates, "rejected": rejected}
+
+    def _already_stored(self, attempt: Dict) -> bool:
+        # A batch is resent when its reply was lost, so ids are checked
+        key = (attempt["student"], attempt["id"])
+        if key in self._seen:
+            return True
+        if self.attempts is not None:
+            for stored in self.attempts.attempts_for_student(attempt["student"]):
+                if stored.get("id") == attempt["id"]:
+                    self._seen.add(key)
+                    return True
+        return False
+
+
+def collect(questions_bank, attempts, host: str = "127.0.0.1", port: int = 8080,
+            directory: Optional[str] = None, grading_policy=None):
+    """Accept synced results (and serve directory, if given) until interrupted"""
+    server = SyncServer((host, port), questions_bank, attempts, directory, grading_policy)
+    print(f"Collecting web results on http://{host}:{server.server_address[1]}/sync")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()